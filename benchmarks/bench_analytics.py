@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline do DataAnalyzer e dos cálculos dos dashboards.
+Gera (ou reaproveita) dados sintéticos, mede tempo e pico de memória de cada
+operação e compara com a baseline JSON em benchmarks/baselines/.
+
+Uso:
+    uv run python benchmarks/bench_analytics.py --rows 1000000
+    uv run python benchmarks/bench_analytics.py --rows 1000000 --save-baseline
+    uv run python benchmarks/bench_analytics.py --rows 10000000 --no-memory
+    uv run python benchmarks/bench_analytics.py --rows 1000000 --backend duckdb
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_utils import measure, save_baseline, load_baseline, compare, print_report
+from benchmarks.synthetic_data import write_dataset
+from src.services.data_tools import DataAnalyzer
+from src.services import dashboard_metrics
+
+SUITE = "analytics"
+
+
+def analyzer_cases(analyzer):
+    """Operações do DataAnalyzer com argumentos representativos das ferramentas do agente."""
+    ranked = analyzer.dataframes["FATO_AVDISCIPLINAS"][["COD_DISCIPLINA", "COD_CURSO", "ID_PERGUNTA"]].drop_duplicates().head(5000)
+
+    return {
+        "calculate_satisfaction[global]": lambda: analyzer.calculate_satisfaction("FATO_AVDISCIPLINAS"),
+        "calculate_satisfaction[COD_CURSO]": lambda: analyzer.calculate_satisfaction("FATO_AVDISCIPLINAS", group_by="COD_CURSO"),
+        "calculate_satisfaction[ID_PERGUNTA, filtro]": lambda: analyzer.calculate_satisfaction(
+            "FATO_AVINSTITUCIONAL", group_by="SIGLA_LOTACAO", filters={"ID_PERGUNTA": "2005"}),
+        "count_responses[COD_DISCIPLINA]": lambda: analyzer.count_responses("FATO_AVDISCIPLINAS", group_by="COD_DISCIPLINA"),
+        "count_responses[Desconheço]": lambda: analyzer.count_responses("FATO_AVINSTITUCIONAL", response_type="Desconheço"),
+        "join_with_dimension[DIM_PERGUNTAS]": lambda: analyzer.join_with_dimension(
+            "FATO_AVDISCIPLINAS", "DIM_PERGUNTAS", ["PERGUNTA", "EIXO_SINAES"]),
+        "join_aggregate[EIXO_SINAES]": lambda: analyzer.join_aggregate(
+            "FATO_AVDISCIPLINAS", "DIM_PERGUNTAS", "satisfacao", group_by="EIXO_SINAES"),
+        "get_top_n[satisfacao, COD_DISCIPLINA]": lambda: analyzer.get_top_n(
+            "FATO_AVDISCIPLINAS", metric="satisfacao", n=10, group_by="COD_DISCIPLINA"),
+        "get_top_n[contagem, SIGLA_LOTACAO]": lambda: analyzer.get_top_n(
+            "FATO_AVINSTITUCIONAL", metric="contagem", n=10, group_by="SIGLA_LOTACAO"),
+        "get_top_n[gap_desconhecimento, COD_CURSO]": lambda: analyzer.get_top_n(
+            "FATO_AVCURSOS", metric="gap_desconhecimento", n=10, group_by="COD_CURSO"),
+        "rollup[UNIDADE GESTORA]": lambda: analyzer.rollup("FATO_AVINSTITUCIONAL", "UNIDADE GESTORA"),
+        "drill_down[SETOR_CURSO, disciplinas]": lambda: analyzer.drill_down("FATO_AVDISCIPLINAS", "SETOR_CURSO"),
+        "custom_query": lambda: analyzer.custom_query("FATO_AVCURSOS", "RESPOSTA == 'Concordo' and ID_PERGUNTA == '1942'"),
+        "get_table_stats": lambda: analyzer.get_table_stats("FATO_AVDISCIPLINAS"),
+        "_auto_join_dimensions[5k linhas]": lambda: analyzer._auto_join_dimensions(ranked, "FATO_AVDISCIPLINAS"),
+    }
+
+
+def dashboard_cases(tables):
+    cursos = tables["FATO_AVCURSOS"]
+    inst = tables["FATO_AVINSTITUCIONAL"]
+    disc = tables["FATO_AVDISCIPLINAS"]
+    perguntas = tables["DIM_PERGUNTAS"]
+
+    return {
+        "dashboard[Visão Geral]": lambda: dashboard_metrics.compute_overview(cursos, inst, disc, perguntas),
+        "dashboard[Eixos SINAES]": lambda: dashboard_metrics.compute_sinaes(
+            cursos, inst, disc, perguntas, tables["DIM_TIPO_PERGUNTA_SINAES"]),
+        "dashboard[Qualidade de Ensino]": lambda: dashboard_metrics.compute_teaching(disc),
+        "dashboard[Gestão de cursos]": lambda: dashboard_metrics.compute_courses(cursos, disc, tables["DIM_CURSOS"]),
+        "dashboard[Clima institucional]": lambda: dashboard_metrics.compute_climate(inst, tables["DIM_UNIDADES"]),
+    }
+
+
+def run(data_dir, repeat=3, memory=True, backend="pandas"):
+    results = {}
+
+    print("Medindo carga (_load_all_dataframes)...")
+    results["load_all_dataframes"] = measure(
+        lambda: DataAnalyzer(data_dir=data_dir, backend=backend), repeat=1, memory=memory)
+
+    analyzer = DataAnalyzer(data_dir=data_dir, backend=backend)
+    for name, fn in analyzer_cases(analyzer).items():
+        print(f"Medindo {name}...")
+        results[name] = measure(fn, repeat=repeat, memory=memory)
+
+    for name, fn in dashboard_cases(analyzer.dataframes).items():
+        print(f"Medindo {name}...")
+        results[name] = measure(fn, repeat=repeat, memory=memory)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do DataAnalyzer e dos dashboards")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Linhas de FATO_AVDISCIPLINAS (1M, 10M, 20M)")
+    parser.add_argument("--data-root", default="/tmp/ufpr_bench", help="Onde guardar os dados sintéticos")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Não medir pico de memória (mais rápido)")
+    parser.add_argument("--backend", default="pandas", choices=["pandas", "duckdb"], help="Backend de execução do DataAnalyzer")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Folga antes de acusar regressão (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    data_dir = write_dataset(os.path.join(args.data_root, str(args.rows)), fact_rows=args.rows)
+    results = run(data_dir, repeat=args.repeat, memory=not args.no_memory, backend=args.backend)
+
+    variant = args.rows if args.backend == "pandas" else f"{args.rows}_{args.backend}"
+    baseline = load_baseline(SUITE, variant)
+    print()
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        print(f"\nBaseline gravada em {save_baseline(SUITE, variant, results)}")
+    elif baseline:
+        regressions = compare(results, baseline, tolerance=args.tolerance)
+        if regressions:
+            print("\nREGRESSÕES:")
+            for name, metric, before, after, ratio in regressions:
+                print(f"  {name} [{metric}]: {before} -> {after} ({ratio}x)")
+            sys.exit(1)
+        print("\nSem regressões em relação à baseline.")
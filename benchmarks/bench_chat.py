@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Benchmark ponta a ponta do chat com LLM simulado.
+Substitui GoogleGenAI/GoogleGenAIEmbedding por fakes determinísticos que
+seguem um roteiro ReAct (ferramenta -> observação -> resposta) para cada
+pergunta do corpus, e mede a montagem do agente (get_chat_engine), a latência
+do turno, o tempo em ferramentas e o tamanho dos prompts, sem chamar o Gemini.
+
+Uso:
+    uv run python benchmarks/bench_chat.py
+    uv run python benchmarks/bench_chat.py --llm-latency-ms 300 --data-dir /tmp/ufpr_bench/1000000
+    uv run python benchmarks/bench_chat.py --save-baseline
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, List
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.llms import CustomLLM, CompletionResponse, LLMMetadata
+from llama_index.core.llms.callbacks import llm_completion_callback
+from pydantic import PrivateAttr
+
+from benchmarks.bench_utils import save_baseline, load_baseline, compare, print_report
+from src.services import rag_engine, tracing
+from src.services.data_tools import DataAnalyzer
+
+SUITE = "chat"
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chat_corpus.json")
+QUESTION_MARKER = "Pergunta do usuário: "
+
+
+class ScriptedReActLLM(CustomLLM):
+    """
+    LLM falso: para a pergunta do turno, emite a próxima ação do roteiro
+    (uma por observação já recebida) e, no fim, a resposta final.
+    """
+
+    latency_ms: float = 0.0
+    _scripts: dict = PrivateAttr(default_factory=dict)
+
+    def __init__(self, scripts: dict, latency_ms: float = 0.0, **kwargs: Any):
+        super().__init__(latency_ms=latency_ms, **kwargs)
+        self._scripts = scripts
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name="scripted-react", context_window=1_000_000, num_output=2048)
+
+    def _next_step(self, prompt: str) -> str:
+        turn = prompt[prompt.rfind(QUESTION_MARKER):]
+        question = turn[len(QUESTION_MARKER):].split("\n", 1)[0].strip()
+        script = self._scripts.get(question)
+        if script is None:
+            return "Thought: I can answer without using any more tools.\nAnswer: Não sei responder."
+
+        done = turn.count("Observation:")
+        if done < len(script["steps"]):
+            step = script["steps"][done]
+            return (
+                f"Thought: Preciso usar a ferramenta {step['tool']}.\n"
+                f"Action: {step['tool']}\n"
+                f"Action Input: {json.dumps(step['args'], ensure_ascii=False)}"
+            )
+        return f"Thought: I can answer without using any more tools.\nAnswer: {script['answer']}"
+
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return CompletionResponse(text=self._next_step(prompt))
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        response = self.complete(prompt, formatted=formatted, **kwargs)
+        yield CompletionResponse(text=response.text, delta=response.text)
+
+
+class HashEmbedding(BaseEmbedding):
+    """Embedding determinístico (hash do texto), com a dimensão do text-embedding-004."""
+
+    dim: int = 768
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HashEmbedding"
+
+    def _embed(self, text: str) -> List[float]:
+        seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+        vector = np.random.default_rng(seed).standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._embed(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def run(corpus, data_dir, latency_ms=0.0, repeat=3):
+    from src.components.chat import run_agent_query, run_async
+
+    scripts = {item["question"]: item for item in corpus}
+    analyzer = DataAnalyzer(data_dir=data_dir)
+    # Índices (vetorial e de perguntas) com embeddings falsos vão para um diretório
+    # temporário: nunca sobrescrevem o storage/ do projeto
+    storage = tempfile.TemporaryDirectory(prefix="bench_chat_storage_")
+    vector_index = {}
+
+    def bench_vector_index(data_version=None):
+        if "index" not in vector_index:
+            vector_index["index"] = rag_engine.load_vector_index(storage.name, data_dir)
+        return vector_index["index"]
+
+    patches = [
+        mock.patch.object(rag_engine, "GoogleGenAI", lambda **kw: ScriptedReActLLM(scripts, latency_ms=latency_ms)),
+        mock.patch.object(rag_engine, "GoogleGenAIEmbedding", lambda **kw: HashEmbedding()),
+        mock.patch.object(rag_engine, "get_data_analyzer", lambda: analyzer),
+        mock.patch.object(rag_engine, "get_vector_index", bench_vector_index),
+        mock.patch.dict(os.environ, {"QUESTION_INDEX_DIR": storage.name}),
+    ]
+    for p in patches:
+        p.start()
+
+    results = {}
+    try:
+        for item in corpus:
+            question = item["question"]
+            build_times, turn_times, tool_times, llm_times = [], [], [], []
+            summary = None
+            prompt_chars = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                agent = rag_engine.get_chat_engine(api_key="fake")
+                build_times.append(time.perf_counter() - start)
+
+                trace = tracing.start_turn(question)
+                start = time.perf_counter()
+                run_async(run_agent_query(agent, f"{QUESTION_MARKER}{question}"))
+                turn_times.append(time.perf_counter() - start)
+                tracing.finish_turn(trace)
+
+                summary = trace.summary()
+                tool_times.append(summary["by_kind"].get("tool", {}).get("total_ms", 0.0) / 1000)
+                llm_times.append(summary["by_kind"].get("llm", {}).get("total_ms", 0.0) / 1000)
+                prompt_chars = [s["attrs"].get("prompt_chars", 0) for s in trace.spans if s["kind"] == "llm"]
+
+            turn = float(np.median(turn_times))
+            tools = float(np.median(tool_times))
+            llm = float(np.median(llm_times))
+            results[question] = {
+                "seconds": round(turn, 4),
+                "build_seconds": round(float(np.median(build_times)), 4),
+                "tool_seconds": round(tools, 4),
+                "llm_seconds": round(llm, 4),
+                "orchestration_seconds": round(max(0.0, turn - tools - llm), 4),
+                "react_iterations": summary["react_iterations"],
+                "max_prompt_chars": max(prompt_chars) if prompt_chars else 0,
+                "total_prompt_chars": sum(prompt_chars),
+            }
+    finally:
+        for p in patches:
+            p.stop()
+        storage.cleanup()
+
+    return results
+
+
+def print_details(results):
+    print(f"\n{'pergunta':<60} {'montagem':>9} {'turno':>8} {'tools':>8} {'orquestr.':>9} {'iter':>5} {'prompt máx':>11}")
+    for question, r in results.items():
+        print(f"{question[:60]:<60} {r['build_seconds']:>9.3f} {r['seconds']:>8.3f} {r['tool_seconds']:>8.3f} "
+              f"{r['orchestration_seconds']:>9.3f} {r['react_iterations']:>5} {r['max_prompt_chars']:>11,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do chat com LLM simulado")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Latência simulada por chamada ao LLM")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    results = run(corpus, args.data_dir, latency_ms=args.llm_latency_ms, repeat=args.repeat)
+    variant = os.path.basename(os.path.normpath(args.data_dir))
+
+    baseline = load_baseline(SUITE, variant)
+    print_details(results)
+    print()
+    print_report(results, baseline)
+
+    if args.save_baseline:
+        print(f"\nBaseline gravada em {save_baseline(SUITE, variant, results)}")
+    elif baseline:
+        regressions = compare(results, baseline, tolerance=args.tolerance)
+        if regressions:
+            print("\nREGRESSÕES:")
+            for name, metric, before, after, ratio in regressions:
+                print(f"  {name} [{metric}]: {before} -> {after} ({ratio}x)")
+            sys.exit(1)
+        print("\nSem regressões em relação à baseline.")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark da leitura dos CSVs: leitura anterior (sep=None com engine python e
+fallback para ';') contra src.services.csv_loader.load_csv, em MB/s por arquivo.
+
+Uso:
+    uv run python benchmarks/bench_ingest.py --rows 1000000
+    uv run python benchmarks/bench_ingest.py --rows 1000000 --save-baseline
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_utils import measure, save_baseline, load_baseline, compare, print_report
+from benchmarks.synthetic_data import write_dataset
+from src.services.csv_loader import load_csv, detect_dialect, CSV_ENGINE
+
+SUITE = "ingest"
+
+
+def legacy_read(path):
+    """Leitura usada antes do csv_loader em dashboard, DataAnalyzer e indexadores."""
+    try:
+        df = pd.read_csv(path, sep=None, engine='python', dtype=str)
+    except:
+        df = pd.read_csv(path, sep=';', dtype=str)
+    df.columns = df.columns.str.replace('\ufeff', '').str.strip()
+    return df.fillna("")
+
+
+def run(data_dir, repeat=3, memory=True, legacy=True):
+    results = {}
+    files = sorted(f for f in os.listdir(data_dir) if f.endswith(".csv"))
+
+    for file in files:
+        path = os.path.join(data_dir, file)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        readers = {"load_csv": lambda: load_csv(path)}
+        if legacy:
+            readers["legado"] = lambda: legacy_read(path)
+
+        for reader, fn in readers.items():
+            name = f"{reader}[{file}]"
+            print(f"Medindo {name}...")
+            result = measure(fn, repeat=repeat, memory=memory)
+            if "seconds" in result and result["seconds"] > 0:
+                result["mb_per_s"] = round(size_mb / result["seconds"], 1)
+            results[name] = result
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da leitura dos CSVs")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Linhas de FATO_AVDISCIPLINAS (1M, 10M, 20M)")
+    parser.add_argument("--data-root", default="/tmp/ufpr_bench", help="Onde guardar os dados sintéticos")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Não medir pico de memória (mais rápido)")
+    parser.add_argument("--no-legacy", action="store_true", help="Não medir a leitura anterior (lenta em 10M+)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Folga antes de acusar regressão (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    data_dir = write_dataset(os.path.join(args.data_root, str(args.rows)), fact_rows=args.rows)
+    print(f"Engine: {CSV_ENGINE}")
+    for file in sorted(f for f in os.listdir(data_dir) if f.endswith(".csv")):
+        print(f"  {file}: {detect_dialect(os.path.join(data_dir, file))}")
+
+    results = run(data_dir, repeat=args.repeat, memory=not args.no_memory, legacy=not args.no_legacy)
+
+    baseline = load_baseline(SUITE, args.rows)
+    print()
+    print_report(results, baseline)
+    print()
+    print(f"{'leitura':<48} {'MB/s':>10}")
+    for name, r in results.items():
+        if "mb_per_s" in r:
+            print(f"{name:<48} {r['mb_per_s']:>10.1f}")
+
+    if args.save_baseline:
+        print(f"\nBaseline gravada em {save_baseline(SUITE, args.rows, results)}")
+    elif baseline:
+        regressions = compare(results, baseline, tolerance=args.tolerance)
+        if regressions:
+            print("\nREGRESSÕES:")
+            for name, metric, before, after, ratio in regressions:
+                print(f"  {name} [{metric}]: {before} -> {after} ({ratio}x)")
+            sys.exit(1)
+        print("\nSem regressões em relação à baseline.")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tokens das observações das ferramentas do agente: formato anterior
+(DataFrame.to_string) x formato compacto (TSV com orçamento de tokens).
+Executa cada passo do corpus do chat (benchmarks/chat_corpus.json) diretamente
+nas ferramentas, sem LLM, e mede os tokens estimados de cada observação.
+
+Uso:
+    uv run python benchmarks/bench_tool_results.py
+    uv run python benchmarks/bench_tool_results.py --data-dir /tmp/ufpr_bench/1000000
+"""
+
+import argparse
+import json
+import os
+import sys
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.data_tools import DataAnalyzer
+from src.services.rag_engine import create_analysis_tools
+from src.services.result_format import RESULT_FORMAT_ENV, estimate_tokens
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chat_corpus.json")
+
+
+def observations(analyzer, corpus, result_format):
+    """Observações de cada passo do corpus no formato informado: {pergunta: [texto, ...]}."""
+    with mock.patch.dict(os.environ, {RESULT_FORMAT_ENV: result_format}):
+        tools = {tool.metadata.name: tool for tool in create_analysis_tools(analyzer)}
+        return {
+            item["question"]: [
+                str(tools[step["tool"]].fn(**step["args"])) if step["tool"] in tools else ""
+                for step in item["steps"]
+            ]
+            for item in corpus
+        }
+
+
+def run(corpus, data_dir):
+    analyzer = DataAnalyzer(data_dir=data_dir)
+    legacy = observations(analyzer, corpus, "table")
+    compact = observations(analyzer, corpus, "compact")
+
+    results = {}
+    for question in legacy:
+        before = sum(estimate_tokens(text) for text in legacy[question])
+        after = sum(estimate_tokens(text) for text in compact[question])
+        results[question] = {
+            "legacy_tokens": before,
+            "compact_tokens": after,
+            "savings_%": round((1 - after / before) * 100, 1) if before else 0.0,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tokens das observações das ferramentas por formato")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--data-dir", default="data")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    results = run(corpus, args.data_dir)
+    print(f"\n{'pergunta':<60} {'anterior':>9} {'compacto':>9} {'economia':>9}")
+    for question, r in results.items():
+        print(f"{question[:60]:<60} {r['legacy_tokens']:>9,} {r['compact_tokens']:>9,} {r['savings_%']:>8.1f}%")
+
+    before = sum(r["legacy_tokens"] for r in results.values())
+    after = sum(r["compact_tokens"] for r in results.values())
+    savings = (1 - after / before) * 100 if before else 0.0
+    print(f"\n{'total':<60} {before:>9,} {after:>9,} {savings:>8.1f}%")
+    print("(tokens estimados por observação; cada observação é reenviada nas iterações ReAct seguintes)")
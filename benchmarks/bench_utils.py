@@ -0,0 +1,110 @@
+"""
+Utilitários compartilhados pelos benchmarks: medição de tempo/memória de pico
+e baselines em JSON para detectar regressões.
+"""
+
+import json
+import os
+import platform
+import statistics
+import time
+import tracemalloc
+
+import pandas as pd
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+def measure(fn, repeat=3, memory=True):
+    """
+    Executa fn `repeat` vezes e retorna a mediana do tempo.
+    Com memory=True, roda mais uma vez sob tracemalloc para medir o pico de memória
+    (em separado, para não distorcer o tempo).
+
+    Returns:
+        Dicionário {seconds, peak_mb} (ou {error} se fn falhar)
+    """
+    timings = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+
+        result = {"seconds": round(statistics.median(timings), 4)}
+        if memory:
+            tracemalloc.start()
+            try:
+                fn()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            result["peak_mb"] = round(peak / 1024 / 1024, 2)
+        return result
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+def environment_info():
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def baseline_path(suite, variant):
+    return os.path.join(BASELINE_DIR, f"{suite}_{variant}.json")
+
+
+def save_baseline(suite, variant, results):
+    """Grava os resultados como baseline da suíte para essa variante (ex: tamanho dos dados)."""
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = baseline_path(suite, variant)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment_info(), "results": results}, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def load_baseline(suite, variant):
+    path = baseline_path(suite, variant)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Compara com a baseline. Uma medição é regressão se o tempo ou o pico de memória
+    passar de baseline * (1 + tolerance).
+
+    Returns:
+        Lista de (nome, métrica, baseline, atual, razão) das regressões
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if not previous or "error" in current or "error" in previous:
+            continue
+        for metric in ("seconds", "peak_mb"):
+            if metric in current and previous.get(metric):
+                ratio = current[metric] / previous[metric]
+                if ratio > 1 + tolerance:
+                    regressions.append((name, metric, previous[metric], current[metric], round(ratio, 2)))
+    return regressions
+
+
+def print_report(results, baseline=None):
+    print(f"{'medição':<48} {'tempo (s)':>10} {'pico (MB)':>10} {'vs base':>8}")
+    for name, r in results.items():
+        if "error" in r:
+            print(f"{name:<48} ERRO: {r['error']}")
+            continue
+        ratio = ""
+        if baseline and name in baseline["results"] and baseline["results"][name].get("seconds"):
+            ratio = f"{r['seconds'] / baseline['results'][name]['seconds']:.2f}x"
+        peak = f"{r['peak_mb']:.1f}" if "peak_mb" in r else "-"
+        print(f"{name:<48} {r['seconds']:>10.4f} {peak:>10} {ratio:>8}")
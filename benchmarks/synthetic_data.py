@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Gerador de dados sintéticos para os benchmarks.
+Segue o TABLES_SCHEMA (tabelas, FKs e proporção de linhas entre as tabelas fato)
+e o layout real dos CSVs em data/ (separador ';', BOM, colunas extras como
+ID_PESQUISA e SETOR_CURSO). As cardinalidades imitam as dos dados reais:
+poucos setores, centenas de cursos, milhares de disciplinas, distribuição
+assimétrica (Zipf) de respostas por curso/disciplina.
+
+Uso:
+    uv run python benchmarks/synthetic_data.py --rows 1000000 --out /tmp/ufpr_bench
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.table_metadata import TABLES_SCHEMA
+
+SETORES = [
+    "SETOR DE CIÊNCIAS DA SAÚDE", "SETOR DE TECNOLOGIA", "SETOR DE CIÊNCIAS HUMANAS",
+    "SETOR DE CIÊNCIAS EXATAS", "SETOR DE CIÊNCIAS BIOLÓGICAS", "SETOR DE CIÊNCIAS AGRÁRIAS",
+    "SETOR DE CIÊNCIAS SOCIAIS APLICADAS", "SETOR DE CIÊNCIAS JURÍDICAS", "SETOR DE EDUCAÇÃO",
+    "SETOR DE ARTES, COMUNICAÇÃO E DESIGN", "SETOR PALOTINA", "SETOR LITORAL",
+    "CENTRO DE ESTUDOS DO MAR", "CAMPUS AVANÇADO EM JANDAIA DO SUL", "PRÓ-REITORIA DE GRADUAÇÃO",
+]
+
+LOTACAO_PREFIXOS = ["AC", "BL", "CB", "CE", "CH", "CJ", "CS", "ED", "EX", "HC", "LT", "PL", "SA", "TC", "GAB", "PROGEPE", "PRA"]
+
+EIXOS = [
+    "Eixo 1: Planejamento e Avaliação", "Eixo 2: Desenvolvimento Institucional",
+    "Eixo 3: Políticas Acadêmicas", "Eixo 4: Políticas de Gestão", "Eixo 5: Infraestrutura",
+]
+
+DIMENSOES = [
+    "Dim 1: Missão e PDI", "Dim 2: Ensino (Pedagógico)", "Dim 2: Ensino (Políticas)",
+    "Dim 3: Resp. Social", "Dim 5: Pessoal e Carreira", "Dim 6: Gestão e Organização",
+    "Dim 6: Gestão (Hosp. Escola)", "Dim 7: Infraestrutura", "Dim 10: Sust. Financeira",
+]
+
+TIPOS = ["AvPDSPF", "RSsc", "PIAc", "GIns", "InfF", "PDIn", "SFin", "PPes", "CSoc", "AvIn", "PEst", "OGes", "IPes", "PlAv", "DInst"]
+
+# Faixas de ID_PERGUNTA por questionário (incluem os IDs fixos usados pelo dashboard)
+QUESTION_RANGES = {
+    "FATO_AVDISCIPLINAS": (1700, 1800, [523]),
+    "FATO_AVCURSOS": (1800, 1970, [604, 605, 606, 607]),
+    "FATO_AVINSTITUCIONAL": (1970, 2031, [644]),
+}
+
+RESPOSTAS = np.array(["Concordo", "Discordo", "Desconheço", ""], dtype=object)
+
+
+def _zipf_choice(rng, n_items, size, a=1.3):
+    """Índices em [0, n_items) com distribuição assimétrica (poucos itens concentram muitas linhas)."""
+    weights = 1.0 / np.arange(1, n_items + 1) ** (a - 1.0)
+    weights = weights[rng.permutation(n_items)]
+    return rng.choice(n_items, size=size, p=weights / weights.sum())
+
+
+def _responses(rng, bias):
+    """Sorteia RESPOSTA para cada linha dado um viés de concordância por linha."""
+    p_concordo = np.clip(0.62 + bias, 0.05, 0.95)
+    u = rng.random(len(bias))
+    out = np.where(u < p_concordo, 0, np.where(u < p_concordo + (1 - p_concordo) * 0.5, 1, 2))
+    out[rng.random(len(bias)) < 0.008] = 3
+    return RESPOSTAS[out]
+
+
+def generate_dimensions(seed=42):
+    """Gera as tabelas DIM_* com cardinalidades próximas às do TABLES_SCHEMA."""
+    rng = np.random.default_rng(seed)
+
+    question_rows = []
+    for table, (start, stop, questionarios) in QUESTION_RANGES.items():
+        for i, qid in enumerate(range(start, stop)):
+            questionario = questionarios[i % len(questionarios)]
+            question_rows.append({
+                "ID_PERGUNTA": str(qid),
+                "PERGUNTA": f"Pergunta sintética {qid} sobre {rng.choice(['ensino', 'gestão', 'infraestrutura', 'transparência', 'segurança', 'comunicação'])} na UFPR.",
+                "ID_QUESTIONARIO": str(questionario),
+                "QUESTIONARIO": f"Questionário {questionario}",
+                "CL_PERGUNTA": table.replace("FATO_AV", "").title(),
+                "Tipo_Pergunta": TIPOS[rng.integers(len(TIPOS))],
+                "EIXO_SINAES": EIXOS[rng.integers(len(EIXOS))],
+                "DIM_SINAES": DIMENSOES[rng.integers(len(DIMENSOES))],
+                "Ordem": str(i + 1),
+            })
+    dim_perguntas = pd.DataFrame(question_rows)
+
+    n_cursos = TABLES_SCHEMA["DIM_CURSOS"]["row_count_approx"]
+    cod_cursos = np.array([f"40001016{i:03d}G0" for i in range(n_cursos)], dtype=object)
+    setor_curso = np.array(SETORES, dtype=object)[rng.integers(len(SETORES), size=n_cursos)]
+    dim_cursos = pd.DataFrame({
+        "COD_CURSO": cod_cursos,
+        "CURSO": [f"CURSO SINTÉTICO {i}" for i in range(n_cursos)],
+        "SETOR_CURSO": setor_curso,
+    })
+
+    n_disc = TABLES_SCHEMA["DIM_DISCIPLINAS"]["row_count_approx"]
+    disc_curso = rng.integers(n_cursos, size=n_disc)
+    dim_disciplinas = pd.DataFrame({
+        "COD_DISCIPLINA": [f"D{i:05d}" for i in range(n_disc)],
+        "NOME_DISCIPLINA": [f"DISCIPLINA SINTÉTICA {i}" for i in range(n_disc)],
+        "COD_CURSO": cod_cursos[disc_curso],
+        "IDPROGRAMA": cod_cursos[disc_curso],
+        "MULTIPLA_ESCOLHA": "Não",
+        "CURSO": dim_cursos["CURSO"].values[disc_curso],
+        "SETOR_CURSO": setor_curso[disc_curso],
+    })
+
+    n_unidades = 300
+    prefixos = np.array(LOTACAO_PREFIXOS, dtype=object)[rng.integers(len(LOTACAO_PREFIXOS), size=n_unidades)]
+    dim_unidades = pd.DataFrame({
+        "SIGLA_LOTACAO": [f"{p}/U{i:03d}" for i, p in enumerate(prefixos)],
+        "UNIDADE GESTORA": [f"Unidade Gestora {p}" for p in prefixos],
+        "LOTACAO": [f"Lotação sintética {i}" for i in range(n_unidades)],
+    })
+
+    dim_tipo = pd.DataFrame({
+        "Tipo_Perg": TIPOS,
+        "Grupo_de_Pergunta": [f"Grupo {t}" for t in TIPOS],
+    })
+
+    return {
+        "DIM_PERGUNTAS": dim_perguntas,
+        "DIM_CURSOS": dim_cursos,
+        "DIM_DISCIPLINAS": dim_disciplinas,
+        "DIM_UNIDADES": dim_unidades,
+        "DIM_TIPO_PERGUNTA_SINAES": dim_tipo,
+    }
+
+
+def _fact_skeleton(rng, n_rows, table, questions_per_respondent):
+    """ID_PESQUISA/ID_QUESTIONARIO/ID_PERGUNTA para n_rows, em blocos por respondente."""
+    start, stop, questionarios = QUESTION_RANGES[table]
+    n_questions = stop - start
+    rows = np.arange(n_rows)
+    resp_idx = rows // questions_per_respondent
+    offsets = rows % questions_per_respondent
+    first_question = rng.integers(n_questions, size=resp_idx[-1] + 1)
+    question = start + (first_question[resp_idx] + offsets) % n_questions
+    questionario = np.array(questionarios)[(question - start) % len(questionarios)]
+    return resp_idx, question, questionario
+
+
+def generate_facts(dims, fact_rows=1_000_000, seed=42):
+    """
+    Gera as tabelas FATO_*. fact_rows é o tamanho de FATO_AVDISCIPLINAS;
+    as demais seguem a proporção de row_count_approx do TABLES_SCHEMA.
+    """
+    rng = np.random.default_rng(seed + 1)
+    base = TABLES_SCHEMA["FATO_AVDISCIPLINAS"]["row_count_approx"]
+    sizes = {t: max(1000, int(fact_rows * TABLES_SCHEMA[t]["row_count_approx"] / base)) for t in QUESTION_RANGES}
+
+    dim_cursos = dims["DIM_CURSOS"]
+    dim_disc = dims["DIM_DISCIPLINAS"]
+    dim_unid = dims["DIM_UNIDADES"]
+    curso_bias = rng.normal(0, 0.08, size=len(dim_cursos))
+    disc_bias = rng.normal(0, 0.1, size=len(dim_disc))
+    unid_bias = rng.normal(0, 0.1, size=len(dim_unid))
+    curso_pos = pd.Series(np.arange(len(dim_cursos)), index=dim_cursos["COD_CURSO"].values)
+
+    facts = {}
+    id_offset = 10000
+
+    n = sizes["FATO_AVDISCIPLINAS"]
+    resp_idx, question, questionario = _fact_skeleton(rng, n, "FATO_AVDISCIPLINAS", 18)
+    disc_of_resp = _zipf_choice(rng, len(dim_disc), resp_idx.max() + 1)
+    disc = disc_of_resp[resp_idx]
+    curso = curso_pos.loc[dim_disc["COD_CURSO"].values[disc]].values
+    facts["FATO_AVDISCIPLINAS"] = pd.DataFrame({
+        "ID_PESQUISA": (id_offset + resp_idx).astype(str),
+        "ID_QUESTIONARIO": questionario.astype(str),
+        "ID_PERGUNTA": question.astype(str),
+        "COD_DISCIPLINA": dim_disc["COD_DISCIPLINA"].values[disc],
+        "COD_CURSO": dim_cursos["COD_CURSO"].values[curso],
+        "SETOR_CURSO": dim_cursos["SETOR_CURSO"].values[curso],
+        "RESPOSTA": _responses(rng, disc_bias[disc] + curso_bias[curso]),
+        "SITUACAO": np.where(rng.random(n) < 0.8, "Fim respostas", "Início respostas"),
+    })
+    id_offset += resp_idx.max() + 1
+
+    n = sizes["FATO_AVCURSOS"]
+    resp_idx, question, questionario = _fact_skeleton(rng, n, "FATO_AVCURSOS", 20)
+    curso = _zipf_choice(rng, len(dim_cursos), resp_idx.max() + 1)[resp_idx]
+    facts["FATO_AVCURSOS"] = pd.DataFrame({
+        "ID_PESQUISA": (id_offset + resp_idx).astype(str),
+        "ID_QUESTIONARIO": questionario.astype(str),
+        "ID_PERGUNTA": question.astype(str),
+        "COD_CURSO": dim_cursos["COD_CURSO"].values[curso],
+        "SETOR_CURSO": dim_cursos["SETOR_CURSO"].values[curso],
+        "RESPOSTA": _responses(rng, curso_bias[curso]),
+        "SITUACAO": np.where(rng.random(n) < 0.8, "Fim respostas", "Início respostas"),
+    })
+    id_offset += resp_idx.max() + 1
+
+    n = sizes["FATO_AVINSTITUCIONAL"]
+    resp_idx, question, questionario = _fact_skeleton(rng, n, "FATO_AVINSTITUCIONAL", 40)
+    unid = _zipf_choice(rng, len(dim_unid), resp_idx.max() + 1)[resp_idx]
+    facts["FATO_AVINSTITUCIONAL"] = pd.DataFrame({
+        "ID_PESQUISA": (id_offset + resp_idx).astype(str),
+        "ID_QUESTIONARIO": questionario.astype(str),
+        "ID_PERGUNTA": question.astype(str),
+        "SIGLA_LOTACAO": dim_unid["SIGLA_LOTACAO"].values[unid],
+        "RESPOSTA": _responses(rng, unid_bias[unid]),
+        "SITUACAO": np.where(rng.random(n) < 0.8, "Fim respostas", "Início respostas"),
+    })
+
+    return facts
+
+
+def generate_tables(fact_rows=1_000_000, seed=42):
+    """Todas as tabelas (DIM_* e FATO_*) em memória, com colunas str como no DataAnalyzer."""
+    dims = generate_dimensions(seed)
+    tables = dict(dims)
+    tables.update(generate_facts(dims, fact_rows=fact_rows, seed=seed))
+    return tables
+
+
+def write_dataset(out_dir, fact_rows=1_000_000, seed=42):
+    """
+    Grava o conjunto sintético em out_dir no mesmo formato de data/ (';' + BOM).
+    Reaproveita os arquivos se o diretório já tiver sido gerado com os mesmos parâmetros.
+
+    Returns:
+        Caminho do diretório
+    """
+    marker = os.path.join(out_dir, f".synthetic_{fact_rows}_{seed}")
+    if os.path.exists(marker):
+        return out_dir
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, df in generate_tables(fact_rows, seed).items():
+        df.to_csv(os.path.join(out_dir, f"{name}.csv"), sep=";", index=False, encoding="utf-8-sig")
+    open(marker, "w").close()
+    return out_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos no layout de data/")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Linhas de FATO_AVDISCIPLINAS (1M, 10M, 20M)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="/tmp/ufpr_bench")
+    args = parser.parse_args()
+
+    out = write_dataset(os.path.join(args.out, str(args.rows)), fact_rows=args.rows, seed=args.seed)
+    print(f"Dados sintéticos gravados em {out}")
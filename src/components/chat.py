@@ -5,6 +5,8 @@ import nest_asyncio
 import inspect
 import re
 from src.services.rag_engine import get_chat_engine
+from src.services import tracing
+from src.services.session_memory import current_session, get_session_registry
 
 nest_asyncio.apply()
 
@@ -30,18 +32,76 @@ def run_async(coro):
     
     return loop.run_until_complete(coro)
 
+def render_debug_panel(trace: dict):
+    """Resumo do último turno: tempo por categoria, tokens e spans."""
+    import json
+    import pandas as pd
+    
+    summary = trace["summary"]
+    with st.expander("Diagnóstico do último turno"):
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Duração", f"{(summary['duration_ms'] or 0) / 1000:.2f}s")
+        col2.metric("Iterações ReAct", summary["react_iterations"])
+        col3.metric("Tokens (prompt/saída)", f"{summary['prompt_tokens']}/{summary['completion_tokens']}")
+        col4.metric("Linhas lidas", f"{summary['rows_scanned']:,}")
+        
+        df_kind = pd.DataFrame([
+            {"Categoria": kind, "Chamadas": info["count"], "Tempo (ms)": info["total_ms"]}
+            for kind, info in summary["by_kind"].items()
+        ])
+        if not df_kind.empty:
+            st.dataframe(df_kind, hide_index=True)
+        
+        df_spans = pd.DataFrame([
+            {
+                "Categoria": s["kind"],
+                "Nome": s["name"],
+                "Início (ms)": s["start_ms"],
+                "Duração (ms)": s["duration_ms"],
+                "Detalhes": json.dumps(s["attrs"], ensure_ascii=False, default=str)[:300],
+            }
+            for s in trace["spans"]
+        ])
+        if not df_spans.empty:
+            st.dataframe(df_spans, hide_index=True)
+        
+        st.download_button(
+            "Baixar trace (JSON lines)",
+            data=json.dumps(trace, ensure_ascii=False, default=str) + "\n",
+            file_name=f"trace_{trace['trace_id']}.jsonl",
+            mime="application/jsonl"
+        )
+
+def render_session_panel(stats: dict):
+    """Memória das sessões deste processo (SESSION_ADMIN_PANEL=true)."""
+    import pandas as pd
+    
+    with st.expander("Sessões"):
+        col1, col2 = st.columns(2)
+        col1.metric("Sessões", stats["sessions"])
+        col2.metric("Memória (MB)", f"{stats['total_bytes'] / 1024 ** 2:.2f}")
+        df_sessions = pd.DataFrame(stats["per_session"]).rename(columns={
+            "session_id": "Sessão",
+            "bytes": "Bytes",
+            "messages": "Mensagens",
+            "context_chars": "Contexto (caracteres)",
+            "idle_s": "Ociosa (s)",
+            "compactions": "Compactações",
+        })
+        if not df_sessions.empty:
+            st.dataframe(df_sessions, hide_index=True)
+
 def render_chat():
     st.header("Assistente de IA")
     
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    session = current_session()
 
     chat_engine = None
     
     from llama_index.core.llms import ChatMessage, MessageRole
     
     chat_history = []
-    for msg in st.session_state.messages:
+    for msg in session.messages:
         role = MessageRole.USER if msg["role"] == "user" else MessageRole.ASSISTANT
         chat_history.append(ChatMessage(role=role, content=msg["content"]))
     
@@ -54,14 +114,14 @@ def render_chat():
     messages_container = st.container(height=600)
 
     with messages_container:
-        for message in st.session_state.messages:
+        for message in session.messages:
             with st.chat_message(message["role"]):
                 st.markdown(message["content"])
 
     prompt = st.chat_input("Pergunte sobre os dados da avaliação...")
     
     if prompt:
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        session.messages.append({"role": "user", "content": prompt})
         
         with messages_container:
             st.chat_message("user").markdown(prompt)
@@ -71,11 +131,12 @@ def render_chat():
                 with st.chat_message("assistant"):
                     message_placeholder = st.empty()
                     full_response = ""
+                    turn_trace = tracing.start_turn(prompt)
                     
                     try:
                         context_msg = ""
-                        if "active_tab_context" in st.session_state:
-                            context = st.session_state['active_tab_context']
+                        if session.context:
+                            context = session.context
                             if len(context) > 30000:
                                 context = context[:30000] + "\n\n[Contexto truncado devido ao tamanho...]"
                             context_msg = f"\n\n--- CONTEXTO DOS DASHBOARDS (use se relevante) ---\n{context}\n-----------------------------------------\n\n"
@@ -83,22 +144,7 @@ def render_chat():
                         final_prompt = f"{context_msg}Pergunta do usuário: {prompt}"
                         
                         with st.spinner("Analisando e escolhendo ferramentas..."):
-                            try:
-                                response = run_async(run_agent_query(chat_engine, final_prompt))
-                            except Exception as e:
-                                from src.utils.key_manager import get_decrypted_key
-                                api_key_2 = get_decrypted_key("APP_SECRET_TOKEN_2", "GOOGLE_API_KEY_2")
-                                if api_key_2:
-                                    try:
-                                        new_chat_engine = get_chat_engine(api_key=api_key_2, chat_history=chat_history)
-                                        if new_chat_engine:
-                                            response = run_async(run_agent_query(new_chat_engine, final_prompt))
-                                        else:
-                                            raise e
-                                    except Exception:
-                                        raise e
-                                else:
-                                    raise e
+                            response = run_async(run_agent_query(chat_engine, final_prompt))
                         
                         if response is None or str(response).strip() == "":
                             raise ValueError("O modelo retornou uma resposta vazia. Tente reformular sua pergunta.")
@@ -109,12 +155,14 @@ def render_chat():
                         full_response = full_response.replace("undefined", "") 
                         message_placeholder.markdown(full_response)
                         
-                        st.session_state.messages.append({
+                        session.messages.append({
                             "role": "assistant", 
                             "content": full_response
                         })
+                        tracing.finish_turn(turn_trace)
                         
                     except Exception as e:
+                        tracing.finish_turn(turn_trace, status="error")
                         error_msg = f"Erro ao processar pergunta: {str(e)}"
                         message_placeholder.error(error_msg)
                         
@@ -125,15 +173,23 @@ def render_chat():
                         - Para conceitos, use: "o que é", "explique", "como funciona"
                         """)
                         
-                        st.session_state.messages.append({
+                        session.messages.append({
                             "role": "assistant",
                             "content": error_msg
                         })
+                    
+                    session.last_trace = turn_trace.to_dict()
         else:
             with messages_container:
                 st.error("IA não inicializada. Verifique a chave de API no .env")
     
-    if st.session_state.messages:
+    if os.getenv("CHAT_DEBUG_PANEL") == "true" and session.last_trace:
+        render_debug_panel(session.last_trace)
+    
+    if os.getenv("SESSION_ADMIN_PANEL") == "true":
+        render_session_panel(get_session_registry().stats())
+    
+    if session.messages:
         if st.button("Limpar conversa", type="secondary"):
-            st.session_state.messages = []
+            session.messages.clear()
             st.rerun()
@@ -0,0 +1,150 @@
+"""
+Leitura compartilhada dos CSVs de dados.
+O dialeto de cada arquivo (delimitador, encoding e BOM) é detectado uma única vez
+a partir de uma amostra do início do arquivo; a leitura em si usa o engine
+multi-thread do pyarrow quando ele está instalado (senão, o engine C do pandas).
+Todas as colunas são lidas como texto, com vazios como "", que é o formato
+esperado pelo DataAnalyzer, pelos dashboards e pelo indexador.
+"""
+
+import codecs
+import csv
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+SAMPLE_BYTES = 64 * 1024
+DELIMITERS = ";,\t|"
+DEFAULT_DELIMITER = ";"
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+_BOMS = [
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+class CsvDialect:
+    """Delimitador, encoding e presença de BOM de um arquivo CSV."""
+
+    def __init__(self, delimiter: str, encoding: str, has_bom: bool):
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.has_bom = has_bom
+
+    def __repr__(self) -> str:
+        return f"CsvDialect(delimiter={self.delimiter!r}, encoding={self.encoding!r}, has_bom={self.has_bom})"
+
+
+# Dialetos já detectados: {(caminho, tamanho, mtime): CsvDialect}
+_dialects: Dict[Tuple[str, int, int], CsvDialect] = {}
+_dialects_lock = threading.Lock()
+
+
+def _sniff_delimiter(text: str) -> str:
+    lines = [line for line in text.splitlines() if line.strip()][:50]
+    if not lines:
+        return DEFAULT_DELIMITER
+    try:
+        return csv.Sniffer().sniff("\n".join(lines), delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        # Cabeçalho sem aspas: o delimitador mais frequente na primeira linha
+        counts = {d: lines[0].count(d) for d in DELIMITERS}
+        best = max(counts, key=counts.get)
+        return best if counts[best] > 0 else DEFAULT_DELIMITER
+
+
+def detect_dialect(path: str) -> CsvDialect:
+    """
+    Detecta delimitador, encoding e BOM pelos primeiros SAMPLE_BYTES do arquivo.
+    O resultado é guardado por (caminho, tamanho, mtime): um arquivo inalterado não é reamostrado.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _dialects_lock:
+        if key in _dialects:
+            return _dialects[key]
+
+    with open(path, "rb") as f:
+        sample = f.read(SAMPLE_BYTES)
+
+    encoding = next((enc for bom, enc in _BOMS if sample.startswith(bom)), None)
+    has_bom = encoding is not None
+
+    if encoding is None:
+        try:
+            # Ignora a última linha da amostra, que pode ter sido cortada no meio de um caractere
+            cut = sample.rfind(b"\n") if len(sample) == SAMPLE_BYTES else len(sample)
+            sample[:cut if cut > 0 else len(sample)].decode("utf-8")
+            encoding = "utf-8"
+        except UnicodeDecodeError:
+            encoding = "latin-1"
+
+    text = sample.decode(encoding, errors="ignore").lstrip("\ufeff")
+    dialect = CsvDialect(_sniff_delimiter(text), encoding, has_bom)
+
+    with _dialects_lock:
+        _dialects[key] = dialect
+    return dialect
+
+
+def _read_header(path: str, dialect: CsvDialect) -> List[str]:
+    with open(path, encoding=dialect.encoding, newline="") as f:
+        header = next(csv.reader(f, delimiter=dialect.delimiter), [])
+    return [name.replace("\ufeff", "") for name in header]
+
+
+def _read_pyarrow(path: str, dialect: CsvDialect) -> pd.DataFrame:
+    """
+    Leitura multi-thread pelo pyarrow com todas as colunas declaradas como texto.
+    pd.read_csv(engine="pyarrow", dtype=str) infere os tipos e só depois converte:
+    perde zeros à esquerda ("001" -> "1") e transforma vazios em "None".
+    """
+    column_types = {name: pa.string() for name in _read_header(path, dialect)}
+    table = pa_csv.read_csv(
+        path,
+        parse_options=pa_csv.ParseOptions(delimiter=dialect.delimiter),
+        convert_options=pa_csv.ConvertOptions(column_types=column_types, strings_can_be_null=False),
+    )
+    return table.to_pandas()
+
+
+def load_csv(path: str, dialect: Optional[CsvDialect] = None) -> pd.DataFrame:
+    """
+    Lê um CSV como texto (dtype str, vazios como ""), com cabeçalhos sem BOM e sem espaços nas pontas.
+
+    Args:
+        path: Caminho do arquivo
+        dialect: Dialeto já conhecido (None = detect_dialect)
+
+    Raises:
+        ValueError: se o arquivo não puder ser interpretado com o dialeto detectado
+    """
+    dialect = dialect or detect_dialect(path)
+    # O BOM UTF-8 é removido do cabeçalho depois da leitura; utf-16 precisa do codec com BOM
+    options = dict(sep=dialect.delimiter, encoding=dialect.encoding, dtype=str)
+
+    df = None
+    if CSV_ENGINE == "pyarrow" and dialect.encoding == "utf-8":
+        try:
+            df = _read_pyarrow(path, dialect)
+        except Exception:
+            # Linhas irregulares ou aspas que o pyarrow não aceita: usa o engine C
+            df = None
+    if df is None:
+        try:
+            df = pd.read_csv(path, engine="c", **options)
+        except Exception as e:
+            raise ValueError(f"Não foi possível ler {os.path.basename(path)} ({dialect!r}): {e}")
+
+    df.columns = df.columns.astype(str).str.replace("\ufeff", "").str.strip()
+    return df.fillna("")
@@ -0,0 +1,265 @@
+"""
+Cálculos dos dashboards analíticos.
+Funções puras (sem Streamlit) usadas por src/components/dashboard.py e pelos benchmarks.
+Cada função recebe os DataFrames carregados e devolve um dicionário com os
+indicadores e tabelas exibidos na aba correspondente.
+"""
+
+import pandas as pd
+from typing import Any, Dict, Optional
+
+SOURCE_MAP = {
+    "Cursos": "Avaliação de Cursos",
+    "Institucional": "Avaliação Institucional",
+    "Disciplinas": "Avaliação de Disciplinas"
+}
+
+DIDATICA_IDS = ['1732', '1735', '1736', '1743', '1746', '1750']
+
+ASPECTS_MAP = {
+    'Metodologia': ['1736', '1743'],
+    'Conteúdo': ['1735', '1767'],
+    'Avaliação': ['1737', '1744', '1748', '1762']
+}
+
+CLIMATE_TOPICS = [
+    {'Topic': 'Transparência RH', 'ID': '2005'},
+    {'Topic': 'Segurança no Trabalho', 'ID': '2013'},
+    {'Topic': 'Familiaridade com o PDE/PDI', 'ID': '1984'}
+]
+
+HIST_BINS = [0, 50, 70, 80, 90, 95, 100.1]
+HIST_LABELS = ['<50% (Crítico)', '50-70% (Ruim)', '70-80% (Regular)', '80-90% (Bom)', '90-95% (Ótimo)', '95-100% (Excelência)']
+
+
+def score(df_subset: pd.DataFrame) -> float:
+    """Satisfação (% Concordo sobre Concordo + Discordo) de um subconjunto."""
+    if df_subset.empty:
+        return 0.0
+    concordo = int((df_subset['RESPOSTA'] == 'Concordo').sum())
+    discordo = int((df_subset['RESPOSTA'] == 'Discordo').sum())
+    total = concordo + discordo
+    return (concordo / total * 100) if total > 0 else 0.0
+
+
+def grouped_scores(df: pd.DataFrame, group_col: str) -> pd.DataFrame:
+    """
+    Agrupa por group_col e calcula is_concordo, is_discordo, total_valid,
+    satisfacao e discordancia (em %).
+    """
+    flags = pd.DataFrame({
+        group_col: df[group_col],
+        'is_concordo': (df['RESPOSTA'] == 'Concordo').astype(int),
+        'is_discordo': (df['RESPOSTA'] == 'Discordo').astype(int),
+    })
+    grouped = flags.groupby(group_col, observed=True)[['is_concordo', 'is_discordo']].sum().reset_index()
+    grouped['total_valid'] = grouped['is_concordo'] + grouped['is_discordo']
+    valid = grouped['total_valid'].where(grouped['total_valid'] > 0)
+    grouped['satisfacao'] = (grouped['is_concordo'] / valid * 100).fillna(0.0)
+    grouped['discordancia'] = (grouped['is_discordo'] / valid * 100).fillna(0.0)
+    return grouped
+
+
+def compute_overview(df_cursos, df_inst, df_disc, df_perguntas) -> Dict[str, Any]:
+    """Aba 'Visão Geral da Avaliação'."""
+    fatos_list = []
+    missing = []
+    for df, name in [(df_cursos, "Cursos"), (df_inst, "Institucional"), (df_disc, "Disciplinas")]:
+        if 'ID_PERGUNTA' in df.columns and 'RESPOSTA' in df.columns:
+            temp_df = df[['ID_PERGUNTA', 'RESPOSTA']].copy()
+            temp_df['TIPO_AVALIACAO'] = SOURCE_MAP[name]
+            fatos_list.append(temp_df)
+        else:
+            missing.append(name)
+
+    if not fatos_list:
+        return {"missing": missing, "df_grouped": None}
+
+    df_fatos = pd.concat(fatos_list, ignore_index=True)
+    df_merged = pd.merge(df_fatos, df_perguntas[['ID_PERGUNTA', 'PERGUNTA']], on='ID_PERGUNTA', how='inner')
+
+    total_rows = len(df_merged)
+    count_concordo = int((df_merged['RESPOSTA'] == 'Concordo').sum())
+    count_discordo = int((df_merged['RESPOSTA'] == 'Discordo').sum())
+    count_desconheco = int((df_merged['RESPOSTA'] == 'Desconheço').sum())
+
+    denom_satisfacao = count_concordo + count_discordo
+    satisfacao_geral = (count_concordo / denom_satisfacao * 100) if denom_satisfacao > 0 else 0
+    gap_desconhecimento = (count_desconheco / total_rows * 100) if total_rows > 0 else 0
+
+    source_counts = {
+        'Avaliação de Cursos': len(df_cursos) if df_cursos is not None else 0,
+        'Avaliação Institucional': len(df_inst) if df_inst is not None else 0,
+        'Avaliação de Disciplinas': len(df_disc) if df_disc is not None else 0,
+    }
+    # Pessoas (ID_PESQUISA distintos) por fonte; cada uma contribui com várias respostas
+    respondent_counts = {
+        SOURCE_MAP[name]: int(df['ID_PESQUISA'].nunique())
+        for df, name in [(df_cursos, "Cursos"), (df_inst, "Institucional"), (df_disc, "Disciplinas")]
+        if df is not None and 'ID_PESQUISA' in df.columns
+    }
+
+    df_grouped = grouped_scores(df_merged, 'TIPO_AVALIACAO')
+
+    return {
+        "missing": missing,
+        "satisfacao_geral": satisfacao_geral,
+        "gap_desconhecimento": gap_desconhecimento,
+        "engajamento_total": len(df_fatos),
+        "source_counts": source_counts,
+        "respondent_counts": respondent_counts,
+        "respondentes_total": sum(respondent_counts.values()),
+        "df_grouped": df_grouped,
+        "df_sorted_sat": df_grouped.sort_values('satisfacao', ascending=True),
+        "df_sorted_disc": df_grouped.sort_values('discordancia', ascending=True),
+    }
+
+
+def compute_sinaes(df_cursos, df_inst, df_disc, df_perguntas, df_tipo_sinaes) -> Optional[Dict[str, Any]]:
+    """Aba 'Eixos SINAES'. Retorna None se nenhuma tabela FATO tiver as colunas necessárias."""
+    cols = ['ID_PERGUNTA', 'RESPOSTA']
+    dfs_to_concat = [df[cols] for df in [df_cursos, df_inst, df_disc] if all(c in df.columns for c in cols)]
+    if not dfs_to_concat:
+        return None
+
+    df_master = pd.concat(dfs_to_concat, ignore_index=True)
+    df_master['ID_PERGUNTA'] = df_master['ID_PERGUNTA'].astype(str)
+    df_dim = df_perguntas[['ID_PERGUNTA', 'EIXO_SINAES', 'DIM_SINAES', 'Tipo_Pergunta']].copy()
+    df_dim['ID_PERGUNTA'] = df_dim['ID_PERGUNTA'].astype(str)
+
+    df_sinaes = pd.merge(df_master, df_dim, on='ID_PERGUNTA', how='inner')
+    df_sinaes = df_sinaes[(df_sinaes['EIXO_SINAES'] != '') & (df_sinaes['DIM_SINAES'] != '')]
+
+    total_types = df_tipo_sinaes['Tipo_Perg'].nunique()
+    evaluated_types = df_sinaes['Tipo_Pergunta'].nunique()
+    absent_types = max(0, total_types - evaluated_types)
+
+    df_coverage = pd.DataFrame({
+        'Status': ['Avaliado', 'Ausente'],
+        'Count': [evaluated_types, absent_types]
+    })
+    df_coverage['Percentage'] = (df_coverage['Count'] / total_types * 100).astype(int)
+    df_coverage['Label'] = df_coverage['Status'] + " (" + df_coverage['Percentage'].astype(str) + "%)"
+
+    df_axis_score = grouped_scores(df_sinaes, 'EIXO_SINAES').drop(columns='discordancia').sort_values('satisfacao', ascending=True)
+    df_dim_score = grouped_scores(df_sinaes, 'DIM_SINAES').drop(columns='discordancia').sort_values('satisfacao', ascending=True)
+
+    return {
+        "total_types": total_types,
+        "evaluated_types": evaluated_types,
+        "absent_types": absent_types,
+        "df_coverage": df_coverage,
+        "df_axis_score": df_axis_score,
+        "df_dim_score": df_dim_score,
+    }
+
+
+def compute_teaching(df_disc) -> Dict[str, Any]:
+    """Aba 'Qualidade de Ensino'."""
+    score_aderencia = score(df_disc[df_disc['ID_PERGUNTA'] == '1733'])
+    score_carga = score(df_disc[df_disc['ID_PERGUNTA'] == '1734'])
+
+    df_didatica = df_disc[df_disc['ID_PERGUNTA'].isin(DIDATICA_IDS)]
+    score_didatica = score(df_didatica)
+
+    disc_col = 'COD_DISCIPLINA' if 'COD_DISCIPLINA' in df_didatica.columns else 'ID_DISCIPLINA'
+    df_hist = None
+    if disc_col in df_didatica.columns:
+        df_by_disc = grouped_scores(df_didatica, disc_col)
+        df_by_disc['Range'] = pd.cut(df_by_disc['satisfacao'], bins=HIST_BINS, labels=HIST_LABELS, right=False)
+        df_hist = df_by_disc['Range'].value_counts().reindex(HIST_LABELS).reset_index()
+        df_hist.columns = ['Faixa de Satisfação', 'Número de Disciplinas']
+
+    df_aspects = pd.DataFrame([
+        {'Aspecto': aspect, 'Score': score(df_disc[df_disc['ID_PERGUNTA'].isin(ids)])}
+        for aspect, ids in ASPECTS_MAP.items()
+    ])
+
+    return {
+        "score_aderencia": score_aderencia,
+        "score_carga": score_carga,
+        "score_didatica": score_didatica,
+        "df_hist": df_hist,
+        "df_aspects": df_aspects,
+    }
+
+
+def compute_courses(df_cursos, df_disc, df_dim_cursos) -> Dict[str, Any]:
+    """Aba 'Gestão de cursos'. df_sector é None quando não há COD_CURSO/DIM_CURSOS."""
+    score_inter = score(df_cursos[df_cursos['ID_PERGUNTA'] == '1942'])
+    score_apoio = score(df_cursos[df_cursos['ID_PERGUNTA'] == '1957'])
+
+    df_vis = df_cursos[df_cursos['ID_PERGUNTA'] == '1820']
+    if not df_vis.empty:
+        desconheco_vis = int((df_vis['RESPOSTA'] == 'Desconheço').sum())
+        taxa_visibilidade = (1 - (desconheco_vis / len(df_vis))) * 100
+    else:
+        taxa_visibilidade = 0.0
+
+    result = {
+        "score_inter": score_inter,
+        "score_apoio": score_apoio,
+        "taxa_visibilidade": taxa_visibilidade,
+        "df_sector": None,
+        "global_mean": None,
+    }
+
+    if 'COD_CURSO' in df_disc.columns and df_dim_cursos is not None:
+        df_disc_clean = df_disc[['COD_CURSO', 'RESPOSTA']]
+        df_chart_source = pd.merge(df_disc_clean, df_dim_cursos[['COD_CURSO', 'SETOR_CURSO']], on='COD_CURSO', how='inner')
+        df_chart_source = df_chart_source[df_chart_source['SETOR_CURSO'] != 'PRÓ-REITORIA DE GRADUAÇÃO']
+
+        df_sector = grouped_scores(df_chart_source, 'SETOR_CURSO').drop(columns='discordancia')
+        total_valid_global = df_sector['total_valid'].sum()
+        global_mean = (df_sector['is_concordo'].sum() / total_valid_global * 100) if total_valid_global > 0 else 0
+
+        result["df_sector"] = df_sector
+        result["df_sorted_sector"] = df_sector.sort_values('satisfacao', ascending=True)
+        result["global_mean"] = global_mean
+
+    return result
+
+
+def compute_climate(df_inst, df_dim_unidades=None) -> Dict[str, Any]:
+    """
+    Aba 'Clima institucional'. df_top_unit é None quando não há SIGLA_LOTACAO.
+    Com DIM_UNIDADES, df_gestora agrega o resultado por lotação até a UNIDADE GESTORA.
+    """
+    score_transp = score(df_inst[df_inst['ID_PERGUNTA'] == '2005'])
+    score_seg = score(df_inst[df_inst['ID_PERGUNTA'] == '2013'])
+    score_gap = score(df_inst[df_inst['ID_PERGUNTA'] == '1984'])
+
+    df_top_unit = None
+    df_gestora = None
+    if 'SIGLA_LOTACAO' in df_inst.columns:
+        df_unit = grouped_scores(df_inst, 'SIGLA_LOTACAO').drop(columns='discordancia')
+        df_top_unit = df_unit.sort_values('satisfacao', ascending=True).tail(10)
+
+        if df_dim_unidades is not None and 'UNIDADE GESTORA' in df_dim_unidades.columns:
+            # Roll-up a partir do agregado por lotação, sem reagrupar as respostas
+            gestora = df_dim_unidades.drop_duplicates('SIGLA_LOTACAO').set_index('SIGLA_LOTACAO')['UNIDADE GESTORA']
+            df_gestora = df_unit.assign(**{'UNIDADE GESTORA': df_unit['SIGLA_LOTACAO'].map(gestora)})
+            df_gestora = df_gestora.dropna(subset=['UNIDADE GESTORA'])
+            df_gestora = df_gestora.groupby('UNIDADE GESTORA', observed=True)[['is_concordo', 'is_discordo', 'total_valid']].sum().reset_index()
+            valid = df_gestora['total_valid'].where(df_gestora['total_valid'] > 0)
+            df_gestora['satisfacao'] = (df_gestora['is_concordo'] / valid * 100).fillna(0.0)
+            df_gestora = df_gestora.sort_values('satisfacao', ascending=True)
+
+    polarization_data = []
+    for item in CLIMATE_TOPICS:
+        df_topic = df_inst[df_inst['ID_PERGUNTA'] == item['ID']]
+        if not df_topic.empty:
+            concordo = int((df_topic['RESPOSTA'] == 'Concordo').sum())
+            discordo = int((df_topic['RESPOSTA'] == 'Discordo').sum())
+            total_valid = concordo + discordo
+            net_score = (concordo - discordo) / total_valid * 100 if total_valid > 0 else 0
+            polarization_data.append({'Topic': item['Topic'], 'Net Score': net_score})
+
+    return {
+        "score_transp": score_transp,
+        "score_seg": score_seg,
+        "score_gap": score_gap,
+        "df_top_unit": df_top_unit,
+        "df_gestora": df_gestora,
+        "df_pol": pd.DataFrame(polarization_data, columns=['Topic', 'Net Score']),
+    }
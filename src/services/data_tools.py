@@ -6,8 +6,87 @@ nos DataFrames das tabelas de avaliação UFPR.
 
 import pandas as pd
 from typing import Dict, List, Any, Optional, Union
-import re
+import numpy as np
 from src.services.table_metadata import TABLES_SCHEMA, COMMON_METRICS, VALID_VALUES
+from src.services.tracing import annotate
+from src.services.query_expr import parse_filter, build_filter, validate_filter, compile_filter, Condition, BoolExpr
+from src.services.fact_store import FactStore, PARTITIONS_DIR, PARTITION_COLUMNS
+from src.services.csv_loader import load_csv
+from src.services.sql_backend import create_backend, response_counts, RESPONSE_COUNTS, SQL_MAX_ROWS
+from src.services.table_stats import profile_tables
+from src.services.query_planner import QueryPlanner, PLAN_ROLLUP, PLAN_INDEX
+from src.services.sampling import build_sample, APPROX_MIN_GROUP_SAMPLE
+from src.services.respondents import RespondentSet, HLL_STD_ERROR
+from src.services.response_matrix import ResponseMatrix, MIN_PAIR_RESPONDENTS
+from src.services.shared_store import attach, data_plane_mode
+from src.services.question_index import QuestionIndex, load_question_index
+
+DRILL_DOWN_METRICS = ['satisfacao', 'discordancia', 'net_score', 'gap_desconhecimento', 'contagem']
+
+# Coluna usada para ordenar fisicamente e particionar cada tabela fato: (coluna, separador).
+# Com separador, a chave da partição é o prefixo do valor antes dele (ex: 'AC' em 'AC/DX').
+SECTOR_PARTITION_KEYS = {
+    'FATO_AVCURSOS': ('SETOR_CURSO', None),
+    'FATO_AVDISCIPLINAS': ('SETOR_CURSO', None),
+    'FATO_AVINSTITUCIONAL': ('SIGLA_LOTACAO', '/'),
+}
+
+# Hierarquias de agregação de cada tabela fato, do nível mais fino ao mais agregado.
+# Níveis ausentes na fato são resolvidos pela dimensão cuja PK é o nível anterior.
+ROLLUP_HIERARCHIES = {
+    'FATO_AVINSTITUCIONAL': ['SIGLA_LOTACAO', 'UNIDADE GESTORA'],
+    'FATO_AVCURSOS': ['COD_CURSO', 'SETOR_CURSO'],
+    'FATO_AVDISCIPLINAS': ['COD_DISCIPLINA', 'COD_CURSO', 'SETOR_CURSO'],
+}
+
+# Matrizes respondente x pergunta mantidas em cache (por tabela e filtros)
+RESPONSE_MATRIX_CACHE = 16
+
+# Intervalo de confiança de 95% e peso (em respostas válidas) da média global na satisfação ajustada
+CONFIDENCE_Z = 1.96
+PRIOR_WEIGHT = 30
+
+
+def _wilson_interval(successes: pd.Series, n: pd.Series, z: float = CONFIDENCE_Z):
+    """Limites inferior e superior (em %) do intervalo de Wilson para successes/n."""
+    n_safe = n.where(n > 0)
+    p = successes / n_safe
+    z2 = z * z
+    center = (p + z2 / (2 * n_safe)) / (1 + z2 / n_safe)
+    margin = (z / (1 + z2 / n_safe)) * np.sqrt(p * (1 - p) / n_safe + z2 / (4 * n_safe * n_safe))
+    low = ((center - margin) * 100).round(2).fillna(0)
+    high = ((center + margin) * 100).round(2).fillna(0)
+    return low, high
+
+
+def _shrunk_rate(successes: pd.Series, n: pd.Series, prior: float, weight: float = PRIOR_WEIGHT) -> pd.Series:
+    """Taxa (em %) puxada para a média global: grupos com poucas respostas ficam perto de prior."""
+    return ((successes + weight * prior) / (n + weight) * 100).round(2)
+
+
+def _count_metrics(grouped: pd.DataFrame, group_cols: List[str], metrics: List[str]) -> pd.DataFrame:
+    """Métricas do drill_down a partir das colunas de RESPONSE_COUNTS já agregadas."""
+    valid = grouped['concordo'] + grouped['discordo']
+    valid_nonzero = valid.where(valid > 0)
+    total_nonzero = grouped['total'].where(grouped['total'] > 0)
+    
+    result = grouped[group_cols].copy()
+    for metric in metrics:
+        if metric == 'satisfacao':
+            result['satisfacao_%'] = (grouped['concordo'] / valid_nonzero * 100).round(2).fillna(0)
+        elif metric == 'discordancia':
+            result['discordancia_%'] = (grouped['discordo'] / valid_nonzero * 100).round(2).fillna(0)
+        elif metric == 'net_score':
+            result['net_score'] = ((grouped['concordo'] - grouped['discordo']) / valid_nonzero * 100).round(2).fillna(0)
+        elif metric == 'gap_desconhecimento':
+            result['gap_desconhecimento_%'] = (grouped['desconheco'] / total_nonzero * 100).round(2).fillna(0)
+        elif metric == 'contagem':
+            result['contagem'] = grouped['total']
+    
+    if any(m != 'contagem' for m in metrics):
+        result['total_respostas_validas'] = valid
+    
+    return result
 
 
 class DataAnalyzer:
@@ -16,42 +95,248 @@ class DataAnalyzer:
     Carrega os DataFrames em memória e fornece métodos para queries.
     """
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", backend: Optional[str] = None, data_plane: Optional[str] = None):
         """
         Inicializa o analisador carregando todos os DataFrames.
         
         Args:
             data_dir: Diretório contendo os arquivos CSV
+            backend: Backend de execução das contagens ('pandas' ou 'duckdb');
+                None usa a variável DATA_BACKEND (padrão pandas)
+            data_plane: 'local' (carrega os CSVs) ou 'shared' (anexa ao plano de dados
+                publicado pelo carregador); None usa a variável DATA_PLANE (padrão local)
         """
         self.data_dir = data_dir
+        self.data_plane = data_plane_mode(data_plane)
         self.dataframes: Dict[str, pd.DataFrame] = {}
-        self._load_all_dataframes()
+        self._dim_lookups: Dict[tuple, pd.Series] = {}
+        self._column_index: Dict[tuple, tuple] = {}
+        # Diretório de partições por tabela fato: {tabela: {(ANO, SEMESTRE): slice de linhas}}
+        self._partitions: Dict[str, Dict[tuple, slice]] = {}
+        self._partition_columns: Dict[str, List[str]] = {}
+        # Agregados por nível da hierarquia: {tabela: {nível: contagens}}, calculados no primeiro uso
+        self._rollups: Dict[str, Dict[str, pd.DataFrame]] = {}
+        self._rollup_base: Dict[str, pd.DataFrame] = {}
+        # Índice invertido por coluna: {(tabela, coluna): (linhas ordenadas por código, início de cada código)}
+        self._value_indexes: Dict[tuple, tuple] = {}
+        # Amostras estratificadas do modo aproximado (None = tabela pequena), criadas no primeiro uso
+        self._samples: Dict[str, Any] = {}
+        # Respondentes (ID_PESQUISA) por célula do nível mais fino da hierarquia: {tabela: (células, conjuntos)}
+        self._respondent_cells: Dict[str, tuple] = {}
+        self._response_matrices: Dict[tuple, ResponseMatrix] = {}
+        # Índice de busca das perguntas (DIM_PERGUNTAS), carregado do disco no primeiro uso
+        self._question_index: Optional[QuestionIndex] = None
+        shared = attach(data_dir) if self.data_plane == "shared" else None
+        if shared is not None:
+            self._attach_shared(shared)
+        else:
+            self._load_all_dataframes()
+            # Linhas reais, cardinalidades e valores mais frequentes (schema do agente e planejador)
+            self.table_stats = profile_tables(self.dataframes)
+        self.backend = create_backend(backend, self)
+        self.planner = QueryPlanner(self)
     
     def _load_all_dataframes(self):
         """Carrega todos os CSVs mencionados no schema."""
         import os
         
+        store = FactStore(os.path.join(self.data_dir, PARTITIONS_DIR))
+        
         for table_name in TABLES_SCHEMA.keys():
+            if table_name.startswith("FATO_") and store.list_partitions(table_name):
+                try:
+                    df, ranges = store.load(table_name)
+                    self.dataframes[table_name] = df
+                    self._partitions[table_name] = ranges
+                    self._partition_columns[table_name] = list(PARTITION_COLUMNS)
+                    continue
+                except Exception as e:
+                    print(f"Warning: Failed to load partitions of {table_name}: {e}")
+            
             file_path = os.path.join(self.data_dir, f"{table_name}.csv")
             if os.path.exists(file_path):
                 try:
-                    try:
-                        df = pd.read_csv(file_path, sep=None, engine='python', dtype=str)
-                    except:
-                        df = pd.read_csv(file_path, sep=';', dtype=str)
-                    
-                    df.columns = df.columns.str.replace('\ufeff', '').str.strip()
-                    
-                    df = df.fillna("")
-                    
-                    self.dataframes[table_name] = df
-                    
+                    self.dataframes[table_name] = load_csv(file_path)
                 except Exception as e:
                     print(f"Warning: Failed to load {table_name}: {e}")
+        
+        for table_name in SECTOR_PARTITION_KEYS:
+            if table_name in self.dataframes:
+                self._partition_by_sector(table_name)
+    
+    def _attach_shared(self, shared):
+        """
+        Usa as tabelas, partições, perfil e agregados publicados no plano de dados
+        (colunas mapeadas em memória, sem cópia por processo).
+        """
+        self.dataframes = dict(shared.dataframes)
+        self._partitions = dict(shared.partitions)
+        self._partition_columns = dict(shared.partition_columns)
+        self._rollups = dict(shared.rollups)
+        self._rollup_base = dict(shared.rollup_base)
+        self.table_stats = shared.table_stats
+    
+    def _partition_by_sector(self, table_name: str):
+        """
+        Ordena as linhas de cada partição pela chave de setor (SETOR_CURSO ou prefixo
+        de SIGLA_LOTACAO) e registra um intervalo contíguo por valor da chave.
+        O diretório passa a ter chaves (ANO, SEMESTRE, setor) ou só (setor).
+        """
+        column, separator = SECTOR_PARTITION_KEYS[table_name]
+        df = self.dataframes[table_name]
+        if column not in df.columns or df.empty:
+            return
+        
+        sector = df[column].str.split(separator, n=1).str[0] if separator else df[column]
+        sector = sector.to_numpy()
+        time_ranges = self._partitions.get(table_name) or {(): slice(0, len(df))}
+        
+        order = []
+        ranges: Dict[tuple, slice] = {}
+        start = 0
+        for time_key, rng in time_ranges.items():
+            positions = np.arange(rng.start, rng.stop)
+            positions = positions[np.argsort(sector[rng], kind='stable')]
+            values, counts = np.unique(sector[positions], return_counts=True)
+            for value, count in zip(values, counts):
+                ranges[time_key + (value,)] = slice(start, start + count)
+                start += count
+            order.append(positions)
+        
+        self.dataframes[table_name] = df.iloc[np.concatenate(order)].reset_index(drop=True)
+        self._partitions[table_name] = ranges
+        self._partition_columns[table_name] = self._partition_columns.get(table_name, []) + [column]
+    
+    def _partition_conditions(self, table_name: str, filters: Dict[str, Any]):
+        """
+        Condições dos filtros que podem ser avaliadas no diretório de partições.
+        Filtros sobre SIGLA_LOTACAO viram condições sobre o prefixo da partição.
+        """
+        columns = self._partition_columns.get(table_name, [])
+        keys = [c for c in filters if c in columns]
+        if not keys:
+            return []
+        
+        expr = build_filter({c: filters[c] for c in keys})
+        conditions = expr.operands if isinstance(expr, BoolExpr) else [expr]
+        
+        column, separator = SECTOR_PARTITION_KEYS.get(table_name, (None, None))
+        if not separator:
+            return conditions
+        
+        def _head(value):
+            return str(value).split(separator, 1)[0]
+        
+        translated = []
+        for cond in conditions:
+            if cond.column != column:
+                translated.append(cond)
+            elif cond.op == '==':
+                translated.append(Condition(column, '==', _head(cond.value)))
+            elif cond.op == 'in':
+                translated.append(Condition(column, 'in', [_head(v) for v in cond.value]))
+            elif cond.op == 'prefix':
+                # 'AC/' ou 'AC/D' fixam a partição; 'A' pode casar com várias
+                op = '==' if separator in cond.value else 'prefix'
+                translated.append(Condition(column, op, _head(cond.value)))
+        return translated
+    
+    def _kept_partitions(self, table_name: str, filters: Optional[Dict[str, Any]]) -> Optional[List[slice]]:
+        """
+        Intervalos das partições que podem satisfazer os filtros sobre as colunas de
+        partição, ou None se nenhuma partição é podada.
+        """
+        ranges = self._partitions.get(table_name)
+        if not ranges or not filters:
+            return None
+        
+        conditions = self._partition_conditions(table_name, filters)
+        if not conditions:
+            return None
+        
+        directory = pd.DataFrame(list(ranges.keys()), columns=self._partition_columns[table_name])
+        expr = conditions[0] if len(conditions) == 1 else BoolExpr('and', conditions)
+        
+        def _codes(col):
+            codes, uniques = pd.factorize(directory[col])
+            return codes, pd.Index(uniques)
+        
+        keep = compile_filter(expr, column_codes=_codes, column_values=lambda col: directory[col])()
+        if keep.all():
+            return None
+        return [r for r, k in zip(ranges.values(), keep) if k]
+    
+    def _pruned_row_count(self, table_name: str, filters: Optional[Dict[str, Any]]) -> int:
+        """Linhas que uma varredura com poda de partições leria."""
+        selected = self._kept_partitions(table_name, filters)
+        if selected is None:
+            return len(self.dataframes[table_name])
+        return sum(r.stop - r.start for r in selected)
+    
+    def _prune(self, table_name: str, filters: Optional[Dict[str, Any]]):
+        """
+        Poda de partições: mantém só as partições que podem satisfazer os filtros
+        sobre as colunas de partição (ANO, SEMESTRE, SETOR_CURSO, prefixo de SIGLA_LOTACAO).
+        
+        Returns:
+            (DataFrame com as linhas das partições mantidas, posições dessas linhas
+            na tabela completa ou None se nada foi podado)
+        """
+        df = self.dataframes[table_name]
+        selected = self._kept_partitions(table_name, filters)
+        if selected is None:
+            return df, None
+        
+        ranges = self._partitions[table_name]
+        annotate(partitions_scanned=len(selected), partitions_pruned=len(ranges) - len(selected))
+        if not selected:
+            return df.iloc[0:0], np.array([], dtype=int)
+        
+        # Partições vizinhas formam um único trecho contíguo
+        runs = [[selected[0].start, selected[0].stop]]
+        for r in selected[1:]:
+            if r.start == runs[-1][1]:
+                runs[-1][1] = r.stop
+            else:
+                runs.append([r.start, r.stop])
+        
+        if len(runs) == 1:
+            start, stop = runs[0]
+            return df.iloc[start:stop], np.arange(start, stop)
+        
+        rows = np.concatenate([np.arange(start, stop) for start, stop in runs])
+        return df.iloc[rows], rows
+    
+    def _dimension_lookup(self, dim_table: str, column: Optional[str] = None) -> Optional[pd.Series]:
+        """
+        Retorna o mapeamento código -> atributo da dimensão (Series indexada pela PK).
+        Sem column, usa a display_column. Calculado uma única vez por (dimensão, atributo)
+        e reaproveitado em todos os auto-joins e drill-downs.
+        """
+        dim_schema = TABLES_SCHEMA.get(dim_table, {})
+        column = column or dim_schema.get('display_column')
+        key = (dim_table, column)
+        if key in self._dim_lookups:
+            annotate(cache_hits=1)
+            return self._dim_lookups[key]
+        
+        pk = dim_schema.get('primary_key')
+        dim_df = self.dataframes.get(dim_table)
+        
+        if dim_df is None or pk not in dim_df.columns or column not in dim_df.columns:
+            return None
+        
+        # Mantém a primeira ocorrência de cada código para o join ser 1:1
+        dim_subset = dim_df[[pk, column]].drop_duplicates(subset=pk)
+        lookup = pd.Series(dim_subset[column].to_numpy(), index=pd.Index(dim_subset[pk]), name=column)
+        self._dim_lookups[key] = lookup
+        return lookup
+    
     def _auto_join_dimensions(self, df: pd.DataFrame, source_table: str) -> pd.DataFrame:
         """
         Automaticamente faz join com tabelas de dimensão para trazer nomes legíveis.
-        Verifica se o DataFrame tem colunas que são FKs e traz a display_column da dimensão.
+        Verifica se o DataFrame tem colunas que são FKs e traz a display_column da dimensão,
+        resolvendo cada FK pelo mapeamento pré-calculado (sem pd.merge).
         """
         if source_table not in TABLES_SCHEMA:
             return df
@@ -63,22 +348,16 @@ class DataAnalyzer:
         result = df.copy()
         
         for dim_table, (fk, pk) in schema['relationships'].items():
-            if fk in result.columns:
-                if dim_table in TABLES_SCHEMA and 'display_column' in TABLES_SCHEMA[dim_table]:
-                    display_col = TABLES_SCHEMA[dim_table]['display_column']
-                    
-                    if dim_table in self.dataframes:
-                        dim_df = self.dataframes[dim_table]
-                        
-                        dim_subset = dim_df[[pk, display_col]].drop_duplicates()
-                        
-                        result = pd.merge(
-                            result, 
-                            dim_subset, 
-                            left_on=fk, 
-                            right_on=pk, 
-                            how='left'
-                        )
+            if fk not in result.columns:
+                continue
+            
+            lookup = self._dimension_lookup(dim_table)
+            if lookup is None or lookup.name in result.columns:
+                continue
+            
+            if pk != fk:
+                result[pk] = result[fk].where(result[fk].isin(lookup.index))
+            result[lookup.name] = result[fk].map(lookup)
         
         return result
 
@@ -90,18 +369,36 @@ class DataAnalyzer:
         self, 
         table_name: str, 
         group_by: Optional[str] = None,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        min_valid: int = 0,
+        join_dimensions: bool = True,
+        approximate: bool = False
     ) -> pd.DataFrame:
         """
         Calcula satisfação (% Concordo sobre válidos).
         
+        Por grupo, também retorna o intervalo de confiança de Wilson (95%) e a
+        satisfação ajustada, que aproxima da média global os grupos com poucas
+        respostas válidas (peso PRIOR_WEIGHT).
+        
+        Com approximate=True em tabelas grandes, o resultado é estimado pela amostra
+        estratificada (ver src.services.sampling): o IC de 95% passa a ser o do erro
+        amostral e a coluna margem_erro_% traz sua meia-largura. Se a tabela for
+        pequena ou algum grupo tiver poucas linhas na amostra, o cálculo é exato.
+        
         Args:
             table_name: Nome da tabela (FATO_*)
             group_by: Coluna para agrupar (ex: 'COD_CURSO', 'SIGLA_LOTACAO')
-            filters: Dicionário de filtros {coluna: valor}
+            filters: Dicionário de filtros {coluna: valor}; aceita listas, operadores
+                e prefixo ({'SIGLA_LOTACAO': 'AC/*'}) como em drill_down
+            min_valid: Descarta grupos com menos respostas válidas que isso
+            join_dimensions: False devolve os grupos sem nomes das dimensões e sem ordenação
+                (get_top_n seleciona as N linhas antes de fazer o join)
+            approximate: Estimar pela amostra estratificada (perguntas exploratórias)
             
         Returns:
-            DataFrame com colunas: [group_by], satisfacao, total_respostas
+            DataFrame com colunas: [group_by], satisfacao_%, satisfacao_ajustada_%,
+            ic95_inf_%, ic95_sup_%, total_respostas_validas (e margem_erro_% se aproximado)
             
         Example:
             >>> analyzer.calculate_satisfaction('FATO_AVCURSOS', group_by='COD_CURSO')
@@ -110,50 +407,52 @@ class DataAnalyzer:
         if table_name not in self.dataframes:
             raise ValueError(f"Tabela {table_name} não encontrada. Disponíveis: {self.get_available_tables()}")
         
-        df = self.dataframes[table_name].copy()
-        
-        if filters:
-            for col, value in filters.items():
-                if col not in df.columns:
-                    raise ValueError(f"Coluna {col} não existe em {table_name}")
-                df = df[df[col] == str(value)]
-        
-        if 'RESPOSTA' not in df.columns:
-            raise ValueError(f"Tabela {table_name} não tem coluna RESPOSTA")
-        
-        df['is_concordo'] = (df['RESPOSTA'] == 'Concordo').astype(int)
-        df['is_discordo'] = (df['RESPOSTA'] == 'Discordo').astype(int)
+        if approximate:
+            estimate = self._approx_counts(table_name, [group_by] if group_by else [], filters, min_valid=min_valid)
+            if estimate is not None:
+                result = self._approx_satisfaction(estimate, group_by)
+                if not group_by or not join_dimensions:
+                    return result
+                return self._auto_join_dimensions(result, table_name).sort_values('satisfacao_%', ascending=False)
         
         if group_by:
-            if group_by not in df.columns:
-                raise ValueError(f"Coluna {group_by} não existe em {table_name}")
-            
-            grouped = df.groupby(group_by).agg({
-                'is_concordo': 'sum',
-                'is_discordo': 'sum'
-            }).reset_index()
-            
-            grouped['total_valid'] = grouped['is_concordo'] + grouped['is_discordo']
-            grouped['satisfacao'] = grouped.apply(
-                lambda x: round((x['is_concordo'] / x['total_valid'] * 100), 2) if x['total_valid'] > 0 else 0, 
-                axis=1
-            )
+            grouped = self._grouped_counts(table_name, [group_by], filters)
+            
+            total_valid = grouped['concordo'] + grouped['discordo']
+            prior = grouped['concordo'].sum() / total_valid.sum() if total_valid.sum() > 0 else 0
+            ic_low, ic_high = _wilson_interval(grouped['concordo'], total_valid)
+            
+            result = pd.DataFrame({
+                group_by: grouped[group_by],
+                'satisfacao_%': (grouped['concordo'] / total_valid.where(total_valid > 0) * 100).round(2).fillna(0),
+                'satisfacao_ajustada_%': _shrunk_rate(grouped['concordo'], total_valid, prior),
+                'ic95_inf_%': ic_low,
+                'ic95_sup_%': ic_high,
+                'total_respostas_validas': total_valid
+            })
             
-            result = grouped[[group_by, 'satisfacao', 'total_valid']].copy()
-            result.columns = [group_by, 'satisfacao_%', 'total_respostas_validas']
+            if min_valid:
+                result = result[result['total_respostas_validas'] >= min_valid]
+            
+            if not join_dimensions:
+                return result
             
             result = self._auto_join_dimensions(result, table_name)
             
             return result.sort_values('satisfacao_%', ascending=False)
         else:
-            total_concordo = df['is_concordo'].sum()
-            total_discordo = df['is_discordo'].sum()
+            counts = self._grouped_counts(table_name, [], filters)
+            total_concordo = counts['concordo'].iloc[0]
+            total_discordo = counts['discordo'].iloc[0]
             total_valid = total_concordo + total_discordo
             
             satisfacao = round((total_concordo / total_valid * 100), 2) if total_valid > 0 else 0
+            ic_low, ic_high = _wilson_interval(pd.Series([total_concordo]), pd.Series([total_valid]))
             
             return pd.DataFrame([{
                 'satisfacao_%': satisfacao,
+                'ic95_inf_%': float(ic_low.iloc[0]),
+                'ic95_sup_%': float(ic_high.iloc[0]),
                 'total_concordo': int(total_concordo),
                 'total_discordo': int(total_discordo),
                 'total_respostas_validas': int(total_valid)
@@ -164,7 +463,9 @@ class DataAnalyzer:
         table_name: str,
         group_by: Optional[str] = None,
         filters: Optional[Dict[str, Any]] = None,
-        response_type: Optional[str] = None
+        response_type: Optional[str] = None,
+        join_dimensions: bool = True,
+        approximate: bool = False
     ) -> pd.DataFrame:
         """
         Conta respostas com filtros opcionais.
@@ -174,6 +475,9 @@ class DataAnalyzer:
             group_by: Coluna para agrupar
             filters: Filtros a aplicar
             response_type: Tipo de resposta específico ('Concordo', 'Discordo', 'Desconheço')
+            join_dimensions: False devolve os grupos sem nomes das dimensões e sem ordenação
+            approximate: Estimar pela amostra estratificada, com a coluna margem_erro
+                (meia-largura do IC de 95%); volta ao cálculo exato como em calculate_satisfaction
             
         Returns:
             DataFrame com contagens
@@ -185,30 +489,41 @@ class DataAnalyzer:
         if table_name not in self.dataframes:
             raise ValueError(f"Tabela {table_name} não encontrada")
         
-        df = self.dataframes[table_name].copy()
-        
-        if filters:
-            for col, value in filters.items():
-                if col not in df.columns:
-                    raise ValueError(f"Coluna {col} não existe em {table_name}")
-                df = df[df[col] == str(value)]
-        
+        count_col = 'total'
         if response_type:
             if response_type not in VALID_VALUES['RESPOSTA']:
                 raise ValueError(f"response_type deve ser um de: {VALID_VALUES['RESPOSTA']}")
-            df = df[df['RESPOSTA'] == response_type]
+            count_col = RESPONSE_COUNTS[VALID_VALUES['RESPOSTA'].index(response_type)]
+        
+        estimate = self._approx_counts(table_name, [group_by] if group_by else [], filters) if approximate else None
+        if estimate is not None:
+            count = estimate[count_col].round().astype(int)
+            margin = (CONFIDENCE_Z * np.sqrt(estimate[f'var_{count_col}'])).round().astype(int)
+            if not group_by:
+                return pd.DataFrame([{'contagem_total': int(count.iloc[0]), 'margem_erro': int(margin.iloc[0])}])
+            
+            keep = count > 0
+            result = pd.DataFrame({
+                group_by: estimate.loc[keep, group_by], 'contagem': count[keep], 'margem_erro': margin[keep]
+            }).reset_index(drop=True)
+            if not join_dimensions:
+                return result
+            return self._auto_join_dimensions(result, table_name).sort_values('contagem', ascending=False)
         
         if group_by:
-            if group_by not in df.columns:
-                raise ValueError(f"Coluna {group_by} não existe em {table_name}")
+            counts = self._grouped_counts(table_name, [group_by], filters)
+            counts = counts[counts[count_col] > 0]
+            result = pd.DataFrame({group_by: counts[group_by], 'contagem': counts[count_col]}).reset_index(drop=True)
             
-            result = df.groupby(group_by).size().reset_index(name='contagem')
+            if not join_dimensions:
+                return result
             
             result = self._auto_join_dimensions(result, table_name)
             
             return result.sort_values('contagem', ascending=False)
         else:
-            return pd.DataFrame([{'contagem_total': len(df)}])
+            counts = self._grouped_counts(table_name, [], filters)
+            return pd.DataFrame([{'contagem_total': int(counts[count_col].iloc[0])}])
     
     def join_with_dimension(
         self,
@@ -240,8 +555,9 @@ class DataAnalyzer:
         
         fk, pk = TABLES_SCHEMA[fact_table]['relationships'][dim_table]
         
-        df_fact = self.dataframes[fact_table].copy()
-        df_dim = self.dataframes[dim_table].copy()
+        df_fact = self.dataframes[fact_table]
+        df_dim = self.dataframes[dim_table]
+        annotate(rows_scanned=len(df_fact) + len(df_dim))
         
         if dim_columns:
             cols_to_include = list(set([pk] + dim_columns))
@@ -251,6 +567,890 @@ class DataAnalyzer:
         
         return result
     
+    def join_aggregate(
+        self,
+        fact_table: str,
+        dim_table: str,
+        analysis_type: str = 'satisfacao',
+        group_by: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Agrega a tabela fato por um atributo da dimensão sem materializar o join completo.
+        
+        A fato é agregada primeiro pela FK (e pela coluna de agrupamento, se ela for da fato);
+        só o agregado, com uma linha por código, é cruzado com a projeção da dimensão.
+        O resultado é o mesmo de join_with_dimension + groupby.
+        
+        Args:
+            fact_table: Nome da tabela fato (FATO_*)
+            dim_table: Nome da tabela dimensão (DIM_*)
+            analysis_type: 'satisfacao' ou 'contagem'
+            group_by: Coluna para agrupar (da dimensão ou da fato)
+            
+        Returns:
+            DataFrame agregado
+            
+        Example:
+            >>> analyzer.join_aggregate('FATO_AVCURSOS', 'DIM_PERGUNTAS', 'satisfacao', group_by='EIXO_SINAES')
+        """
+        if fact_table not in self.dataframes:
+            raise ValueError(f"Tabela {fact_table} não encontrada")
+        if dim_table not in self.dataframes:
+            raise ValueError(f"Tabela {dim_table} não encontrada")
+        
+        if dim_table not in TABLES_SCHEMA[fact_table].get('relationships', {}):
+            raise ValueError(f"Não há relacionamento definido entre {fact_table} e {dim_table}")
+        
+        if analysis_type not in ('satisfacao', 'contagem'):
+            raise ValueError(f"Tipo de análise '{analysis_type}' não suportado. Use: satisfacao ou contagem")
+        
+        fk, pk = TABLES_SCHEMA[fact_table]['relationships'][dim_table]
+        
+        df_fact = self.dataframes[fact_table]
+        df_dim = self.dataframes[dim_table]
+        annotate(rows_scanned=len(df_fact) + len(df_dim))
+        
+        fact_keys = [fk]
+        dim_columns = [pk]
+        if group_by:
+            if group_by == fk or group_by == pk:
+                pass
+            elif group_by in df_dim.columns:
+                dim_columns.append(group_by)
+            elif group_by in df_fact.columns:
+                fact_keys.append(group_by)
+            else:
+                raise ValueError(f"Coluna {group_by} não existe em {fact_table} nem em {dim_table}")
+        
+        # Pré-agregação na fato: uma linha por (FK[, coluna da fato])
+        partial = df_fact[fact_keys].assign(
+            is_concordo=(df_fact['RESPOSTA'] == 'Concordo').astype(int),
+            is_discordo=(df_fact['RESPOSTA'] == 'Discordo').astype(int),
+            contagem=1
+        ).groupby(fact_keys, sort=False, observed=True).sum().reset_index()
+        
+        # Semi-join com a dimensão: só os códigos existentes (e suas repetições) entram
+        partial = pd.merge(partial, df_dim[dim_columns], left_on=fk, right_on=pk, how='inner')
+        
+        measures = ['is_concordo', 'is_discordo', 'contagem']
+        if group_by:
+            key = pk if group_by == pk else group_by
+            result = partial.groupby(key, observed=True)[measures].sum().reset_index()
+            if key != group_by:
+                result = result.rename(columns={key: group_by})
+        else:
+            result = partial[measures].sum().to_frame().T
+        
+        if analysis_type == 'contagem':
+            if group_by:
+                return result[[group_by, 'contagem']].sort_values('contagem', ascending=False)
+            return pd.DataFrame([{'contagem_total': int(result['contagem'].iloc[0])}])
+        
+        result['total_valid'] = result['is_concordo'] + result['is_discordo']
+        result['satisfacao_%'] = (
+            (result['is_concordo'] / result['total_valid'].where(result['total_valid'] > 0) * 100)
+            .round(2)
+            .fillna(0)
+        )
+        
+        if group_by:
+            result = result[[group_by, 'is_concordo', 'is_discordo', 'total_valid', 'satisfacao_%']]
+            return result.sort_values('satisfacao_%', ascending=False)
+        
+        return pd.DataFrame([{
+            'satisfacao_%': float(result['satisfacao_%'].iloc[0]),
+            'total_validas': int(result['total_valid'].iloc[0])
+        }])
+    
+    def _grouped_counts(
+        self,
+        table_name: str,
+        keys: List[str],
+        filters: Optional[Dict[str, Any]] = None
+    ) -> pd.DataFrame:
+        """
+        Contagens por resposta (RESPONSE_COUNTS) para cada combinação de keys, ordenadas
+        pelas chaves. Sem keys, uma única linha.
+        
+        O planejador (src.services.query_planner) escolhe pelo perfil da tabela a fonte
+        mais barata: agregado pré-calculado, índice invertido de uma coluna filtrada ou
+        varredura pelo backend de execução.
+        """
+        self._validate_counts(table_name, keys, filters)
+        plan = self.planner.plan(table_name, keys, filters)
+        annotate(**{f"plan_{plan.strategy}": 1})
+        
+        if plan.strategy == PLAN_ROLLUP:
+            return self._rollup_counts(table_name, keys, filters)
+        if plan.strategy == PLAN_INDEX:
+            return self._index_counts(table_name, keys, filters, plan.column, plan.values)
+        return self.backend.response_counts(table_name, keys, filters)
+    
+    def _validate_counts(self, table_name: str, keys: List[str], filters: Optional[Dict[str, Any]]):
+        """Valida a coluna RESPOSTA, as chaves e os filtros de uma contagem."""
+        df = self.dataframes[table_name]
+        if 'RESPOSTA' not in df.columns:
+            raise ValueError(f"Tabela {table_name} não tem coluna RESPOSTA")
+        for key in keys:
+            if key not in df.columns:
+                raise ValueError(f"Coluna {key} não existe em {table_name}")
+        if filters:
+            validate_filter(build_filter(filters), table_name, df.columns)
+    
+    def _approx_counts(
+        self,
+        table_name: str,
+        keys: List[str],
+        filters: Optional[Dict[str, Any]] = None,
+        min_valid: int = 0
+    ) -> Optional[pd.DataFrame]:
+        """
+        Contagens estimadas pela amostra estratificada da tabela (ver StratifiedSample.estimate),
+        sem os grupos com menos de min_valid respostas válidas estimadas.
+        None quando a consulta deve ser exata: tabela pequena demais para ser amostrada,
+        nenhuma linha amostrada ou grupo com menos de APPROX_MIN_GROUP_SAMPLE linhas na amostra.
+        """
+        self._validate_counts(table_name, keys, filters)
+        if table_name not in self._samples:
+            self._samples[table_name] = build_sample(table_name, self.dataframes[table_name])
+        sample = self._samples[table_name]
+        if sample is None:
+            return None
+        
+        estimate = sample.estimate(keys, filters)
+        if min_valid:
+            estimate = estimate[estimate['concordo'] + estimate['discordo'] >= min_valid].reset_index(drop=True)
+        if estimate.empty or (estimate['amostra'] < APPROX_MIN_GROUP_SAMPLE).any():
+            annotate(approx_fallback=1)
+            return None
+        
+        annotate(plan_sample=1, rows_scanned=len(sample.rows))
+        return estimate
+    
+    def _approx_satisfaction(self, estimate: pd.DataFrame, group_by: Optional[str]) -> pd.DataFrame:
+        """Colunas de calculate_satisfaction a partir das contagens estimadas, com IC do erro amostral."""
+        concordo, discordo = estimate['concordo'], estimate['discordo']
+        valid = concordo + discordo
+        rate = (concordo / valid.where(valid > 0)).fillna(0)
+        margin = CONFIDENCE_Z * np.sqrt(estimate['var_satisfacao'])
+        
+        if not group_by:
+            return pd.DataFrame([{
+                'satisfacao_%': round(float(rate.iloc[0]) * 100, 2),
+                'ic95_inf_%': round(max(float(rate.iloc[0] - margin.iloc[0]), 0) * 100, 2),
+                'ic95_sup_%': round(min(float(rate.iloc[0] + margin.iloc[0]), 1) * 100, 2),
+                'margem_erro_%': round(float(margin.iloc[0]) * 100, 2),
+                'total_concordo': int(round(concordo.iloc[0])),
+                'total_discordo': int(round(discordo.iloc[0])),
+                'total_respostas_validas': int(round(valid.iloc[0]))
+            }])
+        
+        prior = concordo.sum() / valid.sum() if valid.sum() > 0 else 0
+        return pd.DataFrame({
+            group_by: estimate[group_by],
+            'satisfacao_%': (rate * 100).round(2),
+            'satisfacao_ajustada_%': _shrunk_rate(concordo, valid, prior),
+            'ic95_inf_%': ((rate - margin).clip(lower=0) * 100).round(2),
+            'ic95_sup_%': ((rate + margin).clip(upper=1) * 100).round(2),
+            'margem_erro_%': (margin * 100).round(2),
+            'total_respostas_validas': valid.round().astype(int)
+        })
+    
+    def _rollup_counts(self, table_name: str, keys: List[str], filters: Optional[Dict[str, Any]]) -> pd.DataFrame:
+        """Contagens reagrupadas do agregado base (chaves e filtros sobre colunas dele)."""
+        self._build_rollups(table_name)
+        base = self._rollup_base[table_name]
+        annotate(rows_scanned=len(base), cache_hits=1)
+        
+        if filters:
+            def _codes(col):
+                codes, uniques = pd.factorize(base[col])
+                return codes, pd.Index(uniques)
+            
+            mask = compile_filter(build_filter(filters), column_codes=_codes, column_values=lambda col: base[col])()
+            base = base[mask]
+        
+        if not keys:
+            return base[RESPONSE_COUNTS].sum().to_frame().T.reset_index(drop=True)
+        return base.groupby(keys, dropna=False, observed=True)[RESPONSE_COUNTS].sum().reset_index()
+    
+    def _rollup_columns(self, table_name: str) -> set:
+        """Colunas da fato presentes no agregado base de _build_rollups (vazio se não houver)."""
+        df = self.dataframes[table_name]
+        levels = ROLLUP_HIERARCHIES.get(table_name)
+        if not levels or levels[0] not in df.columns or 'RESPOSTA' not in df.columns:
+            return set()
+        columns = {level for level in levels if level in df.columns}
+        if 'ID_PERGUNTA' in df.columns:
+            columns.add('ID_PERGUNTA')
+        return columns
+    
+    def _value_index(self, table_name: str, column: str):
+        """
+        Índice invertido de uma coluna sobre a codificação por dicionário:
+        (posições das linhas ordenadas por código, início de cada código nessa ordem).
+        As linhas de um valor são order[starts[código]:starts[código + 1]], em ordem crescente.
+        """
+        key = (table_name, column)
+        if key in self._value_indexes:
+            annotate(cache_hits=1)
+            return self._value_indexes[key]
+        
+        codes, uniques = self._column_codes(table_name, column)
+        order = np.argsort(codes, kind='stable')
+        missing = int((codes < 0).sum())
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        starts = missing + np.concatenate([[0], np.cumsum(counts)])
+        self._value_indexes[key] = (order, starts)
+        return self._value_indexes[key]
+    
+    def _index_counts(
+        self,
+        table_name: str,
+        keys: List[str],
+        filters: Dict[str, Any],
+        column: str,
+        values: List[Any]
+    ) -> pd.DataFrame:
+        """Contagens lendo só as linhas de column em values pelo índice invertido."""
+        order, starts = self._value_index(table_name, column)
+        _, uniques = self._column_codes(table_name, column)
+        positions = uniques.get_indexer([str(v) for v in values])
+        parts = [order[starts[p]:starts[p + 1]] for p in np.unique(positions[positions >= 0])]
+        rows = np.sort(np.concatenate(parts)) if parts else np.array([], dtype=int)
+        annotate(rows_scanned=len(rows))
+        
+        df = self.dataframes[table_name].iloc[rows]
+        df = df[self._filter_mask(table_name, filters, df=df, rows=rows)]
+        return response_counts(df[keys + ['RESPOSTA']], keys)
+    
+    def _filter_mask(
+        self,
+        table_name: str,
+        filters: Dict[str, Any],
+        df: Optional[pd.DataFrame] = None,
+        rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Máscara booleana dos filtros estruturados (escalar, lista ou dict de operadores).
+        Com df/rows (retorno de _prune), a máscara é calculada só sobre essas linhas.
+        """
+        full = self.dataframes[table_name]
+        df = full if df is None else df
+        expr = build_filter(filters)
+        validate_filter(expr, table_name, full.columns)
+        
+        def _codes(col):
+            codes, uniques = self._column_codes(table_name, col)
+            return (codes if rows is None else codes[rows]), uniques
+        
+        return compile_filter(expr, column_codes=_codes, column_values=lambda col: df[col])()
+    
+    def _resolve_group_column(self, table_name: str, column: str):
+        """
+        Localiza uma coluna de agrupamento: na própria tabela ou em uma dimensão relacionada.
+        
+        Returns:
+            (fk, dim_table) para atributos de dimensão, (column, None) para colunas da tabela
+        """
+        if column in self.dataframes[table_name].columns:
+            return column, None
+        
+        for dim_table, (fk, pk) in TABLES_SCHEMA[table_name].get('relationships', {}).items():
+            dim_df = self.dataframes.get(dim_table)
+            if dim_df is not None and column in dim_df.columns:
+                return fk, dim_table
+        
+        raise ValueError(f"Coluna {column} não existe em {table_name} nem nas dimensões relacionadas")
+    
+    def drill_down(
+        self,
+        table_name: str,
+        group_by: Union[str, List[str]],
+        metrics: Optional[List[str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> pd.DataFrame:
+        """
+        Calcula várias métricas por várias colunas de agrupamento em uma única passada.
+        
+        Sem filtros, agrupamentos só por níveis de ROLLUP_HIERARCHIES (e ID_PERGUNTA)
+        são respondidos a partir dos agregados pré-calculados (ver rollup).
+        
+        As colunas de agrupamento podem ser da tabela fato ou atributos das dimensões
+        relacionadas (ex: SETOR_CURSO de DIM_CURSOS, EIXO_SINAES de DIM_PERGUNTAS).
+        A fato é agregada uma vez pelas colunas/FKs necessárias e os atributos das
+        dimensões são resolvidos sobre esse agregado.
+        
+        Args:
+            table_name: Nome da tabela fato
+            group_by: Coluna ou lista de colunas para agrupar
+            metrics: Métricas entre satisfacao, discordancia, net_score, gap_desconhecimento
+                e contagem (None = satisfacao e contagem)
+            filters: Filtros {coluna: valor | [valores] | {operador: valor}}
+                (operadores: ==, !=, <, <=, >, >=, in, not in, between, prefix; 'AC/*' = prefixo)
+            
+        Returns:
+            DataFrame com uma linha por combinação de grupos e uma coluna por métrica
+            
+        Example:
+            >>> analyzer.drill_down('FATO_AVCURSOS', ['SETOR_CURSO', 'EIXO_SINAES'],
+            ...                     metrics=['satisfacao', 'gap_desconhecimento'],
+            ...                     filters={'ANO': {'between': [2022, 2024]}})
+        """
+        if table_name not in self.dataframes:
+            raise ValueError(f"Tabela {table_name} não encontrada. Disponíveis: {self.get_available_tables()}")
+        
+        df = self.dataframes[table_name]
+        if 'RESPOSTA' not in df.columns:
+            raise ValueError(f"Tabela {table_name} não tem coluna RESPOSTA")
+        
+        group_cols = [group_by] if isinstance(group_by, str) else list(group_by)
+        if not group_cols:
+            raise ValueError("Informe ao menos uma coluna em group_by")
+        
+        metrics = metrics or ['satisfacao', 'contagem']
+        unknown = [m for m in metrics if m not in DRILL_DOWN_METRICS]
+        if unknown:
+            raise ValueError(f"Métricas {unknown} não suportadas. Use: {DRILL_DOWN_METRICS}")
+        
+        rollup = self._rollup_source(table_name, group_cols) if not filters else None
+        if rollup is not None:
+            annotate(rows_scanned=len(rollup))
+            grouped = rollup.groupby(group_cols, dropna=False, observed=True)[RESPONSE_COUNTS].sum().reset_index()
+            return _count_metrics(grouped, group_cols, metrics).sort_values(group_cols).reset_index(drop=True)
+        
+        resolved = {col: self._resolve_group_column(table_name, col) for col in group_cols}
+        fact_keys = list(dict.fromkeys(key for key, _ in resolved.values()))
+        
+        # Única passada sobre a fato: contagens por resposta para cada combinação de chaves
+        partial = self._grouped_counts(table_name, fact_keys, filters)
+        
+        for col, (key, dim_table) in resolved.items():
+            if dim_table is not None:
+                partial[col] = partial[key].map(self._dimension_lookup(dim_table, col))
+        
+        grouped = partial.groupby(group_cols, dropna=False, observed=True)[RESPONSE_COUNTS].sum().reset_index()
+        result = _count_metrics(grouped, group_cols, metrics)
+        
+        return result.sort_values(group_cols).reset_index(drop=True)
+    
+    def trend(
+        self,
+        table_name: str,
+        metrics: Optional[List[str]] = None,
+        group_by: Optional[Union[str, List[str]]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> pd.DataFrame:
+        """
+        Série histórica: métricas por ciclo (ANO, SEMESTRE) e variação em relação
+        ao ciclo anterior (colunas delta_*, em pontos percentuais).
+        
+        Requer a tabela particionada por ciclo (ver src.services.fact_store).
+        
+        Args:
+            table_name: Nome da tabela fato
+            metrics: Métricas do drill_down (None = satisfacao)
+            group_by: Coluna(s) para separar as séries (ex: 'SETOR_CURSO')
+            filters: Filtros do drill_down (filtros por ANO/SEMESTRE podam partições)
+            
+        Returns:
+            DataFrame com uma linha por (grupo, ciclo), em ordem cronológica
+            
+        Example:
+            >>> analyzer.trend('FATO_AVCURSOS', metrics=['satisfacao', 'gap_desconhecimento'], group_by='SETOR_CURSO')
+        """
+        if table_name not in self.dataframes:
+            raise ValueError(f"Tabela {table_name} não encontrada. Disponíveis: {self.get_available_tables()}")
+        
+        order = self._cycle_order(table_name)
+        if not order:
+            raise ValueError(
+                f"Tabela {table_name} não tem ciclos particionados por ANO/SEMESTRE. "
+                f"Ingerir os ciclos com: python -m src.services.fact_store"
+            )
+        
+        group_cols = [] if not group_by else ([group_by] if isinstance(group_by, str) else list(group_by))
+        result = self.drill_down(
+            table_name, group_cols + PARTITION_COLUMNS, metrics=metrics or ['satisfacao'], filters=filters
+        )
+        
+        result['_ciclo'] = [order.get(key, -1) for key in zip(result['ANO'], result['SEMESTRE'])]
+        result = result.sort_values(group_cols + ['_ciclo']).reset_index(drop=True)
+        
+        value_cols = [
+            c for c in result.columns
+            if c not in group_cols + PARTITION_COLUMNS + ['_ciclo', 'total_respostas_validas', 'contagem']
+        ]
+        for col in value_cols:
+            previous = result.groupby(group_cols, dropna=False, observed=True)[col].shift() if group_cols else result[col].shift()
+            result[f'delta_{col}'] = (result[col] - previous).round(2)
+        
+        return result.drop(columns='_ciclo')
+    
+    def _cycle_order(self, table_name: str) -> Dict[tuple, int]:
+        """
+        Posição cronológica de cada ciclo (ANO, SEMESTRE) da tabela. As chaves do
+        diretório de partições podem trazer o setor como terceiro nível; só o
+        prefixo (ANO, SEMESTRE) conta, na ordem em que as partições foram carregadas.
+        """
+        if self._partition_columns.get(table_name, [])[:len(PARTITION_COLUMNS)] != list(PARTITION_COLUMNS):
+            return {}
+        order: Dict[tuple, int] = {}
+        for key in self._partitions.get(table_name, {}):
+            order.setdefault(key[:len(PARTITION_COLUMNS)], len(order))
+        return order
+    
+    def _hierarchy_lookup(self, child: str, parent: str) -> Optional[pd.Series]:
+        """Mapeamento child -> parent pela dimensão cuja PK é child (ex: SIGLA_LOTACAO -> UNIDADE GESTORA)."""
+        for dim_table, schema in TABLES_SCHEMA.items():
+            if dim_table.startswith('DIM_') and schema.get('primary_key') == child:
+                lookup = self._dimension_lookup(dim_table, parent)
+                if lookup is not None:
+                    return lookup
+        return None
+    
+    def _resolve_hierarchy(self, table_name: str, frame: pd.DataFrame) -> List[str]:
+        """
+        Acrescenta a frame (que tem o nível mais fino) os níveis da hierarquia ausentes,
+        mapeados pelas dimensões. Retorna os níveis resolvidos, do mais fino ao mais agregado.
+        """
+        levels = ROLLUP_HIERARCHIES[table_name]
+        resolved = [levels[0]]
+        for child, parent in zip(levels, levels[1:]):
+            if parent not in frame.columns:
+                lookup = self._hierarchy_lookup(child, parent)
+                if lookup is None:
+                    break
+                frame[parent] = frame[child].map(lookup)
+            resolved.append(parent)
+        return resolved
+    
+    def _build_rollups(self, table_name: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Agrega a tabela fato uma única vez no nível mais fino da hierarquia (por pergunta)
+        e deriva desse agregado as contagens de cada nível superior.
+        Retorna None se a tabela não tiver hierarquia ou a coluna do nível mais fino.
+        """
+        if table_name in self._rollups:
+            return self._rollups[table_name]
+        
+        df = self.dataframes.get(table_name)
+        levels = ROLLUP_HIERARCHIES.get(table_name)
+        if df is None or not levels or levels[0] not in df.columns or 'RESPOSTA' not in df.columns:
+            return None
+        
+        # Níveis presentes na fato entram no agrupamento; os demais vêm das dimensões
+        keys = [level for level in levels if level in df.columns]
+        if 'ID_PERGUNTA' in df.columns:
+            keys.append('ID_PERGUNTA')
+        base = self.backend.response_counts(table_name, keys)
+        resolved = self._resolve_hierarchy(table_name, base)
+        
+        rollups = {}
+        for i, level in enumerate(resolved):
+            # Cada linha do nível carrega seus ancestrais, para o drill-down a partir do pai
+            cols = resolved[i:]
+            rollups[level] = base.groupby(cols, sort=False, dropna=False, observed=True)[RESPONSE_COUNTS].sum().reset_index()
+        
+        self._rollup_base[table_name] = base
+        self._rollups[table_name] = rollups
+        return rollups
+    
+    def _rollup_source(self, table_name: str, group_cols: List[str]) -> Optional[pd.DataFrame]:
+        """
+        Menor agregado pré-calculado que contém todas as colunas de group_cols
+        (um nível da hierarquia ou o agregado base por pergunta), ou None.
+        """
+        levels = ROLLUP_HIERARCHIES.get(table_name, [])
+        if not set(group_cols) <= set(levels) | {'ID_PERGUNTA'}:
+            return None
+        
+        rollups = self._build_rollups(table_name)
+        if rollups is None:
+            return None
+        
+        for level in reversed(list(rollups)):
+            if set(group_cols) <= set(rollups[level].columns):
+                annotate(cache_hits=1)
+                return rollups[level]
+        
+        base = self._rollup_base[table_name]
+        if not set(group_cols) <= set(base.columns):
+            return None
+        annotate(cache_hits=1)
+        return base
+    
+    def rollup(
+        self,
+        table_name: str,
+        level: str,
+        parent: Optional[Dict[str, str]] = None,
+        metrics: Optional[List[str]] = None,
+        id_pergunta: Optional[Union[str, List[str]]] = None
+    ) -> pd.DataFrame:
+        """
+        Métricas em um nível da hierarquia da tabela (ROLLUP_HIERARCHIES), lidas dos
+        agregados pré-calculados, sem varrer a tabela fato:
+        
+            FATO_AVINSTITUCIONAL: SIGLA_LOTACAO -> UNIDADE GESTORA
+            FATO_AVCURSOS: COD_CURSO -> SETOR_CURSO
+            FATO_AVDISCIPLINAS: COD_DISCIPLINA -> COD_CURSO -> SETOR_CURSO
+        
+        Args:
+            table_name: Nome da tabela fato
+            level: Nível de agregação (ex: 'UNIDADE GESTORA')
+            parent: Restringe aos filhos de um nível superior (drill-down),
+                ex: {'UNIDADE GESTORA': 'Setor de Artes, Comunicação e Design'}
+            metrics: Métricas do drill_down (None = satisfacao e contagem)
+            id_pergunta: Pergunta(s) a considerar (None = todas)
+            
+        Returns:
+            DataFrame com uma linha por valor do nível, seus ancestrais e as métricas
+            
+        Example:
+            >>> analyzer.rollup('FATO_AVINSTITUCIONAL', 'SIGLA_LOTACAO',
+            ...                 parent={'UNIDADE GESTORA': 'Setor de Educação'})
+        """
+        if table_name not in self.dataframes:
+            raise ValueError(f"Tabela {table_name} não encontrada. Disponíveis: {self.get_available_tables()}")
+        
+        rollups = self._build_rollups(table_name)
+        if rollups is None:
+            raise ValueError(f"Tabela {table_name} não tem hierarquia de agregação")
+        if level not in rollups:
+            raise ValueError(f"Nível {level} não existe em {table_name}. Use: {list(rollups)}")
+        
+        metrics = metrics or ['satisfacao', 'contagem']
+        unknown = [m for m in metrics if m not in DRILL_DOWN_METRICS]
+        if unknown:
+            raise ValueError(f"Métricas {unknown} não suportadas. Use: {DRILL_DOWN_METRICS}")
+        
+        ancestors = list(rollups)[list(rollups).index(level):]
+        for parent_level in (parent or {}):
+            if parent_level not in ancestors[1:]:
+                raise ValueError(f"{parent_level} não é um nível acima de {level}. Use: {ancestors[1:]}")
+        
+        if id_pergunta is not None:
+            base = self._rollup_base[table_name]
+            if 'ID_PERGUNTA' not in base.columns:
+                raise ValueError(f"Tabela {table_name} não tem coluna ID_PERGUNTA")
+            ids = [id_pergunta] if isinstance(id_pergunta, str) else [str(i) for i in id_pergunta]
+            base = base[base['ID_PERGUNTA'].isin(ids)]
+            counts = base.groupby(ancestors, sort=False, dropna=False, observed=True)[RESPONSE_COUNTS].sum().reset_index()
+        else:
+            counts = rollups[level]
+        
+        for parent_level, value in (parent or {}).items():
+            counts = counts[counts[parent_level] == value]
+        
+        annotate(rows_scanned=len(counts))
+        result = _count_metrics(counts, ancestors, metrics).sort_values(level).reset_index(drop=True)
+        return self._auto_join_dimensions(result, table_name)
+    
+    def _build_respondent_cells(self, table_name: str) -> Optional[tuple]:
+        """
+        Conjuntos de respondentes de cada combinação dos níveis da hierarquia presentes na
+        fato (ex: cada SIGLA_LOTACAO), com os níveis superiores mapeados pelas dimensões.
+        Calculados uma vez; grupos e filtros sobre os níveis são uniões desses conjuntos.
+        
+        Returns:
+            (DataFrame com uma linha por célula e as colunas dos níveis, lista de
+            RespondentSet na mesma ordem) ou None se a tabela não tiver hierarquia
+        """
+        if table_name in self._respondent_cells:
+            return self._respondent_cells[table_name]
+        
+        df = self.dataframes[table_name]
+        levels = ROLLUP_HIERARCHIES.get(table_name)
+        if not levels or levels[0] not in df.columns:
+            return None
+        
+        resp_codes, resp_uniques = self._column_codes(table_name, 'ID_PESQUISA')
+        universe = len(resp_uniques)
+        fact_levels = [level for level in levels if level in df.columns]
+        cell_codes = df.groupby(fact_levels, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+        
+        # Pares (célula, respondente) distintos, ordenados por célula
+        pairs = np.unique(cell_codes.astype(np.int64) * universe + resp_codes)
+        pair_cells = pairs // universe
+        members = pairs % universe
+        bounds = np.searchsorted(pair_cells, np.arange(cell_codes.max() + 2 if len(df) else 1))
+        sets = [
+            RespondentSet.from_codes(members[bounds[c]:bounds[c + 1]], universe, assume_unique=True)
+            for c in range(len(bounds) - 1)
+        ]
+        
+        _, first_rows = np.unique(cell_codes, return_index=True)
+        cells = df.iloc[first_rows][fact_levels].reset_index(drop=True)
+        self._resolve_hierarchy(table_name, cells)
+        
+        self._respondent_cells[table_name] = (cells, sets)
+        return self._respondent_cells[table_name]
+    
+    def count_respondents(
+        self,
+        table_name: str,
+        group_by: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        join_dimensions: bool = True
+    ) -> pd.DataFrame:
+        """
+        Conta respondentes distintos (ID_PESQUISA), não linhas de resposta.
+        
+        Agrupamentos e filtros só sobre os níveis de ROLLUP_HIERARCHIES são respondidos
+        pela união dos conjuntos de respondentes pré-calculados por célula (sem varrer
+        a fato); os demais, por uma varredura das linhas filtradas. Grupos com mais de
+        HLL_MIN_DISTINCT respondentes usam HyperLogLog e trazem a coluna margem_erro (IC 95%).
+        
+        Args:
+            table_name: Nome da tabela fato
+            group_by: Coluna para agrupar (da fato, nível da hierarquia ou atributo de dimensão)
+            filters: Filtros como em drill_down
+            join_dimensions: False devolve os grupos sem nomes das dimensões e sem ordenação
+            
+        Returns:
+            DataFrame com [group_by] e respondentes
+            
+        Example:
+            >>> analyzer.count_respondents('FATO_AVCURSOS', group_by='SETOR_CURSO')
+            >>> analyzer.count_respondents('FATO_AVINSTITUCIONAL', filters={'SIGLA_LOTACAO': 'AC/*'})
+        """
+        if table_name not in self.dataframes:
+            raise ValueError(f"Tabela {table_name} não encontrada. Disponíveis: {self.get_available_tables()}")
+        df = self.dataframes[table_name]
+        if 'ID_PESQUISA' not in df.columns:
+            raise ValueError(f"Tabela {table_name} não tem coluna ID_PESQUISA (identificador do respondente)")
+        
+        prepared = self._build_respondent_cells(table_name)
+        cell_columns = set(prepared[0].columns) if prepared is not None else set()
+        expr = build_filter(filters) if filters else None
+        if expr is not None:
+            # Níveis vindos das dimensões (ex: UNIDADE GESTORA) também podem ser filtrados
+            validate_filter(expr, table_name, set(df.columns) | cell_columns)
+        
+        columns = ([group_by] if group_by else []) + (expr.columns() if expr is not None else [])
+        if prepared is not None and set(columns) <= cell_columns:
+            cells, sets = prepared
+            annotate(rows_scanned=len(cells))
+            if expr is not None:
+                def _codes(col):
+                    codes, uniques = pd.factorize(cells[col])
+                    return codes, pd.Index(uniques)
+                keep = np.flatnonzero(compile_filter(expr, column_codes=_codes, column_values=lambda col: cells[col])())
+            else:
+                keep = np.arange(len(cells))
+            
+            universe = len(self._column_codes(table_name, 'ID_PESQUISA')[1])
+            if group_by:
+                groups = cells[group_by].iloc[keep]
+                members = groups.groupby(groups.to_numpy(), sort=True, dropna=False).indices
+                unions = {value: RespondentSet.union([sets[keep[i]] for i in idx], universe) for value, idx in members.items()}
+            else:
+                unions = {None: RespondentSet.union([sets[i] for i in keep], universe)}
+        else:
+            if expr is not None:
+                validate_filter(expr, table_name, df.columns)
+            unions = self._scan_respondents(table_name, group_by, filters)
+        
+        result = pd.DataFrame({'respondentes': [len(u) for u in unions.values()]})
+        if group_by:
+            result.insert(0, group_by, list(unions.keys()))
+        if not all(u.exact for u in unions.values()):
+            result['margem_erro'] = [0 if u.exact else int(round(CONFIDENCE_Z * HLL_STD_ERROR * len(u))) for u in unions.values()]
+        
+        if not group_by or not join_dimensions:
+            return result
+        return self._auto_join_dimensions(result, table_name).sort_values('respondentes', ascending=False)
+    
+    def _scan_respondents(self, table_name: str, group_by: Optional[str], filters: Optional[Dict[str, Any]]) -> Dict[Any, RespondentSet]:
+        """Conjuntos de respondentes por grupo a partir das linhas filtradas (com poda de partições)."""
+        full = self.dataframes[table_name]
+        df, rows = self._prune(table_name, filters)
+        annotate(rows_scanned=len(df))
+        positions = np.arange(len(full)) if rows is None else rows
+        if filters:
+            positions = positions[self._filter_mask(table_name, filters, df=df, rows=rows)]
+        
+        resp_codes, resp_uniques = self._column_codes(table_name, 'ID_PESQUISA')
+        universe = len(resp_uniques)
+        respondents = resp_codes[positions]
+        if not group_by:
+            return {None: RespondentSet.from_codes(respondents, universe)}
+        
+        key, dim_table = self._resolve_group_column(table_name, group_by)
+        key_codes, key_uniques = self._column_codes(table_name, key)
+        values = pd.Series(key_uniques)
+        if dim_table is not None:
+            values = values.map(self._dimension_lookup(dim_table, group_by))
+        # Códigos do grupo: valores da fato ou atributo da dimensão, ordenados
+        group_codes, group_values = pd.factorize(values, sort=True, use_na_sentinel=False)
+        codes = group_codes[key_codes[positions]]
+        
+        pairs = np.unique(codes.astype(np.int64) * universe + respondents)
+        pair_groups = pairs // universe
+        bounds = np.searchsorted(pair_groups, np.arange(len(group_values) + 1))
+        members = pairs % universe
+        return {
+            group_values[g]: RespondentSet.from_codes(members[bounds[g]:bounds[g + 1]], universe, assume_unique=True)
+            for g in range(len(group_values)) if bounds[g + 1] > bounds[g]
+        }
+    
+    def _response_matrix(self, table_name: str, filters: Optional[Dict[str, Any]] = None) -> ResponseMatrix:
+        """Matriz respondente x pergunta das linhas filtradas, em cache por (tabela, filtros)."""
+        if table_name not in self.dataframes:
+            raise ValueError(f"Tabela {table_name} não encontrada. Disponíveis: {self.get_available_tables()}")
+        full = self.dataframes[table_name]
+        missing = [c for c in ('ID_PESQUISA', 'ID_PERGUNTA', 'RESPOSTA') if c not in full.columns]
+        if missing:
+            raise ValueError(f"Tabela {table_name} não tem as colunas {missing}")
+        
+        key = (table_name, repr(sorted((filters or {}).items())))
+        if key in self._response_matrices:
+            annotate(cache_hits=1)
+            return self._response_matrices[key]
+        
+        df, rows = self._prune(table_name, filters)
+        annotate(rows_scanned=len(df))
+        if filters:
+            df = df[self._filter_mask(table_name, filters, df=df, rows=rows)]
+        matrix = ResponseMatrix(df['ID_PESQUISA'].to_numpy(), df['ID_PERGUNTA'].to_numpy(), df['RESPOSTA'].to_numpy())
+        
+        if len(self._response_matrices) >= RESPONSE_MATRIX_CACHE:
+            self._response_matrices.pop(next(iter(self._response_matrices)))
+        self._response_matrices[key] = matrix
+        return matrix
+    
+    def question_correlations(
+        self,
+        table_name: str,
+        id_pergunta: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        top: int = 20,
+        min_respondents: int = MIN_PAIR_RESPONDENTS
+    ) -> pd.DataFrame:
+        """
+        Correlações entre perguntas sobre os mesmos respondentes (ID_PESQUISA), calculadas
+        na matriz esparsa respondente x pergunta (Concordo = +1, Discordo = -1).
+        
+        Args:
+            table_name: Nome da tabela fato
+            id_pergunta: Pergunta de referência (None = pares mais correlacionados)
+            filters: Filtros como em drill_down (ex: {'SIGLA_LOTACAO': 'AC/*'})
+            top: Número de linhas retornadas
+            min_respondents: Mínimo de respondentes em comum para a correlação valer
+            
+        Returns:
+            Com id_pergunta: ID_PERGUNTA, PERGUNTA, correlacao, respondentes (das outras perguntas);
+            sem: ID_PERGUNTA_A, ID_PERGUNTA_B, PERGUNTA_A, PERGUNTA_B, correlacao, respondentes
+            
+        Example:
+            >>> analyzer.question_correlations('FATO_AVINSTITUCIONAL', id_pergunta='2005')
+        """
+        corr, n = self._response_matrix(table_name, filters).correlations(min_pairs=min_respondents)
+        questions = corr.index
+        texts = self._dimension_lookup('DIM_PERGUNTAS')
+        
+        if id_pergunta is not None:
+            if str(id_pergunta) not in questions:
+                raise ValueError(f"Pergunta {id_pergunta} sem respostas válidas em {table_name}")
+            i = questions.get_loc(str(id_pergunta))
+            result = pd.DataFrame({
+                'ID_PERGUNTA': questions, 'correlacao': corr.iloc[:, i].to_numpy().round(3), 'respondentes': n[:, i].astype(int)
+            }).drop(index=i).dropna(subset=['correlacao'])
+            result = result.sort_values('correlacao', ascending=False).head(top)
+            return self._auto_join_dimensions(result.reset_index(drop=True), table_name)
+        
+        upper_a, upper_b = np.triu_indices(len(questions), k=1)
+        values = corr.to_numpy()[upper_a, upper_b]
+        pairs = pd.DataFrame({
+            'ID_PERGUNTA_A': questions[upper_a], 'ID_PERGUNTA_B': questions[upper_b],
+            'correlacao': values.round(3), 'respondentes': n[upper_a, upper_b].astype(int)
+        }).dropna(subset=['correlacao'])
+        pairs = pairs.reindex(pairs['correlacao'].abs().sort_values(ascending=False).index).head(top)
+        if texts is not None:
+            pairs['PERGUNTA_A'] = pairs['ID_PERGUNTA_A'].map(texts)
+            pairs['PERGUNTA_B'] = pairs['ID_PERGUNTA_B'].map(texts)
+        return pairs.reset_index(drop=True)
+    
+    def key_drivers(
+        self,
+        table_name: str,
+        target: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        min_respondents: int = MIN_PAIR_RESPONDENTS
+    ) -> pd.DataFrame:
+        """
+        Direcionadores da satisfação: quais perguntas mais acompanham a satisfação geral
+        do respondente (correlação item-total corrigida) ou a pergunta target.
+        
+        O quadrante cruza importância (correlação) e desempenho (satisfação) em relação
+        às medianas: 'Prioridade' são itens importantes com satisfação abaixo da mediana.
+        
+        Args:
+            table_name: Nome da tabela fato
+            target: ID_PERGUNTA usada como resultado (None = média das demais respostas)
+            filters: Filtros como em drill_down
+            min_respondents: Mínimo de respondentes para a correlação valer
+            
+        Returns:
+            DataFrame com ID_PERGUNTA, PERGUNTA, correlacao, satisfacao_%, respondentes e
+            quadrante, da pergunta mais para a menos importante
+            
+        Example:
+            >>> analyzer.key_drivers('FATO_AVINSTITUCIONAL', filters={'SIGLA_LOTACAO': 'AC/*'})
+        """
+        drivers = self._response_matrix(table_name, filters).key_drivers(
+            target=str(target) if target is not None else None, min_respondents=min_respondents
+        )
+        
+        scored = drivers['correlacao'].notna()
+        importance_median = drivers.loc[scored, 'correlacao'].median()
+        performance_median = drivers.loc[scored, 'satisfacao_%'].median()
+        important = drivers['correlacao'] >= importance_median
+        satisfied = drivers['satisfacao_%'] >= performance_median
+        drivers['quadrante'] = np.select(
+            [~scored, important & ~satisfied, important & satisfied, ~important & ~satisfied],
+            ['', 'Prioridade', 'Manter', 'Monitorar'],
+            default='Secundário'
+        )
+        
+        drivers = drivers.sort_values('correlacao', ascending=False, na_position='last').reset_index(drop=True)
+        return self._auto_join_dimensions(drivers, table_name)
+    
+    def _response_pivot(
+        self,
+        table_name: str,
+        group_by: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> pd.DataFrame:
+        """
+        Contagem de Concordo/Discordo/Desconheço por grupo em uma única passada
+        (_grouped_counts), com gap, satisfação e net score derivados.
+        Grupos sem alguma das respostas ficam com contagem 0.
+        """
+        if table_name not in self.dataframes:
+            raise ValueError(f"Tabela {table_name} não encontrada")
+        
+        counts = self._grouped_counts(table_name, [group_by] if group_by else [], filters)
+        if group_by:
+            counts = counts.set_index(group_by)
+        
+        concordo, discordo, desconheco, total = (counts[c] for c in RESPONSE_COUNTS)
+        valid = concordo + discordo
+        
+        result = pd.DataFrame({
+            'contagem_total': total,
+            'contagem_desconheco': desconheco,
+            'gap_desconhecimento_%': (desconheco / total.where(total > 0) * 100).round(2).fillna(0),
+            'satisfacao_%': (concordo / valid.where(valid > 0) * 100).round(2).fillna(0),
+            'net_score': ((concordo - discordo) / valid.where(valid > 0) * 100).round(2).fillna(0),
+            'total_respostas_validas': valid
+        })
+        
+        if group_by:
+            return result.rename_axis(group_by).reset_index()
+        return result.reset_index(drop=True)
+    
     def get_top_n(
         self,
         table_name: str,
@@ -258,7 +1458,10 @@ class DataAnalyzer:
         n: int = 10,
         group_by: Optional[str] = None,
         ascending: bool = False,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        min_valid: int = 0,
+        ranking: str = 'ajustada',
+        approximate: bool = False
     ) -> pd.DataFrame:
         """
         Retorna top N registros por métrica.
@@ -270,6 +1473,12 @@ class DataAnalyzer:
             group_by: Coluna para agrupar
             ascending: True para bottom N, False para top N
             filters: Filtros a aplicar
+            min_valid: Mínimo de respostas (válidas, para satisfação) para o grupo entrar no ranking
+            ranking: Critério para satisfação: 'ajustada' (satisfação ajustada pela média),
+                'conservadora' (limite do IC de Wilson: inferior no top, superior no bottom)
+                ou 'bruta' (satisfacao_%)
+            approximate: Estimar satisfação e contagem pela amostra estratificada
+                (ver calculate_satisfaction); gap_desconhecimento é sempre exato
             
         Returns:
             DataFrame com top/bottom N
@@ -279,75 +1488,162 @@ class DataAnalyzer:
             >>> analyzer.get_top_n('FATO_AVINSTITUCIONAL', metric='contagem', n=10, group_by='SIGLA_LOTACAO')
         """
         if metric == 'satisfacao':
-            df = self.calculate_satisfaction(table_name, group_by=group_by, filters=filters)
-            sort_col = 'satisfacao_%'
+            df = self.calculate_satisfaction(
+                table_name, group_by=group_by, filters=filters, min_valid=min_valid, join_dimensions=False,
+                approximate=approximate
+            )
+            if ranking == 'ajustada':
+                sort_col = 'satisfacao_ajustada_%' if group_by else 'satisfacao_%'
+            elif ranking == 'conservadora':
+                sort_col = ('ic95_sup_%' if ascending else 'ic95_inf_%') if group_by else 'satisfacao_%'
+            elif ranking == 'bruta':
+                sort_col = 'satisfacao_%'
+            else:
+                raise ValueError(f"Ranking '{ranking}' não suportado. Use: ajustada, conservadora, bruta")
         elif metric == 'contagem':
-            df = self.count_responses(table_name, group_by=group_by, filters=filters)
+            df = self.count_responses(
+                table_name, group_by=group_by, filters=filters, join_dimensions=False, approximate=approximate
+            )
+            if min_valid and group_by:
+                df = df[df['contagem'] >= min_valid]
             sort_col = 'contagem'
         elif metric == 'gap_desconhecimento':
-            df_all = self.count_responses(table_name, group_by=group_by, filters=filters)
-            df_desc = self.count_responses(
-                table_name, 
-                group_by=group_by, 
-                filters=filters, 
-                response_type='Desconheço'
-            )
-            
-            df = pd.merge(
-                df_all, 
-                df_desc, 
-                on=group_by if group_by else None,
-                how='left',
-                suffixes=('_total', '_desconheco')
-            )
-            df['gap_desconhecimento_%'] = round(
-                (df['contagem_desconheco'] / df['contagem_total'] * 100), 2
-            )
+            df = self._response_pivot(table_name, group_by=group_by, filters=filters)
+            if min_valid:
+                df = df[df['contagem_total'] >= min_valid]
             sort_col = 'gap_desconhecimento_%'
         else:
             raise ValueError(f"Métrica '{metric}' não suportada. Use: satisfacao, contagem, gap_desconhecimento")
         
-        if metric == 'gap_desconhecimento':
-             df = self._auto_join_dimensions(df, table_name)
-             
-        return df.sort_values(sort_col, ascending=ascending).head(n)
+        # Seleção parcial das N linhas; o join com as dimensões só toca o resultado
+        if df[sort_col].isna().any():
+            top = df.sort_values(sort_col, ascending=ascending).head(n)
+        elif ascending:
+            top = df.nsmallest(n, sort_col)
+        else:
+            top = df.nlargest(n, sort_col)
+        
+        return self._auto_join_dimensions(top, table_name)
+    
+    def _column_codes(self, table_name: str, column: str):
+        """
+        Codificação por dicionário de uma coluna: (códigos inteiros por linha, valores únicos).
+        Calculada uma vez por coluna e reaproveitada pelos filtros de custom_query.
+        """
+        key = (table_name, column)
+        if key not in self._column_index:
+            series = self.dataframes[table_name][column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Colunas do plano de dados compartilhado já são códigos + categorias
+                self._column_index[key] = (series.cat.codes.to_numpy(), series.cat.categories)
+            else:
+                codes, uniques = pd.factorize(series)
+                self._column_index[key] = (codes, pd.Index(uniques))
+        return self._column_index[key]
     
     def custom_query(
         self,
         table_name: str,
-        query_text: str
+        query_text: str,
+        columns: Optional[List[str]] = None,
+        limit: Optional[int] = None
     ) -> pd.DataFrame:
         """
-        Executa uma query personalizada segura usando pd.query().
+        Executa um filtro personalizado seguro.
+        
+        A query aceita apenas comparações (==, !=, <, <=, >, >=), in/not in e
+        and/or/not sobre colunas da tabela; é validada contra o schema e compilada
+        em máscaras vetorizadas (ver src.services.query_expr).
         
         Args:
             table_name: Nome da tabela
             query_text: String de query (ex: "RESPOSTA == 'Concordo' and ANO == '2024'")
+            columns: Colunas a retornar (None = todas)
+            limit: Número máximo de linhas retornadas (None = todas)
             
         Returns:
             DataFrame filtrado
             
         Example:
             >>> analyzer.custom_query('FATO_AVCURSOS', "RESPOSTA == 'Concordo' and SEMESTRE == '1'")
+            >>> analyzer.custom_query('FATO_AVCURSOS', "ID_PERGUNTA in ['1942', '1943']", columns=['COD_CURSO', 'RESPOSTA'], limit=50)
         """
         if table_name not in self.dataframes:
             raise ValueError(f"Tabela {table_name} não encontrada")
         
-        dangerous_patterns = [
-            r'\bimport\b', r'\bexec\b', r'\beval\b', r'\b__\b',
-            r'\bopen\b', r'\bfile\b', r'\bos\b', r'\bsys\b'
-        ]
+        df = self.dataframes[table_name]
         
-        for pattern in dangerous_patterns:
-            if re.search(pattern, query_text, re.IGNORECASE):
-                raise ValueError(f"Query contém operação não permitida: {pattern}")
+        if columns:
+            missing = [c for c in columns if c not in df.columns]
+            if missing:
+                raise ValueError(f"Colunas {missing} não existem em {table_name}")
         
-        try:
-            df = self.dataframes[table_name].copy()
-            result = df.query(query_text)
-            return result
-        except Exception as e:
-            raise ValueError(f"Erro ao executar query: {str(e)}")
+        expr = parse_filter(query_text)
+        validate_filter(expr, table_name, df.columns)
+        
+        annotate(rows_scanned=len(df))
+        mask = compile_filter(
+            expr,
+            column_codes=lambda col: self._column_codes(table_name, col),
+            column_values=lambda col: df[col]
+        )()
+        
+        positions = np.flatnonzero(mask)
+        if limit is not None:
+            positions = positions[:max(0, int(limit))]
+        
+        return df.iloc[positions][columns] if columns else df.iloc[positions]
+    
+    def sql_query(self, sql: str, limit: int = SQL_MAX_ROWS) -> pd.DataFrame:
+        """
+        Consulta SQL somente-leitura (um único SELECT sobre as tabelas do TABLES_SCHEMA),
+        para agregações que os outros métodos não expressam. Requer o backend duckdb.
+        
+        Args:
+            sql: Consulta SELECT (colunas com espaço entre aspas duplas: "UNIDADE GESTORA")
+            limit: Máximo de linhas retornadas (até SQL_MAX_ROWS)
+            
+        Example:
+            >>> analyzer.sql_query(
+            ...     "SELECT SETOR_CURSO, COUNT(DISTINCT COD_CURSO) AS cursos "
+            ...     "FROM FATO_AVCURSOS GROUP BY SETOR_CURSO ORDER BY cursos DESC")
+        """
+        if not self.backend.supports_sql:
+            raise ValueError("Consultas SQL requerem o backend duckdb (DATA_BACKEND=duckdb)")
+        return self.backend.run_sql(sql, limit=limit)
+    
+    def find_questions(self, query: str, table_name: Optional[str] = None, top: int = 10) -> pd.DataFrame:
+        """
+        Busca perguntas por tema no texto da PERGUNTA e nos atributos SINAES.
+        
+        Args:
+            query: Tema ou trecho (ex: "transparência", "segurança", "plano de ensino")
+            table_name: Restringe às perguntas respondidas nesta tabela fato (opcional)
+            top: Máximo de perguntas
+            
+        Returns:
+            DataFrame com ID_PERGUNTA, PERGUNTA, atributos SINAES e score (mais relevantes primeiro)
+        """
+        df_perguntas = self.dataframes.get('DIM_PERGUNTAS')
+        if df_perguntas is None:
+            raise ValueError("Tabela DIM_PERGUNTAS não carregada")
+        if self._question_index is None:
+            self._question_index = load_question_index(df_perguntas)
+        
+        allowed = None
+        if table_name is not None:
+            if table_name not in self.dataframes:
+                raise ValueError(f"Tabela {table_name} não encontrada")
+            if 'ID_PERGUNTA' not in self.dataframes[table_name].columns:
+                raise ValueError(f"Tabela {table_name} não tem coluna ID_PERGUNTA")
+            allowed = {str(v) for v in self._column_codes(table_name, 'ID_PERGUNTA')[1]}
+        
+        hits = self._question_index.search(query, top=top, allowed=allowed)
+        columns = [c for c in ['ID_PERGUNTA', 'PERGUNTA', 'CL_PERGUNTA', 'EIXO_SINAES', 'DIM_SINAES']
+                   if c in df_perguntas.columns]
+        result = pd.DataFrame(hits, columns=['ID_PERGUNTA', 'score'])
+        details = df_perguntas[columns].drop_duplicates('ID_PERGUNTA').astype({'ID_PERGUNTA': str})
+        return result.merge(details, on='ID_PERGUNTA', how='left')[columns + ['score']]
     
     def get_table_preview(self, table_name: str, n: int = 5) -> pd.DataFrame:
         """
@@ -390,4 +1686,8 @@ class DataAnalyzer:
         if 'RESPOSTA' in df.columns:
             stats['resposta_distribution'] = df['RESPOSTA'].value_counts().to_dict()
         
+        profile = self.table_stats.get(table_name)
+        if profile:
+            stats['cardinalities'] = {col: c['cardinality'] for col, c in profile['columns'].items()}
+        
         return stats
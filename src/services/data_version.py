@@ -0,0 +1,179 @@
+"""
+Versionamento dos dados e recarga a quente.
+Observa a pasta data/ (nome, tamanho e mtime dos arquivos), monta a nova versão
+(DataAnalyzer e demais recursos registrados) em uma thread de fundo e troca a
+versão corrente de forma atômica. Requisições em andamento continuam usando o
+snapshot que já obtiveram; a versão entra nas chaves de cache dos recursos.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+DATA_EXTENSIONS = (".csv", ".pdf", ".md", ".txt", ".xlsx")
+WATCH_INTERVAL_ENV = "DATA_WATCH_INTERVAL"
+
+
+def compute_data_version(data_dir: str, extensions: tuple = DATA_EXTENSIONS) -> str:
+    """
+    Identificador da versão dos dados: hash de (caminho, tamanho, mtime) dos arquivos de dados.
+    Retorna "empty" se a pasta não existir ou não tiver arquivos com essas extensões.
+    """
+    if not os.path.isdir(data_dir):
+        return "empty"
+
+    digest = hashlib.sha1()
+    found = False
+    # Inclui subpastas (ex: data/partitions/<FATO_*>/ANO=.../SEMESTRE=...)
+    for root, dirs, files in os.walk(data_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(extensions):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            rel = os.path.relpath(path, data_dir)
+            digest.update(f"{rel}|{stat.st_size}|{stat.st_mtime_ns}\n".encode("utf-8"))
+            found = True
+
+    return digest.hexdigest()[:12] if found else "empty"
+
+
+class DataSnapshot:
+    """Versão imutável dos dados: id da versão e recursos montados para ela."""
+
+    def __init__(self, version: str, resources: Dict[str, Any]):
+        self.version = version
+        self.resources = resources
+        self.loaded_at = time.time()
+
+    def __getitem__(self, name: str) -> Any:
+        return self.resources[name]
+
+
+class DataVersionManager:
+    """
+    Mantém a versão corrente dos dados e troca para uma nova quando data/ muda.
+
+    - builders: {nome: função(data_dir) -> recurso}, chamadas para montar cada versão
+    - warmers: {nome: função(versão)}, que preenchem caches chaveados pela versão
+      (tabelas do dashboard, índice vetorial) antes da troca
+    - A nova versão é montada fora do caminho das requisições e só então publicada
+    - Se a montagem falhar, a versão anterior continua em uso
+    """
+
+    def __init__(self, data_dir: str, builders: Dict[str, Callable[[str], Any]], watch_interval: float = 30.0,
+                 warmers: Optional[Dict[str, Callable[[str], Any]]] = None):
+        self.data_dir = data_dir
+        self.builders = dict(builders)
+        self.warmers = dict(warmers or {})
+        self.watch_interval = watch_interval
+
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._current: Optional[DataSnapshot] = None
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+
+    def _build(self, version: str) -> DataSnapshot:
+        resources = {name: build(self.data_dir) for name, build in self.builders.items()}
+        return DataSnapshot(version, resources)
+
+    def _prewarm(self, version: str) -> None:
+        """Aquece os caches da nova versão; uma falha só adia a carga para a primeira requisição."""
+        for name, warm in self.warmers.items():
+            try:
+                warm(version)
+            except Exception as e:
+                print(f"Warning: Falha ao pré-carregar {name} da versão {version}: {e}")
+
+    def current(self) -> DataSnapshot:
+        """Snapshot corrente (montado na primeira chamada). Guarde a referência durante a requisição."""
+        snapshot = self._current
+        if snapshot is not None:
+            return snapshot
+        with self._reload_lock:
+            if self._current is None:
+                snapshot = self._build(compute_data_version(self.data_dir))
+                with self._lock:
+                    self._current = snapshot
+        return self._current
+
+    @property
+    def version(self) -> str:
+        return self.current().version
+
+    def reload_if_changed(self) -> bool:
+        """
+        Monta e publica uma nova versão se os arquivos mudaram.
+
+        Returns:
+            True se a versão corrente foi trocada
+        """
+        with self._reload_lock:
+            version = compute_data_version(self.data_dir)
+            if self._current is not None and self._current.version == version:
+                return False
+            try:
+                snapshot = self._build(version)
+            except Exception as e:
+                self.last_error = f"Falha ao carregar a versão {version}: {e}"
+                print(f"Warning: {self.last_error}")
+                return False
+            self._prewarm(version)
+            with self._lock:
+                self._current = snapshot
+            self.last_error = None
+            return True
+
+    def start_watching(self) -> None:
+        """Inicia a thread de fundo que verifica data/ a cada watch_interval segundos."""
+        if self.watch_interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+
+        def _watch():
+            while not self._stop.wait(self.watch_interval):
+                self.reload_if_changed()
+
+        self._watcher = threading.Thread(target=_watch, name="data-version-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_data_manager(data_dir: str = "data") -> DataVersionManager:
+    """
+    DataVersionManager do processo, com o DataAnalyzer como recurso versionado.
+    As tabelas do dashboard e o índice vetorial são aquecidos na troca de versão.
+    DATA_WATCH_INTERVAL define o intervalo de verificação em segundos (0 desativa).
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            from src.services.data_tools import DataAnalyzer
+            from src.components.dashboard import load_dataframes
+            from src.services.rag_engine import prewarm_vector_index
+
+            _manager = DataVersionManager(
+                data_dir,
+                builders={"analyzer": lambda path: DataAnalyzer(data_dir=path)},
+                watch_interval=float(os.getenv(WATCH_INTERVAL_ENV, "30")),
+                warmers={"dashboard": load_dataframes, "vector_index": prewarm_vector_index},
+            )
+            _manager.start_watching()
+        return _manager
+
+
+def get_data_version() -> str:
+    """Versão corrente dos dados, para compor chaves de cache."""
+    return get_data_manager().version
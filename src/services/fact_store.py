@@ -0,0 +1,134 @@
+"""
+Armazenamento particionado e somente-anexação das tabelas fato.
+Cada ciclo de avaliação (ANO, SEMESTRE) de cada tabela FATO_* é gravado como
+uma partição própria, no layout:
+
+    data/partitions/<FATO_*>/ANO=<ano>/SEMESTRE=<semestre>/part.csv
+
+Ingerir um novo ciclo só escreve a nova partição; o histórico não é relido
+nem regravado. O DataAnalyzer concatena as partições em ordem e guarda o
+intervalo de linhas de cada uma para podar as consultas por ANO/SEMESTRE.
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.services.table_metadata import TABLES_SCHEMA
+from src.services.csv_loader import CsvDialect, load_csv
+
+PARTITIONS_DIR = "partitions"
+PARTITION_COLUMNS = ["ANO", "SEMESTRE"]
+PART_FILE = "part.csv"
+# Partições são sempre gravadas por append(): não é preciso detectar o dialeto
+PART_DIALECT = CsvDialect(delimiter=";", encoding="utf-8", has_bom=False)
+
+
+class FactStore:
+    """Partições (ANO, SEMESTRE) das tabelas fato sob um diretório raiz."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _partition_dir(self, table_name: str, ano: str, semestre: str) -> str:
+        return os.path.join(self.root, table_name, f"ANO={ano}", f"SEMESTRE={semestre}")
+
+    def list_partitions(self, table_name: str) -> List[Tuple[str, str]]:
+        """Partições existentes da tabela, em ordem cronológica."""
+        table_dir = os.path.join(self.root, table_name)
+        if not os.path.isdir(table_dir):
+            return []
+
+        partitions = []
+        for ano_dir in os.listdir(table_dir):
+            if not ano_dir.startswith("ANO="):
+                continue
+            for sem_dir in os.listdir(os.path.join(table_dir, ano_dir)):
+                path = os.path.join(table_dir, ano_dir, sem_dir, PART_FILE)
+                if sem_dir.startswith("SEMESTRE=") and os.path.exists(path):
+                    partitions.append((ano_dir[len("ANO="):], sem_dir[len("SEMESTRE="):]))
+
+        return sorted(partitions, key=lambda p: (p[0].zfill(8), p[1].zfill(4)))
+
+    def append(self, table_name: str, df: pd.DataFrame, ano, semestre, overwrite: bool = False) -> str:
+        """
+        Grava um ciclo como nova partição (escrita atômica: arquivo temporário + rename).
+
+        Args:
+            table_name: Tabela fato (FATO_*)
+            df: Respostas do ciclo, no layout dos CSVs originais
+            ano: Ano do ciclo
+            semestre: Semestre do ciclo
+            overwrite: Substitui a partição se ela já existir
+
+        Returns:
+            Caminho da partição gravada
+        """
+        if not table_name.startswith("FATO_") or table_name not in TABLES_SCHEMA:
+            raise ValueError(f"Tabela fato {table_name} não encontrada no schema")
+
+        ano, semestre = str(ano), str(semestre)
+        partition_dir = self._partition_dir(table_name, ano, semestre)
+        path = os.path.join(partition_dir, PART_FILE)
+        if os.path.exists(path) and not overwrite:
+            raise ValueError(f"Partição ANO={ano}/SEMESTRE={semestre} de {table_name} já existe")
+
+        df = df.copy()
+        df.columns = df.columns.astype(str).str.replace('\ufeff', '').str.strip()
+        df = df.drop(columns=[c for c in PARTITION_COLUMNS if c in df.columns])
+
+        os.makedirs(partition_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        df.to_csv(tmp_path, sep=";", index=False)
+        os.replace(tmp_path, path)
+        return path
+
+    def read_partition(self, table_name: str, ano: str, semestre: str) -> pd.DataFrame:
+        """Lê uma partição, com as colunas ANO e SEMESTRE preenchidas."""
+        path = os.path.join(self._partition_dir(table_name, ano, semestre), PART_FILE)
+        df = load_csv(path, dialect=PART_DIALECT)
+        df["ANO"] = ano
+        df["SEMESTRE"] = semestre
+        return df
+
+    def load(self, table_name: str, partitions: Optional[List[Tuple[str, str]]] = None):
+        """
+        Concatena as partições da tabela em ordem.
+
+        Returns:
+            (DataFrame, {(ano, semestre): slice de linhas}) ou (None, {}) se não houver partições
+        """
+        partitions = partitions if partitions is not None else self.list_partitions(table_name)
+        if not partitions:
+            return None, {}
+
+        frames = []
+        ranges: Dict[Tuple[str, str], slice] = {}
+        start = 0
+        for ano, semestre in partitions:
+            part = self.read_partition(table_name, ano, semestre)
+            frames.append(part)
+            ranges[(ano, semestre)] = slice(start, start + len(part))
+            start += len(part)
+
+        return pd.concat(frames, ignore_index=True), ranges
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingere um ciclo de avaliação como nova partição")
+    parser.add_argument("table", help="Tabela fato (ex: FATO_AVCURSOS)")
+    parser.add_argument("csv", help="CSV do ciclo, no layout original")
+    parser.add_argument("--ano", required=True)
+    parser.add_argument("--semestre", required=True)
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    cycle = load_csv(args.csv)
+
+    store = FactStore(os.path.join(args.data_dir, PARTITIONS_DIR))
+    written = store.append(args.table, cycle, args.ano, args.semestre, overwrite=args.overwrite)
+    print(f"Partição gravada em {written} ({len(cycle):,} linhas)")
@@ -0,0 +1,156 @@
+"""
+Clientes Gemini (LLM e embeddings) que distribuem as chamadas entre as chaves do KeyPool.
+Cada chamada pega uma chave do pool; em caso de 429 a chave entra em backoff
+e a chamada é refeita com outra chave, sem reconstruir o agente.
+"""
+
+from typing import Any, Dict, List, Sequence
+
+from pydantic import PrivateAttr
+from llama_index.core.base.llms.types import ChatMessage, ChatResponse, CompletionResponse, LLMMetadata
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.llms import LLM
+from llama_index.llms.google_genai import GoogleGenAI
+from llama_index.embeddings.google_genai import GoogleGenAIEmbedding
+
+from src.services.tracing import record_event
+from src.utils.key_manager import KeyPool, is_rate_limit_error, mask_key
+
+
+def _trace_retry(key: str, attempt: int, exc: Exception) -> None:
+    record_event("retry", "rate_limited", key=mask_key(key), attempt=attempt, error=str(exc)[:200])
+
+
+class PooledGoogleGenAI(LLM):
+    """LLM Gemini que escolhe uma chave do pool a cada chamada."""
+
+    model_name: str = "models/gemini-2.5-flash-live"
+    _pool: KeyPool = PrivateAttr()
+    _clients: Dict[str, GoogleGenAI] = PrivateAttr(default_factory=dict)
+
+    def __init__(self, pool: KeyPool, model_name: str = "models/gemini-2.5-flash-live", **kwargs: Any):
+        super().__init__(model_name=model_name, **kwargs)
+        self._pool = pool
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "PooledGoogleGenAI"
+
+    def _client(self, key: str) -> GoogleGenAI:
+        if key not in self._clients:
+            self._clients[key] = GoogleGenAI(api_key=key, model_name=self.model_name)
+        return self._clients[key]
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return self._client(self._pool.keys[0]).metadata
+
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        return self._pool.call(lambda key: self._client(key).chat(messages, **kwargs), on_retry=_trace_retry)
+
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        return self._pool.call(
+            lambda key: self._client(key).complete(prompt, formatted=formatted, **kwargs), on_retry=_trace_retry
+        )
+
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        return await self._pool.acall(lambda key: self._client(key).achat(messages, **kwargs), on_retry=_trace_retry)
+
+    async def acomplete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        return await self._pool.acall(
+            lambda key: self._client(key).acomplete(prompt, formatted=formatted, **kwargs), on_retry=_trace_retry
+        )
+
+    def _stream(self, method: str, *args: Any, **kwargs: Any):
+        """Streaming com retry: só troca de chave se o 429 vier antes do primeiro chunk."""
+        last_error = None
+        for attempt in range(1, self._pool.max_attempts + 1):
+            key = self._pool.acquire()
+            started = False
+            try:
+                for chunk in getattr(self._client(key), method)(*args, **kwargs):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                limited = is_rate_limit_error(e)
+                self._pool.release(key, rate_limited=limited)
+                if started or not limited:
+                    raise
+                last_error = e
+                _trace_retry(key, attempt, e)
+                continue
+            self._pool.release(key)
+            return
+        raise last_error
+
+    async def _astream(self, method: str, *args: Any, **kwargs: Any):
+        last_error = None
+        for attempt in range(1, self._pool.max_attempts + 1):
+            key = await self._pool.aacquire()
+            started = False
+            try:
+                gen = await getattr(self._client(key), method)(*args, **kwargs)
+                async for chunk in gen:
+                    started = True
+                    yield chunk
+            except Exception as e:
+                limited = is_rate_limit_error(e)
+                self._pool.release(key, rate_limited=limited)
+                if started or not limited:
+                    raise
+                last_error = e
+                _trace_retry(key, attempt, e)
+                continue
+            self._pool.release(key)
+            return
+        raise last_error
+
+    def stream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any):
+        return self._stream("stream_chat", messages, **kwargs)
+
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        return self._stream("stream_complete", prompt, formatted=formatted, **kwargs)
+
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any):
+        return self._astream("astream_chat", messages, **kwargs)
+
+    async def astream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any):
+        return self._astream("astream_complete", prompt, formatted=formatted, **kwargs)
+
+
+class PooledGoogleGenAIEmbedding(BaseEmbedding):
+    """Embeddings Gemini usando o mesmo pool de chaves do LLM."""
+
+    _pool: KeyPool = PrivateAttr()
+    _clients: Dict[str, GoogleGenAIEmbedding] = PrivateAttr(default_factory=dict)
+
+    def __init__(self, pool: KeyPool, model_name: str = "models/text-embedding-004", **kwargs: Any):
+        super().__init__(model_name=model_name, **kwargs)
+        self._pool = pool
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "PooledGoogleGenAIEmbedding"
+
+    def _client(self, key: str) -> GoogleGenAIEmbedding:
+        if key not in self._clients:
+            self._clients[key] = GoogleGenAIEmbedding(api_key=key, model_name=self.model_name)
+        return self._clients[key]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self._pool.call(lambda key: self._client(key)._get_query_embedding(query), on_retry=_trace_retry)
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return await self._pool.acall(lambda key: self._client(key)._aget_query_embedding(query), on_retry=_trace_retry)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._pool.call(lambda key: self._client(key)._get_text_embedding(text), on_retry=_trace_retry)
+
+    async def _aget_text_embedding(self, text: str) -> List[float]:
+        return await self._pool.acall(lambda key: self._client(key)._aget_text_embedding(text), on_retry=_trace_retry)
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._pool.call(lambda key: self._client(key)._get_text_embeddings(texts), on_retry=_trace_retry)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return await self._pool.acall(lambda key: self._client(key)._aget_text_embeddings(texts), on_retry=_trace_retry)
@@ -0,0 +1,288 @@
+"""
+Linguagem de filtro segura para custom_query.
+Aceita apenas comparações, `in`/`not in` e `and`/`or`/`not` sobre colunas da
+tabela e literais. A expressão é convertida em AST, validada contra o
+TABLES_SCHEMA e compilada em máscaras booleanas vetorizadas.
+
+Exemplos:
+    RESPOSTA == 'Concordo' and ANO == '2024'
+    ID_PERGUNTA in ['1942', '1943'] and not SEMESTRE == '2'
+    2020 <= ANO < 2023 or `UNIDADE GESTORA` != ''
+"""
+
+import ast
+import re
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.services.table_metadata import TABLES_SCHEMA, VALID_VALUES
+
+_BACKTICK = re.compile(r"`([^`]+)`")
+
+_COMPARE_OPS = {
+    ast.Eq: "==",
+    ast.NotEq: "!=",
+    ast.Lt: "<",
+    ast.LtE: "<=",
+    ast.Gt: ">",
+    ast.GtE: ">=",
+    ast.In: "in",
+    ast.NotIn: "not in",
+}
+
+# Inverte o operador quando a coluna está à direita (ex: 2020 <= ANO)
+_FLIPPED = {"==": "==", "!=": "!=", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+
+class Condition:
+    """Comparação entre uma coluna e um literal (ou lista de literais para in/not in)."""
+
+    def __init__(self, column: str, op: str, value: Any):
+        self.column = column
+        self.op = op
+        self.value = value
+
+    def columns(self) -> List[str]:
+        return [self.column]
+
+    def __repr__(self) -> str:
+        return f"({self.column} {self.op} {self.value!r})"
+
+
+class BoolExpr:
+    """Combinação and/or/not de sub-expressões."""
+
+    def __init__(self, op: str, operands: List[Any]):
+        self.op = op
+        self.operands = operands
+
+    def columns(self) -> List[str]:
+        return [c for operand in self.operands for c in operand.columns()]
+
+    def __repr__(self) -> str:
+        if self.op == "not":
+            return f"(not {self.operands[0]!r})"
+        return "(" + f" {self.op} ".join(repr(o) for o in self.operands) + ")"
+
+
+def _literal(node: ast.AST) -> Any:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, int, float, bool)):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub) and isinstance(node.operand, ast.Constant) \
+            and isinstance(node.operand.value, (int, float)):
+        return -node.operand.value
+    raise ValueError(f"Valor não permitido na query: {ast.dump(node)}")
+
+
+def _literal_list(node: ast.AST) -> List[Any]:
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return [_literal(elt) for elt in node.elts]
+    return [_literal(node)]
+
+
+def _convert(node: ast.AST, aliases: Dict[str, str]) -> Any:
+    if isinstance(node, ast.BoolOp):
+        op = "and" if isinstance(node.op, ast.And) else "or"
+        return BoolExpr(op, [_convert(v, aliases) for v in node.values])
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return BoolExpr("not", [_convert(node.operand, aliases)])
+
+    if isinstance(node, ast.Compare):
+        conditions = []
+        left = node.left
+        for op_node, right in zip(node.ops, node.comparators):
+            op = _COMPARE_OPS.get(type(op_node))
+            if op is None:
+                raise ValueError(f"Operador não permitido na query: {type(op_node).__name__}")
+
+            if isinstance(left, ast.Name):
+                column = aliases.get(left.id, left.id)
+                value = _literal_list(right) if op in ("in", "not in") else _literal(right)
+            elif isinstance(right, ast.Name) and op in _FLIPPED:
+                column = aliases.get(right.id, right.id)
+                value = _literal(left)
+                op = _FLIPPED[op]
+            else:
+                raise ValueError("Cada comparação deve ter uma coluna de um lado e um valor do outro")
+
+            conditions.append(Condition(column, op, value))
+            left = right
+        return conditions[0] if len(conditions) == 1 else BoolExpr("and", conditions)
+
+    raise ValueError(f"Construção não permitida na query: {type(node).__name__}")
+
+
+def parse_filter(query_text: str) -> Any:
+    """
+    Converte a string de filtro na árvore de Condition/BoolExpr.
+    Colunas com espaço devem vir entre crases (`UNIDADE GESTORA`).
+
+    Raises:
+        ValueError: se a expressão usar qualquer construção fora da linguagem
+    """
+    aliases: Dict[str, str] = {}
+
+    def _alias(match):
+        name = f"__col{len(aliases)}"
+        aliases[name] = match.group(1)
+        return name
+
+    source = _BACKTICK.sub(_alias, query_text.strip())
+    if not source:
+        raise ValueError("Query vazia")
+
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Sintaxe inválida na query: {e.msg}")
+
+    return _convert(tree.body, aliases)
+
+
+def build_filter(filters: Dict[str, Any]) -> Any:
+    """
+    Converte filtros estruturados na mesma árvore de parse_filter (condições ligadas por and).
+
+    Cada valor pode ser:
+        - escalar: igualdade               {'SEMESTRE': '1'}
+        - lista: pertinência (in)          {'ID_PERGUNTA': ['1942', '1943']}
+        - dict de operadores               {'ANO': {'>=': 2020, '<': 2024}}, {'RESPOSTA': {'not in': ['Desconheço']}}
+          ('between': [min, max] equivale a >= min e <= max; 'prefix': 'AC/' seleciona
+          os valores que começam com o prefixo)
+        - texto terminado em '*': prefixo  {'SIGLA_LOTACAO': 'AC/*'}
+
+    Raises:
+        ValueError: operador desconhecido
+    """
+    conditions = []
+    for column, spec in filters.items():
+        if isinstance(spec, dict):
+            for op, value in spec.items():
+                if op == "between":
+                    low, high = value
+                    conditions.append(Condition(column, ">=", low))
+                    conditions.append(Condition(column, "<=", high))
+                elif op in ("in", "not in"):
+                    conditions.append(Condition(column, op, list(value)))
+                elif op == "prefix":
+                    conditions.append(Condition(column, "prefix", str(value)))
+                elif op in _FLIPPED:
+                    conditions.append(Condition(column, op, value))
+                else:
+                    raise ValueError(f"Operador de filtro '{op}' não suportado em {column}")
+        elif isinstance(spec, (list, tuple, set)):
+            conditions.append(Condition(column, "in", list(spec)))
+        elif isinstance(spec, str) and spec.endswith("*"):
+            conditions.append(Condition(column, "prefix", spec[:-1]))
+        else:
+            conditions.append(Condition(column, "==", spec))
+
+    if not conditions:
+        raise ValueError("Nenhum filtro informado")
+    return conditions[0] if len(conditions) == 1 else BoolExpr("and", conditions)
+
+
+def validate_filter(expr: Any, table_name: str, available_columns: Iterable[str]) -> None:
+    """
+    Valida colunas e valores da expressão contra o TABLES_SCHEMA e as colunas carregadas.
+
+    Raises:
+        ValueError: coluna inexistente ou valor fora de VALID_VALUES
+    """
+    available = set(available_columns)
+    schema_columns = list(TABLES_SCHEMA.get(table_name, {}).get("columns", {}).keys())
+
+    for condition in _iter_conditions(expr):
+        if condition.column not in available:
+            raise ValueError(
+                f"Coluna {condition.column} não existe em {table_name}. Colunas: {schema_columns or sorted(available)}"
+            )
+        valid = VALID_VALUES.get(condition.column)
+        if valid and condition.op in ("==", "!=", "in", "not in"):
+            values = condition.value if isinstance(condition.value, list) else [condition.value]
+            invalid = [v for v in values if str(v) not in valid]
+            if invalid:
+                raise ValueError(f"Valor(es) {invalid} inválido(s) para {condition.column}. Use: {valid}")
+
+
+def _iter_conditions(expr: Any):
+    if isinstance(expr, Condition):
+        yield expr
+    else:
+        for operand in expr.operands:
+            yield from _iter_conditions(operand)
+
+
+def compile_filter(
+    expr: Any,
+    column_codes: Callable[[str], Tuple[np.ndarray, pd.Index]],
+    column_values: Callable[[str], pd.Series],
+) -> Callable[[], np.ndarray]:
+    """
+    Compila a expressão em uma função que retorna a máscara booleana das linhas.
+
+    Igualdade, in/not in e prefixo usam a codificação por dicionário da coluna (códigos
+    inteiros + valores únicos), de modo que a comparação é feita sobre inteiros e não sobre strings.
+    Comparações de intervalo com número convertem a coluna para numérico.
+
+    Args:
+        expr: Árvore retornada por parse_filter
+        column_codes: coluna -> (códigos, valores únicos) da codificação por dicionário
+        column_values: coluna -> Series original
+    """
+    if isinstance(expr, BoolExpr):
+        parts = [compile_filter(o, column_codes, column_values) for o in expr.operands]
+        if expr.op == "not":
+            return lambda: ~parts[0]()
+        if expr.op == "and":
+            def _and():
+                mask = parts[0]()
+                for part in parts[1:]:
+                    mask = mask & part()
+                return mask
+            return _and
+
+        def _or():
+            mask = parts[0]()
+            for part in parts[1:]:
+                mask = mask | part()
+            return mask
+        return _or
+
+    column, op, value = expr.column, expr.op, expr.value
+
+    if op == "prefix":
+        def _prefix():
+            codes, uniques = column_codes(column)
+            positions = np.flatnonzero(uniques.astype(str).str.startswith(value))
+            return np.isin(codes, positions)
+        return _prefix
+
+    if op in ("==", "!=", "in", "not in"):
+        def _membership():
+            codes, uniques = column_codes(column)
+            values = value if isinstance(value, list) else [value]
+            # Os dados são carregados como texto: 2024 e '2024' se referem ao mesmo valor
+            positions = uniques.get_indexer([str(v) for v in values])
+            positions = positions[positions >= 0]
+            mask = np.isin(codes, positions)
+            return ~mask if op in ("!=", "not in") else mask
+        return _membership
+
+    def _range():
+        series = column_values(column)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            series = pd.to_numeric(series, errors="coerce")
+        if op == "<":
+            result = series < value
+        elif op == "<=":
+            result = series <= value
+        elif op == ">":
+            result = series > value
+        else:
+            result = series >= value
+        return result.to_numpy(dtype=bool, na_value=False)
+    return _range
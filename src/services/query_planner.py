@@ -0,0 +1,101 @@
+"""
+Planejador de consultas do DataAnalyzer.
+Para cada cálculo de contagens (tabela, chaves de agrupamento, filtros), estima o
+custo de cada estratégia com o perfil das tabelas (table_stats) e escolhe a mais barata:
+
+- rollup: reagrupa o agregado pré-calculado por nível da hierarquia e pergunta
+  (só quando chaves e filtros usam colunas desse agregado)
+- index: lê apenas as linhas do valor filtrado pelo índice invertido da coluna
+  (filtros de igualdade/lista seletivos)
+- scan: varre as partições mantidas pela poda (caminho do backend de execução)
+
+O custo é medido em linhas lidas, com peso maior para acesso aleatório. A construção
+de um índice ou de um agregado é amortizada em BUILD_AMORTIZATION consultas.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from src.services.query_expr import build_filter, BoolExpr, Condition
+from src.services.table_stats import estimate_matches
+
+PLAN_ROLLUP = "rollup"
+PLAN_INDEX = "index"
+PLAN_SCAN = "scan"
+
+# Custo por linha relativo à varredura sequencial
+INDEX_ROW_COST = 4.0
+INDEX_BUILD_COST = 3.0
+ROLLUP_BUILD_COST = 2.0
+BUILD_AMORTIZATION = 10
+
+
+class QueryPlan:
+    """Estratégia escolhida, custo estimado (linhas) e coluna do índice quando houver."""
+
+    def __init__(self, strategy: str, cost: float, est_rows: float, column: Optional[str] = None, values=None):
+        self.strategy = strategy
+        self.cost = cost
+        self.est_rows = est_rows
+        self.column = column
+        self.values = values
+
+    def __repr__(self) -> str:
+        detail = f", column={self.column!r}" if self.column else ""
+        return f"QueryPlan({self.strategy}, cost={self.cost:,.0f}, est_rows={self.est_rows:,.0f}{detail})"
+
+
+def _conjuncts(filters: Optional[Dict[str, Any]]) -> List[Condition]:
+    """Condições ligadas por and no nível mais alto dos filtros estruturados."""
+    if not filters:
+        return []
+    expr = build_filter(filters)
+    if isinstance(expr, Condition):
+        return [expr]
+    if isinstance(expr, BoolExpr) and expr.op == "and":
+        return [o for o in expr.operands if isinstance(o, Condition)]
+    return []
+
+
+class QueryPlanner:
+    """Escolhe a estratégia de _grouped_counts a partir de analyzer.table_stats."""
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+
+    def candidates(self, table_name: str, keys: List[str], filters: Optional[Dict[str, Any]] = None) -> List[QueryPlan]:
+        """Estratégias aplicáveis com seus custos estimados (a varredura sempre está entre elas)."""
+        analyzer = self.analyzer
+        stats = analyzer.table_stats.get(table_name)
+        total_rows = len(analyzer.dataframes[table_name])
+
+        scan_rows = analyzer._pruned_row_count(table_name, filters)
+        plans = [QueryPlan(PLAN_SCAN, float(scan_rows), float(scan_rows))]
+
+        filter_columns = set(build_filter(filters).columns()) if filters else set()
+        rollup_columns = analyzer._rollup_columns(table_name)
+        if rollup_columns and set(keys) | filter_columns <= rollup_columns:
+            base = analyzer._rollup_base.get(table_name)
+            if base is not None:
+                cost = float(len(base))
+            else:
+                cost = total_rows * ROLLUP_BUILD_COST / BUILD_AMORTIZATION
+            plans.append(QueryPlan(PLAN_ROLLUP, cost, cost))
+
+        if analyzer.backend.name == "pandas":
+            for condition in _conjuncts(filters):
+                if condition.op not in ("==", "in"):
+                    continue
+                values = condition.value if isinstance(condition.value, list) else [condition.value]
+                matches = estimate_matches(stats, condition.column, values)
+                if matches is None:
+                    continue
+                cost = matches * INDEX_ROW_COST
+                if (table_name, condition.column) not in analyzer._value_indexes:
+                    cost += total_rows * INDEX_BUILD_COST / BUILD_AMORTIZATION
+                plans.append(QueryPlan(PLAN_INDEX, cost, matches, column=condition.column, values=values))
+
+        return plans
+
+    def plan(self, table_name: str, keys: List[str], filters: Optional[Dict[str, Any]] = None) -> QueryPlan:
+        """Estratégia de menor custo estimado (empates ficam com a varredura)."""
+        return min(self.candidates(table_name, keys, filters), key=lambda p: p.cost)
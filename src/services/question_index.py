@@ -0,0 +1,210 @@
+"""
+Índice de busca local sobre as perguntas da avaliação (DIM_PERGUNTAS).
+Índice léxico BM25 sobre o texto da PERGUNTA e os atributos SINAES (eixo,
+dimensão, tipo e questionário, com peso menor), com termos normalizados: sem
+acentos, sem stopwords e com um radical simples do português (transparência e
+transparente -> transpar). Termos da consulta que não estão no vocabulário casam
+por prefixo ("transpar" -> transparência), com peso menor.
+
+O índice é gravado em disco (storage/question_index.json) junto com a assinatura
+das perguntas e só é refeito quando DIM_PERGUNTAS muda.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+QUESTION_INDEX_DIR_ENV = "QUESTION_INDEX_DIR"
+QUESTION_INDEX_FILE = "question_index.json"
+# Campos indexados e seus pesos na frequência dos termos
+FIELD_WEIGHTS = {
+    'PERGUNTA': 1.0,
+    'EIXO_SINAES': 0.5,
+    'DIM_SINAES': 0.5,
+    'Tipo_Pergunta': 0.3,
+    'CL_PERGUNTA': 0.3,
+    'QUESTIONARIO': 0.2,
+}
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_WEIGHT = 0.7
+MIN_PREFIX_CHARS = 4
+
+STOPWORDS = set("""
+a ao aos as com como da das de do dos e em entre na nas no nos o os ou para pela pelas pelo pelos
+por que se sem sob sobre um uma umas uns foi sao ser sua suas seu seus quando qual quais ja
+""".split())
+# Sufixos removidos (sem acento), do mais longo para o mais curto; um por termo
+SUFFIXES = sorted("""
+amentos amento imentos imento acoes icoes acao icao encias encia ancias ancia ancas anca
+idades idade mente entes ente antes ante istas ista ismos ismo ivos ivas ivo iva osos osas
+oso osa ais eis ar er ir as es os a e o s
+""".split(), key=len, reverse=True)
+MIN_STEM_CHARS = 3
+
+
+def _fold(text: str) -> str:
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def _stem(word: str) -> str:
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_CHARS:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Termos normalizados do texto (sem acento, sem stopwords, com radical)."""
+    return [_stem(w) for w in re.findall(r'[a-z0-9]+', _fold(text)) if w not in STOPWORDS]
+
+
+def questions_signature(df: pd.DataFrame) -> str:
+    """Assinatura do conteúdo indexado de DIM_PERGUNTAS (muda quando as perguntas mudam)."""
+    columns = ['ID_PERGUNTA'] + [c for c in FIELD_WEIGHTS if c in df.columns]
+    digest = hashlib.sha1()
+    for row in df[columns].astype(str).itertuples(index=False, name=None):
+        digest.update(('\x1f'.join(row) + '\n').encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+class QuestionIndex:
+    """
+    Índice BM25 das perguntas.
+
+    Attributes:
+        ids: ID_PERGUNTA de cada documento
+        postings: {termo: {posição do documento: frequência ponderada}}
+        lengths: Tamanho ponderado de cada documento
+    """
+
+    def __init__(self, ids: List[str], postings: Dict[str, Dict[int, float]], lengths: List[float], signature: str):
+        self.ids = ids
+        self.postings = postings
+        self.lengths = lengths
+        self.signature = signature
+        self.avg_length = sum(lengths) / len(lengths) if lengths else 0.0
+        self._vocabulary = sorted(postings)
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "QuestionIndex":
+        """Indexa as perguntas (uma por ID_PERGUNTA) de DIM_PERGUNTAS."""
+        if 'ID_PERGUNTA' not in df.columns or 'PERGUNTA' not in df.columns:
+            raise ValueError("DIM_PERGUNTAS sem as colunas ID_PERGUNTA e PERGUNTA")
+
+        df = df.drop_duplicates('ID_PERGUNTA')
+        fields = [c for c in FIELD_WEIGHTS if c in df.columns]
+        ids, lengths = [], []
+        postings: Dict[str, Dict[int, float]] = {}
+        for doc, row in enumerate(df[['ID_PERGUNTA'] + fields].astype(str).itertuples(index=False, name=None)):
+            ids.append(row[0])
+            weights: Counter = Counter()
+            for field, text in zip(fields, row[1:]):
+                for term in tokenize(text):
+                    weights[term] += FIELD_WEIGHTS[field]
+            for term, weight in weights.items():
+                postings.setdefault(term, {})[doc] = weight
+            lengths.append(sum(weights.values()))
+        return cls(ids, postings, lengths, questions_signature(df))
+
+    def _term_weights(self, query: str) -> Dict[str, float]:
+        """Termos do índice casados pela consulta: exatos (peso 1) ou por prefixo."""
+        weights: Dict[str, float] = {}
+        for term in tokenize(query):
+            if term in self.postings:
+                weights[term] = max(weights.get(term, 0.0), 1.0)
+                continue
+            if len(term) < MIN_PREFIX_CHARS:
+                continue
+            # Vocabulário ordenado: os termos com o prefixo formam um trecho contíguo
+            for candidate in self._vocabulary[self._lower_bound(term):]:
+                if not candidate.startswith(term):
+                    break
+                weights[candidate] = max(weights.get(candidate, 0.0), PREFIX_WEIGHT)
+        return weights
+
+    def _lower_bound(self, term: str) -> int:
+        lo, hi = 0, len(self._vocabulary)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._vocabulary[mid] < term:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def search(self, query: str, top: int = 10, allowed: Optional[set] = None) -> List[tuple]:
+        """
+        Perguntas mais relevantes para a consulta.
+
+        Args:
+            query: Tema ou trecho (ex: "transparência", "plano de ensino")
+            top: Máximo de resultados
+            allowed: Restringe aos ID_PERGUNTA informados (opcional)
+
+        Returns:
+            Lista de (ID_PERGUNTA, score), do mais relevante ao menos relevante
+        """
+        n = len(self.ids)
+        scores: Dict[int, float] = {}
+        for term, query_weight in self._term_weights(query).items():
+            docs = self.postings[term]
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc, tf in docs.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc] / self.avg_length)
+                scores[doc] = scores.get(doc, 0.0) + query_weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.ids[item[0]]))
+        if allowed is not None:
+            ranked = [item for item in ranked if self.ids[item[0]] in allowed]
+        return [(self.ids[doc], round(score, 3)) for doc, score in ranked[:top]]
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'signature': self.signature,
+                'ids': self.ids,
+                'lengths': self.lengths,
+                'postings': {term: {str(doc): tf for doc, tf in docs.items()} for term, docs in self.postings.items()},
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "QuestionIndex":
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        postings = {term: {int(doc): tf for doc, tf in docs.items()} for term, docs in data['postings'].items()}
+        return cls(data['ids'], postings, data['lengths'], data['signature'])
+
+
+def load_question_index(df: pd.DataFrame, index_dir: Optional[str] = None) -> QuestionIndex:
+    """
+    Índice das perguntas gravado em index_dir (QUESTION_INDEX_DIR, padrão storage),
+    refeito e regravado se não existir ou se as perguntas mudaram.
+    """
+    path = os.path.join(index_dir or os.getenv(QUESTION_INDEX_DIR_ENV, "storage"), QUESTION_INDEX_FILE)
+    signature = questions_signature(df.drop_duplicates('ID_PERGUNTA'))
+    if os.path.exists(path):
+        try:
+            index = QuestionIndex.load(path)
+            if index.signature == signature:
+                return index
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Warning: Failed to load question index {path}: {e}")
+
+    index = QuestionIndex.build(df)
+    try:
+        index.save(path)
+    except OSError as e:
+        print(f"Warning: Failed to save question index {path}: {e}")
+    return index
@@ -11,41 +11,97 @@ from llama_index.llms.google_genai import GoogleGenAI
 from llama_index.embeddings.google_genai import GoogleGenAIEmbedding
 from llama_index.core.tools import FunctionTool
 from llama_index.core.agent import ReActAgent
-import pandas as pd
+from src.services.csv_loader import load_csv
 import gc
 
 from src.services.data_tools import DataAnalyzer
 from src.services.table_metadata import get_table_info, get_all_tables_summary, COMMON_METRICS
+from src.services.tracing import traced_tool
+from src.services.result_format import ResultCache, format_result
+from src.services.llm_pool import PooledGoogleGenAI, PooledGoogleGenAIEmbedding
+from src.services.data_version import get_data_manager, get_data_version, compute_data_version
+from src.utils.key_manager import get_key_pool
+
+INDEX_VERSION_FILE = "data_version.txt"
+INDEXED_EXTENSIONS = ('.pdf', '.md', '.txt')
+VECTOR_STORAGE_DIR = "./storage"
+VECTOR_DATA_DIR = "data"
 
 
-@st.cache_resource(show_spinner=False)
 def get_data_analyzer():
     """
-    Inicializa e retorna o analisador de dados.
-    Carrega todos os DataFrames em memória para análise rápida.
+    Retorna o analisador de dados da versão corrente de data/.
+    Os DataFrames ficam em memória; quando os arquivos mudam, uma nova versão é
+    carregada em segundo plano e substitui a anterior (ver data_version).
     """
-    return DataAnalyzer(data_dir="data")
+    return get_data_manager().current()["analyzer"]
 
 
 @st.cache_resource(show_spinner=False)
-def get_vector_index():
+def get_pooled_models():
+    """
+    LLM e modelo de embeddings compartilhando o pool de chaves do processo.
+    Retorna (None, None) se nenhuma chave estiver configurada.
+    """
+    pool = get_key_pool()
+    if pool is None:
+        return None, None
+    llm = PooledGoogleGenAI(pool, model_name="models/gemini-2.5-flash-live")
+    embed_model = PooledGoogleGenAIEmbedding(pool, model_name="models/text-embedding-004")
+    return llm, embed_model
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_vector_index(data_version: str = None):
     """
     Carrega ou cria o índice vetorial para busca semântica.
     Usado apenas para perguntas conceituais/descritivas.
+    data_version entra na chave do cache; o índice persistido só é refeito
+    quando os documentos indexados (PDF/MD/TXT) mudaram.
+    """
+    return load_vector_index(VECTOR_STORAGE_DIR, VECTOR_DATA_DIR)
+
+
+def prewarm_vector_index(data_version: str):
+    """
+    Monta o índice vetorial da nova versão antes da troca (ver get_data_manager).
+    Sem chave no pool não há modelo de embeddings: o índice fica para a primeira requisição.
+    """
+    _, embed_model = get_pooled_models()
+    if embed_model is None:
+        return None
+    Settings.embed_model = embed_model
+    return get_vector_index(data_version)
+
+
+def load_vector_index(storage_dir: str, data_dir: str):
+    """
+    Índice vetorial dos documentos de data_dir persistido em storage_dir (sem cache).
+    Carrega o índice gravado se os documentos não mudaram; senão refaz e regrava.
     """
     from llama_index.core import VectorStoreIndex, StorageContext, load_index_from_storage, SimpleDirectoryReader
     import pandas as pd
-    
-    STORAGE_DIR = "./storage"
-    DATA_DIR = "data"
+
+    STORAGE_DIR = storage_dir
+    DATA_DIR = data_dir
 
     if not os.path.exists(DATA_DIR) or not os.listdir(DATA_DIR):
         return None
 
-    if os.path.exists(STORAGE_DIR):
+    docs_version = compute_data_version(DATA_DIR, extensions=INDEXED_EXTENSIONS)
+    version_file = os.path.join(STORAGE_DIR, INDEX_VERSION_FILE)
+    indexed_version = None
+    if os.path.exists(version_file):
+        with open(version_file, encoding="utf-8") as f:
+            indexed_version = f.read().strip()
+
+    if os.path.exists(STORAGE_DIR) and indexed_version in (None, docs_version):
         try:
             storage_context = StorageContext.from_defaults(persist_dir=STORAGE_DIR)
             index = load_index_from_storage(storage_context)
+            if indexed_version is None:
+                with open(version_file, "w", encoding="utf-8") as f:
+                    f.write(docs_version)
             gc.collect() 
             return index
         except Exception as e:
@@ -60,11 +116,19 @@ def get_vector_index():
                             shutil.rmtree(item_path)
                 except Exception:
                     pass  # Silently continue
-        
+    elif os.path.exists(STORAGE_DIR):
+        # Documentos mudaram: descarta o índice antigo (a pasta pode ser um volume montado)
+        for item in os.listdir(STORAGE_DIR):
+            item_path = os.path.join(STORAGE_DIR, item)
+            if os.path.isdir(item_path):
+                shutil.rmtree(item_path, ignore_errors=True)
+            else:
+                os.unlink(item_path)
+
     index = VectorStoreIndex([])
     
     # OTIMIZAÇÃO: Indexar apenas arquivos não estruturados (texto/PDF) para busca conceitual.
-    files = [f for f in os.listdir(DATA_DIR) if f.endswith(('.pdf', '.md', '.txt'))]
+    files = [f for f in os.listdir(DATA_DIR) if f.endswith(INDEXED_EXTENSIONS)]
     
     progress_bar = st.progress(0)
     status_text = st.empty()
@@ -75,13 +139,7 @@ def get_vector_index():
         try:
             documents = []
             if file.endswith('.csv'):
-                try:
-                    df = pd.read_csv(file_path, sep=None, engine='python', dtype=str) 
-                except:
-                    df = pd.read_csv(file_path, sep=';', dtype=str)
-            
-                df.columns = df.columns.str.replace('\ufeff', '').str.strip()
-                df = df.fillna("")
+                df = load_csv(file_path)
                 
                 text = df.to_csv(index=False)
                 documents = [Document(text=text, metadata={"filename": file})]
@@ -108,6 +166,8 @@ def get_vector_index():
     
     status_text.text("Persisting index...")
     index.storage_context.persist(persist_dir=STORAGE_DIR)
+    with open(version_file, "w", encoding="utf-8") as f:
+        f.write(docs_version)
     
     status_text.empty()
     progress_bar.empty()
@@ -116,6 +176,13 @@ def get_vector_index():
     return index
 
 
+def _approx_note(result) -> str:
+    """Aviso para o agente quando o resultado foi estimado pela amostra estratificada."""
+    if 'margem_erro_%' in result.columns or 'margem_erro' in result.columns:
+        return "Estimativa por amostra estratificada (margem_erro = meia-largura do IC de 95%); informe a margem ao usuário.\n"
+    return ""
+
+
 def create_analysis_tools(analyzer: DataAnalyzer):
     """
     Cria ferramentas de análise que o agente pode chamar.
@@ -126,12 +193,18 @@ def create_analysis_tools(analyzer: DataAnalyzer):
     Returns:
         Lista de FunctionTool
     """
+    # Resultados que não couberam na observação, para fetch_more_tool
+    results = ResultCache()
+    
+    def _format(result, title: str, tool_name: str, max_rows: int = 20, **kwargs) -> str:
+        return format_result(result, title=title, tool_name=tool_name, max_rows=max_rows, cache=results, **kwargs)
     
     def calculate_satisfaction_tool(
         table_name: str, 
         group_by: str = None,
         filter_column: str = None,
-        filter_value: str = None
+        filter_value: str = None,
+        approximate: bool = False
     ) -> str:
         """
         Calcula satisfação (% de 'Concordo' sobre respostas válidas).
@@ -145,19 +218,20 @@ def create_analysis_tools(analyzer: DataAnalyzer):
             table_name: Nome da tabela (FATO_AVCURSOS, FATO_AVDISCIPLINAS, FATO_AVINSTITUCIONAL)
             group_by: Coluna para agrupar (ex: COD_CURSO, SIGLA_LOTACAO, ID_PERGUNTA)
             filter_column: Coluna para filtrar (opcional)
-            filter_value: Valor do filtro (opcional)
+            filter_value: Valor do filtro (opcional; termine com * para prefixo, ex: "AC/*" = todo o setor AC)
+            approximate: True para estimar por amostra (rápido, com margem de erro) em perguntas
+                exploratórias sobre tabelas grandes; nunca use se o usuário pedir números exatos
             
         Returns:
             String formatada com resultados
         """
         try:
             filters = {filter_column: filter_value} if filter_column and filter_value else None
-            result = analyzer.calculate_satisfaction(table_name, group_by=group_by, filters=filters)
+            result = analyzer.calculate_satisfaction(
+                table_name, group_by=group_by, filters=filters, approximate=approximate
+            )
             
-            if len(result) > 20:
-                return f"Resultados (top 20 de {len(result)}):\n{result.head(20).to_string(index=False)}"
-            else:
-                return f"Resultados:\n{result.to_string(index=False)}"
+            return _approx_note(result) + _format(result, "Resultados", "calculate_satisfaction_tool")
         except Exception as e:
             return f"Erro ao calcular satisfação: {str(e)}"
     
@@ -166,7 +240,8 @@ def create_analysis_tools(analyzer: DataAnalyzer):
         group_by: str = None,
         response_type: str = None,
         filter_column: str = None,
-        filter_value: str = None
+        filter_value: str = None,
+        approximate: bool = False
     ) -> str:
         """
         Conta respostas com filtros opcionais.
@@ -181,7 +256,9 @@ def create_analysis_tools(analyzer: DataAnalyzer):
             group_by: Coluna para agrupar (opcional)
             response_type: Tipo de resposta: 'Concordo', 'Discordo' ou 'Desconheço' (opcional)
             filter_column: Coluna para filtrar (opcional)
-            filter_value: Valor do filtro (opcional)
+            filter_value: Valor do filtro (opcional; termine com * para prefixo, ex: "AC/*" = todo o setor AC)
+            approximate: True para estimar por amostra (rápido, com margem de erro); nunca use
+                se o usuário pedir números exatos
             
         Returns:
             String formatada com contagens
@@ -192,22 +269,52 @@ def create_analysis_tools(analyzer: DataAnalyzer):
                 table_name, 
                 group_by=group_by, 
                 filters=filters,
-                response_type=response_type
+                response_type=response_type,
+                approximate=approximate
             )
             
-            if len(result) > 20:
-                return f"Resultados (top 20 de {len(result)}):\n{result.head(20).to_string(index=False)}"
-            else:
-                return f"Resultados:\n{result.to_string(index=False)}"
+            return _approx_note(result) + _format(result, "Resultados", "count_responses_tool")
         except Exception as e:
             return f"Erro ao contar respostas: {str(e)}"
     
+    def count_respondents_tool(
+        table_name: str,
+        group_by: str = None,
+        filter_column: str = None,
+        filter_value: str = None
+    ) -> str:
+        """
+        Conta respondentes distintos (pessoas, pelo ID_PESQUISA), não linhas de resposta.
+        
+        Use esta ferramenta para perguntas sobre:
+        - Quantas pessoas responderam (por curso, setor, unidade, lotação)
+        - Participação/adesão à avaliação
+        
+        Args:
+            table_name: Nome da tabela (FATO_AVCURSOS, FATO_AVDISCIPLINAS, FATO_AVINSTITUCIONAL)
+            group_by: Coluna para agrupar (ex: COD_CURSO, SETOR_CURSO, SIGLA_LOTACAO, UNIDADE GESTORA)
+            filter_column: Coluna para filtrar (opcional)
+            filter_value: Valor do filtro (opcional; termine com * para prefixo, ex: "AC/*")
+            
+        Returns:
+            String formatada com o número de respondentes
+        """
+        try:
+            filters = {filter_column: filter_value} if filter_column and filter_value else None
+            result = analyzer.count_respondents(table_name, group_by=group_by, filters=filters)
+            
+            return _format(result, "Respondentes", "count_respondents_tool")
+        except Exception as e:
+            return f"Erro ao contar respondentes: {str(e)}"
+    
     def get_top_bottom_tool(
         table_name: str,
         metric: str,
         n: int,
         group_by: str,
-        get_bottom: bool = False
+        get_bottom: bool = False,
+        min_valid: int = 0,
+        approximate: bool = False
     ) -> str:
         """
         Retorna top/bottom N por métrica.
@@ -223,9 +330,13 @@ def create_analysis_tools(analyzer: DataAnalyzer):
             n: Número de resultados (ex: 10 para top 10)
             group_by: Coluna para agrupar
             get_bottom: True para bottom N (piores), False para top N (melhores)
+            min_valid: Mínimo de respostas válidas para o grupo entrar no ranking (ex: 30)
+            approximate: True para estimar por amostra (rápido, com margem de erro); nunca use
+                se o usuário pedir números exatos
             
         Returns:
-            String formatada com ranking
+            String formatada com ranking (satisfação ordenada pela satisfação ajustada,
+            com intervalo de confiança de 95%)
         """
         try:
             result = analyzer.get_top_n(
@@ -233,11 +344,13 @@ def create_analysis_tools(analyzer: DataAnalyzer):
                 metric=metric,
                 n=n,
                 group_by=group_by,
-                ascending=get_bottom
+                ascending=get_bottom,
+                min_valid=min_valid,
+                approximate=approximate
             )
             
             ranking_type = "Bottom" if get_bottom else "Top"
-            return f"{ranking_type} {n} por {metric}:\n{result.to_string(index=False)}"
+            return _approx_note(result) + _format(result, f"{ranking_type} {n} por {metric}", "get_top_bottom_tool", max_rows=max(20, len(result)))
         except Exception as e:
             return f"Erro ao obter ranking: {str(e)}"
     
@@ -258,12 +371,38 @@ def create_analysis_tools(analyzer: DataAnalyzer):
         """
         try:
             if table_name:
-                return get_table_info(table_name)
+                return get_table_info(table_name, stats=analyzer.table_stats)
             else:
-                return get_all_tables_summary()
+                return get_all_tables_summary(stats=analyzer.table_stats)
         except Exception as e:
             return f"Erro ao obter schema: {str(e)}"
     
+    def find_questions_tool(topic: str, table_name: str = None, top: int = 10) -> str:
+        """
+        Encontra os ID_PERGUNTA das perguntas sobre um tema (busca local, instantânea).
+        
+        Use esta ferramenta ANTES de filtrar por ID_PERGUNTA, em vez de adivinhar códigos:
+        - "Como está a transparência na gestão?" → topic="transparência"
+        - "Satisfação com a segurança" → topic="segurança"
+        - "O plano de ensino é cumprido?" → topic="plano de ensino"
+        
+        Args:
+            topic: Tema ou trecho da pergunta
+            table_name: Restringe às perguntas de uma tabela fato (opcional, ex: FATO_AVINSTITUCIONAL)
+            top: Máximo de perguntas (padrão 10)
+            
+        Returns:
+            Perguntas encontradas com ID_PERGUNTA, texto e eixo/dimensão SINAES
+        """
+        try:
+            result = analyzer.find_questions(topic, table_name=table_name, top=max(1, min(int(top or 10), 30)))
+            
+            if result.empty:
+                return f"Nenhuma pergunta encontrada para '{topic}'. Tente sinônimos ou um termo mais curto."
+            return _format(result, "Perguntas", "find_questions_tool", max_rows=len(result), max_label_chars=120)
+        except Exception as e:
+            return f"Erro ao buscar perguntas: {str(e)}"
+    
     def join_and_analyze_tool(
         fact_table: str,
         dim_table: str,
@@ -288,56 +427,268 @@ def create_analysis_tools(analyzer: DataAnalyzer):
             String formatada com resultados
         """
         try:
-            df_joined = analyzer.join_with_dimension(fact_table, dim_table)
-            
-            if analysis_type == 'satisfacao':
-                df_joined['is_concordo'] = (df_joined['RESPOSTA'] == 'Concordo').astype(int)
-                df_joined['is_discordo'] = (df_joined['RESPOSTA'] == 'Discordo').astype(int)
-                
-                if group_by:
-                    result = df_joined.groupby(group_by).agg({
-                        'is_concordo': 'sum',
-                        'is_discordo': 'sum'
-                    }).reset_index()
-                    
-                    result['total_valid'] = result['is_concordo'] + result['is_discordo']
-                    result['satisfacao_%'] = result.apply(
-                        lambda x: round((x['is_concordo'] / x['total_valid'] * 100), 2) if x['total_valid'] > 0 else 0,
-                        axis=1
-                    )
-                    result = result.sort_values('satisfacao_%', ascending=False)
-                else:
-                    total_c = df_joined['is_concordo'].sum()
-                    total_d = df_joined['is_discordo'].sum()
-                    total_v = total_c + total_d
-                    sat = round((total_c / total_v * 100), 2) if total_v > 0 else 0
-                    result = pd.DataFrame([{'satisfacao_%': sat, 'total_validas': total_v}])
-                    
-            elif analysis_type == 'contagem':
-                if group_by:
-                    result = df_joined.groupby(group_by).size().reset_index(name='contagem')
-                    result = result.sort_values('contagem', ascending=False)
-                else:
-                    result = pd.DataFrame([{'contagem_total': len(df_joined)}])
-            else:
+            if analysis_type not in ('satisfacao', 'contagem'):
                 return f"Tipo de análise '{analysis_type}' não suportado. Use: satisfacao ou contagem"
             
-            if len(result) > 20:
-                return f"Resultados (top 20 de {len(result)}):\n{result.head(20).to_string(index=False)}"
-            else:
-                return f"Resultados:\n{result.to_string(index=False)}"
+            result = analyzer.join_aggregate(fact_table, dim_table, analysis_type, group_by=group_by)
+            
+            return _format(result, "Resultados", "join_and_analyze_tool")
                 
         except Exception as e:
             return f"Erro ao fazer join e análise: {str(e)}"
     
+    def drill_down_tool(
+        table_name: str,
+        group_by: list,
+        metrics: list = None,
+        filters: dict = None
+    ) -> str:
+        """
+        Analisa várias métricas por várias dimensões em uma única chamada.
+        
+        Use esta ferramenta para perguntas como:
+        - "Satisfação e gap por setor e por eixo"
+        - Cruzamentos entre duas ou mais colunas (curso x ano, unidade x pergunta)
+        - Várias métricas ao mesmo tempo
+        
+        Args:
+            table_name: Tabela fato (FATO_AVCURSOS, FATO_AVDISCIPLINAS, FATO_AVINSTITUCIONAL)
+            group_by: Lista de colunas para agrupar; podem ser da tabela ou de dimensões
+                relacionadas (ex: ["SETOR_CURSO", "EIXO_SINAES"])
+            metrics: Lista entre satisfacao, discordancia, net_score, gap_desconhecimento, contagem
+            filters: Filtros {coluna: valor}, {coluna: [valores]},
+                {coluna: {"between": [min, max]}} / {coluna: {">=": valor}} ou
+                prefixo {"SIGLA_LOTACAO": "AC/*"}
+            
+        Returns:
+            Tabela compacta com uma linha por combinação de grupos
+        """
+        try:
+            result = analyzer.drill_down(table_name, group_by, metrics=metrics, filters=filters)
+            
+            return _format(result, "Resultados", "drill_down_tool", max_rows=30)
+        except Exception as e:
+            return f"Erro no drill-down: {str(e)}"
+    
+    def trend_tool(
+        table_name: str,
+        metrics: list = None,
+        group_by: str = None,
+        filters: dict = None
+    ) -> str:
+        """
+        Evolução das métricas ao longo dos ciclos de avaliação (ANO/SEMESTRE).
+        
+        Use esta ferramenta para perguntas sobre:
+        - Tendência / evolução / comparação entre anos ou semestres
+        - "A satisfação melhorou em relação ao ciclo anterior?"
+        
+        Args:
+            table_name: Tabela fato (FATO_AVCURSOS, FATO_AVDISCIPLINAS, FATO_AVINSTITUCIONAL)
+            metrics: Lista entre satisfacao, discordancia, net_score, gap_desconhecimento, contagem
+            group_by: Coluna para separar as séries (opcional, ex: SETOR_CURSO)
+            filters: Filtros {coluna: valor} (ex: {"ANO": {">=": 2023}})
+            
+        Returns:
+            Tabela com uma linha por ciclo e a variação (delta_*) em relação ao ciclo anterior
+        """
+        try:
+            result = analyzer.trend(table_name, metrics=metrics, group_by=group_by, filters=filters)
+            
+            return _format(result, "Série", "trend_tool", max_rows=30)
+        except Exception as e:
+            return f"Erro na série histórica: {str(e)}"
+    
+    def rollup_tool(
+        table_name: str,
+        level: str,
+        parent_level: str = None,
+        parent_value: str = None,
+        metrics: list = None
+    ) -> str:
+        """
+        Métricas agregadas em um nível da hierarquia organizacional (resposta imediata).
+        
+        Hierarquias:
+        - FATO_AVINSTITUCIONAL: SIGLA_LOTACAO -> UNIDADE GESTORA
+        - FATO_AVCURSOS: COD_CURSO -> SETOR_CURSO
+        - FATO_AVDISCIPLINAS: COD_DISCIPLINA -> COD_CURSO -> SETOR_CURSO
+        
+        Use esta ferramenta para perguntas como:
+        - "Satisfação dos servidores por unidade gestora" (roll-up)
+        - "Quais lotações do Setor de Educação têm menor satisfação?" (drill-down:
+          level="SIGLA_LOTACAO", parent_level="UNIDADE GESTORA", parent_value="Setor de Educação")
+        
+        Args:
+            table_name: Tabela fato (FATO_AVCURSOS, FATO_AVDISCIPLINAS, FATO_AVINSTITUCIONAL)
+            level: Nível de agregação (ex: "UNIDADE GESTORA", "SETOR_CURSO", "COD_CURSO")
+            parent_level: Nível acima para restringir o resultado (opcional)
+            parent_value: Valor do nível acima (opcional)
+            metrics: Lista entre satisfacao, discordancia, net_score, gap_desconhecimento, contagem
+            
+        Returns:
+            Tabela com uma linha por unidade do nível
+        """
+        try:
+            parent = {parent_level: parent_value} if parent_level and parent_value else None
+            result = analyzer.rollup(table_name, level, parent=parent, metrics=metrics)
+            
+            if result.empty:
+                return "Nenhum resultado para esse nível/filtro."
+            return _format(result, "Resultados", "rollup_tool", max_rows=30)
+        except Exception as e:
+            return f"Erro no roll-up: {str(e)}"
+    
+    def driver_analysis_tool(
+        table_name: str,
+        analysis: str = "drivers",
+        id_pergunta: str = None,
+        filter_column: str = None,
+        filter_value: str = None,
+        top: int = 10
+    ) -> str:
+        """
+        Relação entre perguntas nas respostas de cada respondente (ID_PESQUISA).
+        
+        Use esta ferramenta para perguntas como:
+        - "Quais perguntas mais influenciam a satisfação geral no institucional?" (analysis="drivers")
+        - "O que mais se relaciona com a satisfação na pergunta 2005?" (analysis="drivers", id_pergunta="2005")
+        - "Quais perguntas andam juntas / são respondidas de forma parecida?" (analysis="correlacoes")
+        
+        Args:
+            table_name: Tabela fato (FATO_AVCURSOS, FATO_AVDISCIPLINAS, FATO_AVINSTITUCIONAL)
+            analysis: "drivers" (importância de cada pergunta para a satisfação geral, com
+                quadrante Prioridade/Manter/Monitorar/Secundário) ou "correlacoes" (pares de perguntas)
+            id_pergunta: Pergunta de referência (opcional): o resultado dos drivers ou a
+                pergunta cujas correlações serão listadas
+            filter_column: Coluna para filtrar (opcional)
+            filter_value: Valor do filtro (opcional; termine com * para prefixo, ex: "AC/*")
+            top: Número de linhas (padrão 10)
+            
+        Returns:
+            Tabela com correlações (-1 a 1) e respondentes considerados
+        """
+        try:
+            filters = {filter_column: filter_value} if filter_column and filter_value else None
+            if analysis == "correlacoes":
+                result = analyzer.question_correlations(table_name, id_pergunta=id_pergunta, filters=filters, top=top)
+            elif analysis == "drivers":
+                result = analyzer.key_drivers(table_name, target=id_pergunta, filters=filters).head(top)
+            else:
+                return "Erro: analysis deve ser 'drivers' ou 'correlacoes'"
+            
+            if result.empty:
+                return "Respondentes insuficientes para calcular correlações com esse filtro."
+            return _format(result, "Resultados", "driver_analysis_tool")
+        except Exception as e:
+            return f"Erro na análise de direcionadores: {str(e)}"
+    
+    def filter_rows_tool(
+        table_name: str,
+        query: str,
+        columns: list = None,
+        limit: int = 20
+    ) -> str:
+        """
+        Filtra linhas de uma tabela com uma expressão segura.
+        
+        Use esta ferramenta para:
+        - Ver respostas/linhas específicas que atendem a condições
+        - Consultas que as outras ferramentas não cobrem
+        
+        A expressão aceita comparações (==, !=, <, <=, >, >=), in / not in e
+        and / or / not sobre colunas da tabela. Colunas com espaço vão entre crases.
+        Exemplo: "RESPOSTA == 'Discordo' and ID_PERGUNTA in ['1942', '1943']"
+        
+        Args:
+            table_name: Nome da tabela
+            query: Expressão de filtro
+            columns: Colunas a retornar (opcional, None = todas)
+            limit: Máximo de linhas retornadas (padrão 20)
+            
+        Returns:
+            String com as linhas encontradas
+        """
+        try:
+            limit = max(1, min(int(limit or 20), 100))
+            result = analyzer.custom_query(table_name, query, columns=columns, limit=limit)
+            
+            if result.empty:
+                return "Nenhuma linha atende ao filtro."
+            return _format(result, "Linhas", "filter_rows_tool", max_rows=limit)
+        except Exception as e:
+            return f"Erro ao filtrar linhas: {str(e)}"
+    
+    def fetch_more_tool(handle: str, offset: int = 0, limit: int = 20) -> str:
+        """
+        Busca mais linhas de um resultado anterior que não coube na observação.
+        
+        Use APENAS quando uma ferramenta terminar com [+N linhas: fetch_more_tool(...)]
+        e as linhas seguintes forem necessárias para responder.
+        
+        Args:
+            handle: Handle do resultado (ex: "r1")
+            offset: Primeira linha a retornar (o valor indicado no resultado)
+            limit: Máximo de linhas (padrão 20, até 100)
+            
+        Returns:
+            Próximas linhas do resultado
+        """
+        try:
+            result = results.get(handle)
+            limit = max(1, min(int(limit or 20), 100))
+            return _format(result, f"Resultado {handle}", "fetch_more_tool", max_rows=limit,
+                           offset=max(0, int(offset or 0)), handle=handle)
+        except Exception as e:
+            return f"Erro ao buscar mais linhas: {str(e)}"
+    
     tools = [
-        FunctionTool.from_defaults(fn=calculate_satisfaction_tool),
-        FunctionTool.from_defaults(fn=count_responses_tool),
-        FunctionTool.from_defaults(fn=get_top_bottom_tool),
-        FunctionTool.from_defaults(fn=get_table_schema_tool),
-        FunctionTool.from_defaults(fn=join_and_analyze_tool),
+        FunctionTool.from_defaults(fn=traced_tool(calculate_satisfaction_tool)),
+        FunctionTool.from_defaults(fn=traced_tool(count_responses_tool)),
+        FunctionTool.from_defaults(fn=traced_tool(count_respondents_tool)),
+        FunctionTool.from_defaults(fn=traced_tool(get_top_bottom_tool)),
+        FunctionTool.from_defaults(fn=traced_tool(get_table_schema_tool)),
+        FunctionTool.from_defaults(fn=traced_tool(find_questions_tool)),
+        FunctionTool.from_defaults(fn=traced_tool(join_and_analyze_tool)),
+        FunctionTool.from_defaults(fn=traced_tool(drill_down_tool)),
+        FunctionTool.from_defaults(fn=traced_tool(trend_tool)),
+        FunctionTool.from_defaults(fn=traced_tool(rollup_tool)),
+        FunctionTool.from_defaults(fn=traced_tool(driver_analysis_tool)),
+        FunctionTool.from_defaults(fn=traced_tool(filter_rows_tool)),
+        FunctionTool.from_defaults(fn=traced_tool(fetch_more_tool)),
     ]
     
+    if analyzer.backend.supports_sql:
+        def sql_query_tool(sql: str, limit: int = 20) -> str:
+            """
+            Executa uma consulta SQL somente-leitura (DuckDB) sobre as tabelas de avaliação.
+            
+            Use esta ferramenta APENAS quando as outras não expressam a agregação:
+            - COUNT(DISTINCT ...), HAVING, janelas, CASE, várias agregações combinadas
+            
+            Regras: um único SELECT (ou WITH ... SELECT); só as tabelas FATO_* e DIM_*;
+            todas as colunas são texto (use CAST para números); colunas com espaço entre
+            aspas duplas ("UNIDADE GESTORA"). Consulte get_table_schema_tool para as colunas.
+            Exemplo: SELECT SETOR_CURSO, COUNT(DISTINCT COD_CURSO) AS cursos FROM FATO_AVCURSOS GROUP BY 1
+            
+            Args:
+                sql: Consulta SELECT
+                limit: Máximo de linhas retornadas (padrão 20, até 100)
+                
+            Returns:
+                String com as linhas do resultado
+            """
+            try:
+                result = analyzer.sql_query(sql, limit=max(1, min(int(limit or 20), 100)))
+                
+                if result.empty:
+                    return "A consulta não retornou linhas."
+                return _format(result, "Resultado", "sql_query_tool", max_rows=len(result))
+            except Exception as e:
+                return f"Erro na consulta SQL: {str(e)}"
+        
+        tools.append(FunctionTool.from_defaults(fn=traced_tool(sql_query_tool)))
+    
     return tools
 
 
@@ -345,21 +696,24 @@ def get_chat_engine(api_key: str = None, chat_history: list = None):
     """
     Inicializa e retorna o chat engine híbrido usando Gemini.
     Combina análise estruturada (data tools) com busca semântica (vector index).
+    Sem api_key explícita, usa o pool de chaves (APP_SECRET_TOKEN, APP_SECRET_TOKEN_2, ...).
     """
-    if not api_key:
-        from src.utils.key_manager import get_decrypted_key
-        api_key = get_decrypted_key()
+    if api_key:
+        llm = GoogleGenAI(api_key=api_key, model_name="models/gemini-2.5-flash-live")
+        embed_model = GoogleGenAIEmbedding(api_key=api_key, model_name="models/text-embedding-004")
+    else:
+        llm, embed_model = get_pooled_models()
         
-    if not api_key:
+    if llm is None:
         st.error("GOOGLE_API_KEY not found in environment variables. Please set it in .env file.")
         return None
 
     try:
-        Settings.llm = GoogleGenAI(api_key=api_key, model_name="models/gemini-2.5-flash-live")
-        Settings.embed_model = GoogleGenAIEmbedding(api_key=api_key, model_name="models/text-embedding-004")
+        Settings.llm = llm
+        Settings.embed_model = embed_model
 
         analyzer = get_data_analyzer()
-        vector_index = get_vector_index()
+        vector_index = get_vector_index(get_data_version())
         
         analysis_tools = create_analysis_tools(analyzer)
         
@@ -396,7 +750,12 @@ def get_chat_engine(api_key: str = None, chat_history: list = None):
                 except Exception as e:
                     return f"Erro na busca semântica: {str(e)}"
             
-            all_tools.append(FunctionTool.from_defaults(fn=semantic_search_tool))
+            all_tools.append(FunctionTool.from_defaults(fn=traced_tool(semantic_search_tool)))
+        
+        sql_tool_line = (
+            "   - sql_query_tool: SQL somente-leitura para agregações que as outras ferramentas não cobrem\n"
+            if analyzer.backend.supports_sql else ""
+        )
         
         system_prompt = f"""Você é um assistente de análise de dados da UFPR especializado em avaliação institucional.
 
@@ -404,11 +763,19 @@ FERRAMENTAS DISPONÍVEIS:
 
 1. **Ferramentas de Análise de Dados** (para perguntas QUANTITATIVAS):
    - calculate_satisfaction_tool: Calcular satisfação (% Concordo)
-   - count_responses_tool: Contar respostas
+   - count_responses_tool: Contar respostas (linhas; cada pessoa responde várias perguntas)
+   - count_respondents_tool: Contar respondentes distintos (pessoas)
    - get_top_bottom_tool: Rankings (top/bottom N)
    - join_and_analyze_tool: Relacionar tabelas e analisar
    - get_table_schema_tool: Ver estrutura das tabelas
-
+   - find_questions_tool: Encontrar os ID_PERGUNTA de um tema (ex: "transparência", "plano de ensino")
+   - drill_down_tool: Várias métricas por várias colunas em uma chamada (ex: satisfação e gap por setor e eixo)
+   - trend_tool: Evolução entre ciclos (ANO/SEMESTRE) com variação em relação ao ciclo anterior
+   - rollup_tool: Métricas por nível da hierarquia (lotação → unidade gestora, curso → setor) e drill-down a partir do nível acima
+   - driver_analysis_tool: Quais perguntas mais influenciam a satisfação geral (drivers) e correlações entre perguntas
+   - filter_rows_tool: Filtrar linhas com condições (==, in, and/or/not)
+   - fetch_more_tool: Próximas linhas de um resultado truncado (handle indicado no fim do resultado)
+{sql_tool_line}
 2. **Busca Semântica** (para perguntas CONCEITUAIS):
    - semantic_search_tool: Buscar informações em PDFs e documentos
 
@@ -424,7 +791,12 @@ REGRAS IMPORTANTES:
 2. **Escolha a ferramenta certa**:
    - Perguntas sobre DEFINIÇÕES/SIGNIFICADOS de indicadores → Use o contexto fornecido primeiro
    - Perguntas com números/cálculos novos → Use data tools
+   - Perguntas sobre um tema específico (ex: segurança, transparência) → find_questions_tool para obter
+     os ID_PERGUNTA e depois filtre por ID_PERGUNTA; nunca adivinhe códigos de perguntas
    - Perguntas "o que é", "explique" (conceitos gerais) → Use semantic search
+   - Perguntas exploratórias sobre FATO_AVDISCIPLINAS (ex: "mais ou menos quanto", "visão geral") → approximate=True
+     em calculate_satisfaction_tool, count_responses_tool e get_top_bottom_tool; se o usuário pedir números
+     exatos ou oficiais, use approximate=False
    
 3. **SEMPRE cite a fonte**: Mencione se usou o contexto da tela, tabela ou documento
 
@@ -442,7 +814,7 @@ MÉTRICAS COMUNS:
 {str(COMMON_METRICS)}
 
 TABELAS DISPONÍVEIS:
-{get_all_tables_summary()}
+{get_all_tables_summary(stats=analyzer.table_stats)}
 
 Comece analisando a pergunta do usuário, verificando o contexto fornecido, e escolhendo a(s) ferramenta(s) apropriada(s).
 """
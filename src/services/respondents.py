@@ -0,0 +1,125 @@
+"""
+Conjuntos de respondentes (ID_PESQUISA) para contagens distintas.
+Cada respondente é identificado pelo seu código na codificação por dicionário da
+coluna ID_PESQUISA (0..universo-1). Um conjunto é guardado na forma mais compacta:
+
+- array: códigos ordenados (uint32), para conjuntos esparsos
+- bitmap: um bit por código do universo, quando o conjunto ocupa mais de 1/32 dele
+- hll: esboço HyperLogLog (2^HLL_PRECISION registradores, erro padrão ~0,8%), para
+  conjuntos com mais de HLL_MIN_DISTINCT respondentes
+
+Uniões de conjuntos exatos são exatas; a união com um esboço é aproximada.
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+HLL_PRECISION = 14
+HLL_REGISTERS = 1 << HLL_PRECISION
+HLL_MIN_DISTINCT = 1_000_000
+# Erro padrão relativo do estimador HyperLogLog
+HLL_STD_ERROR = 1.04 / np.sqrt(HLL_REGISTERS)
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def _hash(codes: np.ndarray) -> np.ndarray:
+    """splitmix64 dos códigos: bits bem distribuídos para o HyperLogLog."""
+    x = codes.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _hll_registers(codes: np.ndarray) -> np.ndarray:
+    hashed = _hash(codes)
+    index = (hashed >> np.uint64(64 - HLL_PRECISION)).astype(np.int64)
+    rest = hashed & np.uint64((1 << (64 - HLL_PRECISION)) - 1)
+    # Posição do primeiro bit 1 nos 64 - p bits restantes (frexp é exato até 2^53)
+    _, exponent = np.frexp(rest.astype(np.float64))
+    rank = np.where(rest == 0, 64 - HLL_PRECISION + 1, 64 - HLL_PRECISION - exponent + 1).astype(np.uint8)
+    registers = np.zeros(HLL_REGISTERS, dtype=np.uint8)
+    np.maximum.at(registers, index, rank)
+    return registers
+
+
+def _hll_estimate(registers: np.ndarray) -> float:
+    m = float(HLL_REGISTERS)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = int((registers == 0).sum())
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * np.log(m / zeros)
+    return float(estimate)
+
+
+class RespondentSet:
+    """Conjunto de códigos de respondentes em um universo de tamanho universe."""
+
+    __slots__ = ("kind", "data", "universe", "_count")
+
+    def __init__(self, kind: str, data: np.ndarray, universe: int, count: int):
+        self.kind = kind
+        self.data = data
+        self.universe = universe
+        self._count = count
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, universe: int, assume_unique: bool = False) -> "RespondentSet":
+        """Conjunto a partir de códigos (ordenados e sem repetição se assume_unique)."""
+        codes = np.asarray(codes) if assume_unique else np.unique(codes)
+        count = len(codes)
+        if count > HLL_MIN_DISTINCT:
+            registers = _hll_registers(codes)
+            return cls("hll", registers, universe, int(round(_hll_estimate(registers))))
+        if count * 32 > universe:
+            bits = np.zeros(universe, dtype=bool)
+            bits[codes] = True
+            return cls("bitmap", np.packbits(bits), universe, count)
+        return cls("array", codes.astype(np.uint32), universe, count)
+
+    @property
+    def exact(self) -> bool:
+        return self.kind != "hll"
+
+    def __len__(self) -> int:
+        return self._count
+
+    def codes(self) -> np.ndarray:
+        """Códigos ordenados de um conjunto exato."""
+        if self.kind == "array":
+            return self.data
+        if self.kind == "bitmap":
+            return np.flatnonzero(np.unpackbits(self.data, count=self.universe)).astype(np.uint32)
+        raise ValueError("Esboço HyperLogLog não guarda os códigos dos respondentes")
+
+    def registers(self) -> np.ndarray:
+        return self.data if self.kind == "hll" else _hll_registers(self.codes())
+
+    @staticmethod
+    def union(sets: Iterable["RespondentSet"], universe: int) -> "RespondentSet":
+        """União de conjuntos do mesmo universo (aproximada se algum for esboço)."""
+        sets = list(sets)
+        if not sets:
+            return RespondentSet("array", np.array([], dtype=np.uint32), universe, 0)
+        if len(sets) == 1:
+            return sets[0]
+
+        if any(not s.exact for s in sets):
+            registers = np.maximum.reduce([s.registers() for s in sets])
+            return RespondentSet("hll", registers, universe, int(round(_hll_estimate(registers))))
+
+        bitmaps = [s.data for s in sets if s.kind == "bitmap"]
+        arrays = [s.data for s in sets if s.kind == "array"]
+        if bitmaps:
+            packed = np.bitwise_or.reduce(bitmaps)
+            if arrays:
+                extra = np.zeros(universe, dtype=bool)
+                extra[np.concatenate(arrays)] = True
+                packed = packed | np.packbits(extra)
+            count = int(_POPCOUNT[packed].sum())
+            if count > HLL_MIN_DISTINCT:
+                return RespondentSet.from_codes(np.flatnonzero(np.unpackbits(packed, count=universe)), universe, True)
+            return RespondentSet("bitmap", packed, universe, count)
+        return RespondentSet.from_codes(np.concatenate(arrays), universe)
@@ -0,0 +1,162 @@
+"""
+Matriz esparsa respondente (ID_PESQUISA) x pergunta (ID_PERGUNTA) com as respostas
+codificadas, para correlações entre perguntas e análise de direcionadores (key drivers).
+
+Codificação: Concordo = +1, Discordo = -1; Desconheço e perguntas não respondidas ficam
+fora da matriz (como no cálculo de satisfação). Um respondente com várias respostas à
+mesma pergunta (ex: uma por disciplina) fica com a média delas.
+
+As matrizes são scipy.sparse (CSC). Sem scipy, arrays densos do numpy com as mesmas
+operações, só até DENSE_MAX_CELLS células (tabelas institucional e de cursos): a matriz
+densa de FATO_AVDISCIPLINAS não cabe em memória.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+ANSWER_CODES = {'Concordo': 1.0, 'Discordo': -1.0}
+# Mínimo de respondentes em comum para uma correlação ser reportada
+MIN_PAIR_RESPONDENTS = 30
+# Células (respondentes x perguntas) aceitas sem scipy: 3 matrizes float64 de ~160 MB cada
+DENSE_MAX_CELLS = 20_000_000
+
+
+def _dense(matrix) -> np.ndarray:
+    return np.asarray(matrix.toarray() if sparse is not None and sparse.issparse(matrix) else matrix, dtype=float)
+
+
+def _pearson(n, sx, sy, sxx, syy, sxy, min_n):
+    """Correlação de Pearson a partir das somas (elemento a elemento); NaN abaixo de min_n."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mx, my = sx / n, sy / n
+        cov = sxy / n - mx * my
+        var = (sxx / n - mx * mx) * (syy / n - my * my)
+        corr = cov / np.sqrt(var)
+    return np.where((n >= min_n) & (var > 1e-12), corr, np.nan)
+
+
+class ResponseMatrix:
+    """
+    Respostas codificadas de cada respondente a cada pergunta.
+
+    Attributes:
+        X: Matriz respondentes x perguntas com os códigos (0 = não respondida)
+        A: Indicadora das células respondidas
+        questions: ID_PERGUNTA de cada coluna
+    """
+
+    def __init__(self, respondents: np.ndarray, questions: np.ndarray, answers: np.ndarray):
+        """
+        Args:
+            respondents: Identificador do respondente de cada resposta
+            questions: ID_PERGUNTA de cada resposta
+            answers: RESPOSTA de cada resposta
+        """
+        code = pd.Series(answers).map(ANSWER_CODES).to_numpy(dtype=float)
+        valid = ~np.isnan(code)
+        rows, _ = pd.factorize(respondents[valid])
+        cols, question_ids = pd.factorize(questions[valid], sort=True)
+
+        # Média por (respondente, pergunta): somas e contagens das respostas repetidas
+        cells = pd.DataFrame({'r': rows, 'q': cols, 'x': code[valid]}).groupby(['r', 'q'], sort=False)['x'].mean()
+        r = cells.index.get_level_values('r').to_numpy()
+        q = cells.index.get_level_values('q').to_numpy()
+        x = cells.to_numpy(dtype=float)
+
+        shape = (int(rows.max()) + 1 if len(rows) else 0, len(question_ids))
+        self.questions = pd.Index(question_ids, name='ID_PERGUNTA')
+        self.num_respondents = shape[0]
+        self._entries = (r, q, x)
+        self._correlations = {}
+        if sparse is not None:
+            self.X = sparse.csc_matrix((x, (r, q)), shape=shape)
+            self.A = sparse.csc_matrix((np.ones_like(x), (r, q)), shape=shape)
+            self.X2 = sparse.csc_matrix((x * x, (r, q)), shape=shape)
+        else:
+            if shape[0] * shape[1] > DENSE_MAX_CELLS:
+                raise ValueError(
+                    f"Matriz {shape[0]} x {shape[1]} grande demais sem scipy "
+                    f"(limite de {DENSE_MAX_CELLS:,} células densas): instale as dependências com uv sync"
+                )
+            self.X = np.zeros(shape)
+            self.X[r, q] = x
+            self.A = np.zeros(shape)
+            self.A[r, q] = 1.0
+            self.X2 = self.X * self.X
+
+    @property
+    def nnz(self) -> int:
+        return len(self._entries[0])
+
+    def correlations(self, min_pairs: int = MIN_PAIR_RESPONDENTS):
+        """
+        Correlações de Pearson entre perguntas sobre os respondentes que responderam
+        ambas (pairwise complete), com todas as somas obtidas de produtos X^T A.
+        Calculadas uma vez por min_pairs.
+
+        Returns:
+            (DataFrame perguntas x perguntas com as correlações, array com os respondentes em comum)
+        """
+        if min_pairs in self._correlations:
+            return self._correlations[min_pairs]
+
+        n = _dense(self.A.T @ self.A)
+        sx = _dense(self.X.T @ self.A)      # soma de x_i entre quem respondeu j
+        sxx = _dense(self.X2.T @ self.A)
+        sxy = _dense(self.X.T @ self.X)
+        corr = _pearson(n, sx, sx.T, sxx, sxx.T, sxy, min_pairs)
+        np.fill_diagonal(corr, 1.0)
+        self._correlations[min_pairs] = (pd.DataFrame(corr, index=self.questions, columns=self.questions), n)
+        return self._correlations[min_pairs]
+
+    def key_drivers(self, target: Optional[str] = None, min_respondents: int = MIN_PAIR_RESPONDENTS) -> pd.DataFrame:
+        """
+        Importância de cada pergunta para a satisfação geral: correlação de cada item com
+        a média das demais respostas do mesmo respondente (item-total corrigida), ou com
+        a pergunta target, se informada.
+
+        Returns:
+            DataFrame com ID_PERGUNTA, correlacao, satisfacao_% (média por respondente)
+            e respondentes (com resposta válida ao item e a outro item ou ao target)
+        """
+        r, q, x = self._entries
+        # (x + 1) / 2 é a fração de Concordo do respondente na pergunta
+        counts = np.bincount(q, minlength=len(self.questions))
+        concordo = np.bincount(q, weights=(x + 1) / 2, minlength=len(self.questions))
+        satisfaction = concordo / np.maximum(counts, 1) * 100
+
+        if target is not None:
+            corr, n = self.correlations(min_pairs=min_respondents)
+            if str(target) not in corr.index:
+                raise ValueError(f"Pergunta {target} não encontrada entre as respostas")
+            importance = corr[str(target)].to_numpy(copy=True)
+            respondents = n[self.questions.get_loc(str(target))]
+            importance[self.questions.get_loc(str(target))] = np.nan
+        else:
+            # Escore dos demais itens: (soma - x) / (respondidas - 1), só com ao menos outro item
+            row_sum = np.bincount(r, weights=x, minlength=self.num_respondents)
+            row_count = np.bincount(r, minlength=self.num_respondents)
+            other = row_count[r] > 1
+            rest = (row_sum[r][other] - x[other]) / (row_count[r][other] - 1)
+            xo, qo = x[other], q[other]
+
+            def _sum(weights):
+                return np.bincount(qo, weights=weights, minlength=len(self.questions))
+
+            respondents = _sum(None)
+            importance = _pearson(respondents, _sum(xo), _sum(rest), _sum(xo * xo), _sum(rest * rest),
+                                  _sum(xo * rest), min_respondents)
+
+        return pd.DataFrame({
+            'ID_PERGUNTA': self.questions,
+            'correlacao': np.round(importance, 3),
+            'satisfacao_%': np.round(satisfaction, 2),
+            'respondentes': np.asarray(respondents, dtype=int),
+        })
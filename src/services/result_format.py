@@ -0,0 +1,168 @@
+"""
+Formatação compacta dos resultados das ferramentas do agente.
+Cada observação volta ao prompt em todas as iterações ReAct seguintes, então o
+resultado é enviado como TSV: números arredondados, textos longos (ex: PERGUNTA)
+truncados, um cabeçalho com o número de linhas e os totais das colunas de
+contagem, e só as linhas que cabem no orçamento de tokens da ferramenta.
+Quando sobram linhas, o DataFrame completo fica no ResultCache e a observação
+termina com o handle para buscar as próximas (fetch_more_tool).
+
+TOOL_RESULT_FORMAT=table volta ao formato anterior (DataFrame.to_string).
+"""
+
+import math
+import os
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+RESULT_FORMAT_ENV = "TOOL_RESULT_FORMAT"
+TOKEN_BUDGET_ENV = "TOOL_TOKEN_BUDGET"
+# Aproximação de tokens por caracteres (texto em português com números)
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 600
+# Orçamento por ferramenta, em tokens, quando TOOL_TOKEN_BUDGET não está definido
+TOOL_TOKEN_BUDGETS = {
+    "drill_down_tool": 900,
+    "trend_tool": 900,
+    "filter_rows_tool": 900,
+    "sql_query_tool": 900,
+    "fetch_more_tool": 900,
+    "find_questions_tool": 900,
+}
+MAX_LABEL_CHARS = 40
+DECIMALS = 2
+RESULT_CACHE_SIZE = 32
+# Colunas somáveis entre as linhas, resumidas no cabeçalho
+TOTAL_COLUMNS = [
+    'contagem', 'contagem_total', 'contagem_desconheco', 'total', 'concordo', 'discordo', 'desconheco',
+    'total_valid', 'total_validas', 'total_respostas_validas', 'total_concordo', 'total_discordo',
+    'is_concordo', 'is_discordo',
+]
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def token_budget(tool_name: Optional[str] = None) -> int:
+    """Orçamento de tokens da ferramenta: TOOL_TOKEN_BUDGET ou TOOL_TOKEN_BUDGETS."""
+    value = os.getenv(TOKEN_BUDGET_ENV)
+    if value:
+        return int(value)
+    return TOOL_TOKEN_BUDGETS.get(tool_name, DEFAULT_TOKEN_BUDGET)
+
+
+def _number(value, decimals: int = DECIMALS) -> str:
+    if isinstance(value, (float, np.floating)):
+        if np.isnan(value):
+            return ""
+        if float(value).is_integer():
+            return str(int(value))
+        return f"{value:.{decimals}f}".rstrip("0").rstrip(".")
+    return str(value)
+
+
+def _cell(value, max_label_chars: int = MAX_LABEL_CHARS) -> str:
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+        return _number(value)
+    # TSV: tabulações e quebras de linha do texto viram espaço
+    text = " ".join(str(value).split())
+    return text if len(text) <= max_label_chars else text[:max_label_chars - 1].rstrip() + "…"
+
+
+def _header(df: pd.DataFrame, title: str) -> str:
+    totals = [
+        f"{col}={_number(df[col].sum())}"
+        for col in TOTAL_COLUMNS
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col])
+    ]
+    header = f"{title}: {len(df)} linhas"
+    if totals and len(df) > 1:
+        header += "; totais: " + ", ".join(totals)
+    return header
+
+
+class ResultCache:
+    """Resultados completos das ferramentas, por handle (LRU), para fetch_more_tool."""
+
+    def __init__(self, size: int = RESULT_CACHE_SIZE):
+        self.size = size
+        self._results: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._next = 1
+
+    def put(self, df: pd.DataFrame) -> str:
+        handle = f"r{self._next}"
+        self._next += 1
+        self._results[handle] = df
+        while len(self._results) > self.size:
+            self._results.popitem(last=False)
+        return handle
+
+    def get(self, handle: str) -> pd.DataFrame:
+        if handle not in self._results:
+            raise ValueError(f"Resultado {handle} não encontrado (expirado ou inexistente)")
+        self._results.move_to_end(handle)
+        return self._results[handle]
+
+
+def format_result(
+    df: pd.DataFrame,
+    title: str = "Resultados",
+    tool_name: Optional[str] = None,
+    max_rows: int = 20,
+    offset: int = 0,
+    cache: Optional[ResultCache] = None,
+    handle: Optional[str] = None,
+    max_label_chars: int = MAX_LABEL_CHARS
+) -> str:
+    """
+    Texto de um resultado tabular para o agente.
+
+    Args:
+        df: Resultado completo
+        title: Título do cabeçalho
+        tool_name: Ferramenta (define o orçamento de tokens)
+        max_rows: Máximo de linhas mesmo dentro do orçamento
+        offset: Primeira linha enviada (paginação por fetch_more_tool)
+        cache: Onde guardar o resultado completo se sobrarem linhas (sem cache, não há handle)
+        handle: Handle já existente do resultado (páginas seguintes)
+        max_label_chars: Caracteres mantidos de cada texto
+
+    Returns:
+        Cabeçalho, linhas TSV e, se sobrarem linhas, o handle para buscar as próximas
+    """
+    if os.getenv(RESULT_FORMAT_ENV, "compact") == "table":
+        page = df.iloc[offset:offset + max_rows]
+        shown = f" ({len(page)} de {len(df)})" if len(df) > len(page) else ""
+        return f"{title}{shown}:\n{page.to_string(index=False)}"
+
+    budget_chars = token_budget(tool_name) * CHARS_PER_TOKEN
+    lines = [_header(df, title), "\t".join(str(c) for c in df.columns)]
+    used = sum(len(line) + 1 for line in lines)
+
+    end = offset
+    for row in df.iloc[offset:offset + max_rows].itertuples(index=False, name=None):
+        line = "\t".join(_cell(v, max_label_chars) for v in row)
+        # Sempre ao menos uma linha, mesmo acima do orçamento
+        if end > offset and used + len(line) + 1 > budget_chars:
+            break
+        lines.append(line)
+        used += len(line) + 1
+        end += 1
+
+    if offset:
+        lines[0] += f" (linhas {offset + 1}-{end})"
+    remaining = len(df) - end
+    if remaining > 0:
+        if cache is not None:
+            handle = handle or cache.put(df)
+            lines.append(f"[+{remaining} linhas: fetch_more_tool(handle=\"{handle}\", offset={end})]")
+        else:
+            lines.append(f"[+{remaining} linhas não exibidas]")
+    return "\n".join(lines)
+
@@ -0,0 +1,147 @@
+"""
+Amostras estratificadas das tabelas fato para o modo aproximado do DataAnalyzer.
+Cada tabela grande (a partir de APPROX_MIN_ROWS linhas) é amostrada uma vez por
+estrato (curso ou lotação x pergunta), com ao menos APPROX_MIN_PER_STRATUM linhas por
+estrato. As contagens são estimadas pelo estimador de expansão estratificado
+(peso N_h / n_h por linha); a satisfação, como estimador de razão, com variância por
+linearização. As variâncias incluem a correção de população finita, de modo que
+estratos inteiramente amostrados não contribuem com erro.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.services.query_expr import build_filter, compile_filter
+from src.services.sql_backend import response_counts, RESPONSE_COUNTS
+
+# Tabelas menores que isso são sempre calculadas de forma exata
+APPROX_MIN_ROWS = 1_000_000
+APPROX_SAMPLE_FRACTION = 0.02
+APPROX_MIN_PER_STRATUM = 5
+# Grupos com menos linhas na amostra que isso fazem a consulta voltar ao cálculo exato
+APPROX_MIN_GROUP_SAMPLE = 200
+
+# Colunas que definem os estratos de cada tabela fato (as ausentes são ignoradas)
+SAMPLE_STRATA = {
+    'FATO_AVCURSOS': ['COD_CURSO', 'ID_PERGUNTA'],
+    'FATO_AVDISCIPLINAS': ['COD_CURSO', 'ID_PERGUNTA'],
+    'FATO_AVINSTITUCIONAL': ['SIGLA_LOTACAO', 'ID_PERGUNTA'],
+}
+
+
+class StratifiedSample:
+    """
+    Amostra aleatória simples sem reposição dentro de cada estrato.
+
+    Attributes:
+        rows: Linhas amostradas (todas as colunas da tabela)
+        stratum: Estrato de cada linha amostrada
+        population: Linhas da tabela por estrato (N_h)
+        sampled: Linhas amostradas por estrato (n_h)
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        strata_columns: List[str],
+        fraction: float = APPROX_SAMPLE_FRACTION,
+        min_per_stratum: int = APPROX_MIN_PER_STRATUM,
+        seed: int = 0
+    ):
+        columns = [c for c in strata_columns if c in df.columns]
+        if columns:
+            codes = df.groupby(columns, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+        else:
+            codes = np.zeros(len(df), dtype=np.int64)
+
+        population = np.bincount(codes)
+        sampled = np.minimum(population, np.maximum(min_per_stratum, np.ceil(population * fraction).astype(np.int64)))
+
+        # Ordem aleatória dentro de cada estrato; ficam as n_h primeiras linhas de cada um
+        order = np.lexsort((np.random.default_rng(seed).random(len(codes)), codes))
+        starts = np.concatenate([[0], np.cumsum(population)[:-1]])
+        rank = np.arange(len(codes)) - starts[codes[order]]
+        chosen = np.sort(order[rank < sampled[codes[order]]])
+
+        self.rows = df.iloc[chosen].reset_index(drop=True)
+        self.stratum = codes[chosen]
+        self.population = population
+        self.sampled = sampled
+        self.table_rows = len(df)
+        self._codes: Dict[str, tuple] = {}
+
+    def _column_codes(self, column: str):
+        if column not in self._codes:
+            codes, uniques = pd.factorize(self.rows[column])
+            self._codes[column] = (codes, pd.Index(uniques))
+        return self._codes[column]
+
+    def filter_mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Máscara dos filtros estruturados sobre as linhas amostradas (None sem filtros)."""
+        if not filters:
+            return None
+        return compile_filter(
+            build_filter(filters), column_codes=self._column_codes, column_values=lambda col: self.rows[col]
+        )()
+
+    def estimate(self, keys: List[str], filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """
+        Contagens estimadas por combinação de keys, ordenadas pelas chaves.
+
+        Returns:
+            DataFrame com keys, RESPONSE_COUNTS estimadas (float), var_<contagem> de cada
+            uma, var_satisfacao (variância da razão Concordo / válidas) e amostra
+            (linhas amostradas no grupo). Sem keys, uma única linha.
+        """
+        mask = self.filter_mask(filters)
+        rows = self.rows if mask is None else self.rows[mask]
+        strata = self.stratum if mask is None else self.stratum[mask]
+
+        frame = rows[keys + ['RESPOSTA']].assign(_estrato=strata)
+        counts = response_counts(frame, keys + ['_estrato'])
+        h = counts['_estrato'].to_numpy(dtype=np.int64)
+        N = self.population[h].astype(float)
+        n = self.sampled[h].astype(float)
+        # N_h^2 (1 - n_h/N_h) / n_h / (n_h - 1): multiplica a soma de quadrados corrigida do estrato
+        factor = N * N * (1 - n / N) / n / np.maximum(n - 1, 1)
+
+        est = counts[keys].copy()
+        for col in RESPONSE_COUNTS:
+            y = counts[col].to_numpy(dtype=float)
+            est[col] = y * N / n
+            est[f'var_{col}'] = factor * (y - y * y / n)
+        est['amostra'] = counts['total']
+
+        # Resíduos da razão z = Concordo - R * válida, com R do próprio grupo
+        if keys:
+            group = est.groupby(keys, dropna=False, observed=True)
+            concordo = group['concordo'].transform('sum').to_numpy()
+            valid = concordo + group['discordo'].transform('sum').to_numpy()
+        else:
+            concordo = np.full(len(est), est['concordo'].sum())
+            valid = concordo + est['discordo'].sum()
+        ratio = np.divide(concordo, valid, out=np.zeros(len(est)), where=valid > 0)
+        c = counts['concordo'].to_numpy(dtype=float)
+        d = counts['discordo'].to_numpy(dtype=float)
+        sum_z = c * (1 - ratio) - d * ratio
+        sum_z2 = c * (1 - ratio) ** 2 + d * ratio ** 2
+        est['_var_z'] = factor * (sum_z2 - sum_z * sum_z / n)
+
+        value_cols = RESPONSE_COUNTS + [f'var_{c}' for c in RESPONSE_COUNTS] + ['amostra', '_var_z']
+        if keys:
+            result = est.groupby(keys, dropna=False, observed=True)[value_cols].sum().reset_index()
+        else:
+            result = est[value_cols].sum().to_frame().T.reset_index(drop=True)
+
+        valid = result['concordo'] + result['discordo']
+        result['var_satisfacao'] = (result['_var_z'] / (valid * valid).where(valid > 0)).fillna(0)
+        return result.drop(columns='_var_z')
+
+
+def build_sample(table_name: str, df: pd.DataFrame, fraction: Optional[float] = None) -> Optional[StratifiedSample]:
+    """Amostra estratificada da tabela, ou None se ela for pequena demais para compensar."""
+    if len(df) < APPROX_MIN_ROWS or 'RESPOSTA' not in df.columns:
+        return None
+    return StratifiedSample(df, SAMPLE_STRATA.get(table_name, ['ID_PERGUNTA']), fraction=fraction or APPROX_SAMPLE_FRACTION)
@@ -0,0 +1,247 @@
+"""
+Estado das sessões do chat e contabilidade de memória por sessão.
+O histórico de mensagens, o contexto renderizado dos dashboards e o último trace
+de cada sessão ficam em um registro do processo (st.session_state guarda só o id
+da sessão). Uma thread de fundo mede a memória de cada sessão e:
+
+- compacta sessões ociosas há mais de SESSION_IDLE_TTL segundos: mensagens antigas
+  viram um resumo, e o contexto dos dashboards e o trace são descartados (o
+  dashboard refaz o contexto na próxima execução)
+- remove sessões ociosas há mais de SESSION_EVICT_TTL segundos
+
+Os totais vão para SESSION_STATS_FILE (JSON lines) a cada varredura e para o
+painel "Sessões" (SESSION_ADMIN_PANEL=true).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+SESSION_KEY = "session_id"
+IDLE_TTL_ENV = "SESSION_IDLE_TTL"
+EVICT_TTL_ENV = "SESSION_EVICT_TTL"
+STATS_FILE_ENV = "SESSION_STATS_FILE"
+SWEEP_INTERVAL = 60.0
+# Mensagens mais recentes mantidas na íntegra ao compactar
+KEEP_RECENT_MESSAGES = 6
+SUMMARY_HEADER = "Resumo da conversa anterior:"
+SUMMARY_MAX_LINES = 30
+SUMMARY_SNIPPET_CHARS = 200
+
+
+def estimate_size(obj: Any) -> int:
+    """Bytes ocupados por obj e pelos objetos que ele contém (dict, list, tuple, set)."""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return total
+
+
+def _snippet(text: str, limit: int = SUMMARY_SNIPPET_CHARS) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit].rstrip() + "..."
+
+
+class SessionRecord:
+    """Estado de uma sessão: mensagens, contexto dos dashboards e último trace."""
+
+    def __init__(self, session_id: str, now: float):
+        self.session_id = session_id
+        self.created_at = now
+        self.last_seen = now
+        self.messages: List[Dict[str, Any]] = []
+        self.context = ""
+        self.last_trace: Optional[Dict[str, Any]] = None
+        self.compactions = 0
+
+    def size_bytes(self) -> int:
+        return estimate_size(self.messages) + estimate_size(self.context) + estimate_size(self.last_trace)
+
+    def compact(self, keep: int = KEEP_RECENT_MESSAGES) -> int:
+        """
+        Resume as mensagens anteriores às keep mais recentes em uma única mensagem
+        (cada pergunta com o início da resposta) e descarta contexto e trace.
+
+        Returns:
+            Bytes liberados
+        """
+        before = self.size_bytes()
+        split = max(0, len(self.messages) - keep)
+        old, recent = self.messages[:split], self.messages[split:]
+        if old:
+            lines = []
+            for msg in old:
+                if msg.get("summary"):
+                    lines.extend(msg["content"].splitlines()[1:])
+                elif msg["role"] == "user":
+                    lines.append(f"- Pergunta: {_snippet(msg['content'])}")
+                elif lines and lines[-1].startswith("- Pergunta:"):
+                    lines[-1] += f" | Resposta: {_snippet(msg['content'])}"
+            summary = "\n".join([SUMMARY_HEADER] + lines[-SUMMARY_MAX_LINES:])
+            # Troca no lugar: quem tem a lista em mãos vê o histórico compactado
+            self.messages[:] = [{"role": "assistant", "content": summary, "summary": True}] + recent
+        self.context = ""
+        self.last_trace = None
+        self.compactions += 1
+        return max(0, before - self.size_bytes())
+
+
+class SessionRegistry:
+    """
+    Sessões do processo, com compactação e remoção por ociosidade.
+
+    - idle_ttl: segundos sem uso até compactar (0 desativa)
+    - evict_ttl: segundos sem uso até remover (0 desativa)
+    - clock: fonte do tempo (time.time)
+    """
+
+    def __init__(
+        self,
+        idle_ttl: float = 1800.0,
+        evict_ttl: float = 4 * 3600.0,
+        stats_file: Optional[str] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.idle_ttl = idle_ttl
+        self.evict_ttl = evict_ttl
+        self.stats_file = stats_file
+        self.clock = clock
+        self._sessions: Dict[str, SessionRecord] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+
+    def get(self, session_id: str) -> SessionRecord:
+        """Registro da sessão (criado no primeiro acesso), marcado como usado agora."""
+        now = self.clock()
+        with self._lock:
+            record = self._sessions.get(session_id)
+            if record is None:
+                record = self._sessions[session_id] = SessionRecord(session_id, now)
+            record.last_seen = now
+            return record
+
+    def sweep(self) -> Dict[str, Any]:
+        """
+        Compacta e remove sessões ociosas; registra os totais em stats_file.
+
+        Returns:
+            stats() após a varredura, com as sessões compactadas e removidas e os bytes liberados
+        """
+        now = self.clock()
+        compacted, evicted, freed = [], [], 0
+        with self._lock:
+            for session_id, record in list(self._sessions.items()):
+                idle = now - record.last_seen
+                if self.evict_ttl and idle >= self.evict_ttl:
+                    freed += record.size_bytes()
+                    del self._sessions[session_id]
+                    evicted.append(session_id)
+                elif self.idle_ttl and idle >= self.idle_ttl and (record.context or record.last_trace
+                                                                   or self._compactable(record)):
+                    freed += record.compact()
+                    compacted.append(session_id)
+
+        stats = self.stats()
+        stats.update(compacted=compacted, evicted=evicted, freed_bytes=freed)
+        if self.stats_file:
+            self._export(stats)
+        return stats
+
+    @staticmethod
+    def _compactable(record: SessionRecord) -> bool:
+        messages = record.messages
+        return len(messages) > KEEP_RECENT_MESSAGES + (1 if messages and messages[0].get("summary") else 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Totais do processo e memória de cada sessão (maiores primeiro)."""
+        now = self.clock()
+        with self._lock:
+            sessions = [
+                {
+                    "session_id": r.session_id,
+                    "bytes": r.size_bytes(),
+                    "messages": len(r.messages),
+                    "context_chars": len(r.context),
+                    "idle_s": round(now - r.last_seen, 1),
+                    "compactions": r.compactions,
+                }
+                for r in self._sessions.values()
+            ]
+        sessions.sort(key=lambda s: s["bytes"], reverse=True)
+        return {
+            "timestamp": now,
+            "pid": os.getpid(),
+            "sessions": len(sessions),
+            "total_bytes": sum(s["bytes"] for s in sessions),
+            "per_session": sessions,
+        }
+
+    def _export(self, stats: Dict[str, Any]) -> None:
+        try:
+            directory = os.path.dirname(self.stats_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.stats_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(stats, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Warning: Failed to export session stats: {e}")
+
+    def start_sweeping(self, interval: float = SWEEP_INTERVAL) -> None:
+        """Inicia a thread de fundo que chama sweep a cada interval segundos."""
+        if interval <= 0 or (self._sweeper is not None and self._sweeper.is_alive()):
+            return
+
+        def _sweep():
+            while not self._stop.wait(interval):
+                self.sweep()
+
+        self._sweeper = threading.Thread(target=_sweep, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeping(self) -> None:
+        self._stop.set()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_session_registry() -> SessionRegistry:
+    """
+    SessionRegistry do processo.
+    SESSION_IDLE_TTL (padrão 1800) e SESSION_EVICT_TTL (padrão 14400) em segundos; 0 desativa.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SessionRegistry(
+                idle_ttl=float(os.getenv(IDLE_TTL_ENV, "1800")),
+                evict_ttl=float(os.getenv(EVICT_TTL_ENV, str(4 * 3600))),
+                stats_file=os.getenv(STATS_FILE_ENV),
+            )
+            _registry.start_sweeping()
+        return _registry
+
+
+def current_session() -> SessionRecord:
+    """Registro da sessão Streamlit corrente (o id fica em st.session_state)."""
+    import streamlit as st
+
+    if SESSION_KEY not in st.session_state:
+        st.session_state[SESSION_KEY] = uuid.uuid4().hex
+    return get_session_registry().get(st.session_state[SESSION_KEY])
@@ -0,0 +1,270 @@
+"""
+Plano de dados compartilhado entre réplicas do app no mesmo host.
+Um processo carregador monta o DataAnalyzer (tabelas já particionadas, perfil das
+tabelas e agregados por hierarquia) e publica tudo em arquivos .npy sob
+DATA_PLANE_DIR (por padrão em /dev/shm, isto é, na memória):
+
+    <DATA_PLANE_DIR>/<versão dos dados>/manifest.json
+    <DATA_PLANE_DIR>/<versão dos dados>/f<i>/c<j>.npy
+
+Colunas de texto são gravadas com codificação por dicionário (códigos inteiros +
+categorias no manifesto). Os workers abrem os arquivos com mmap somente-leitura e
+montam DataFrames com colunas Categorical sobre esses códigos, sem cópia: as
+páginas ficam uma única vez no page cache do host, qualquer que seja o número de
+réplicas. Dimensões são pequenas e são decodificadas para texto no worker.
+
+Carregador: python -m src.services.shared_store [pasta de dados]
+Workers: DATA_PLANE=shared
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.services.data_version import DataVersionManager, compute_data_version, WATCH_INTERVAL_ENV
+
+DATA_PLANE_ENV = "DATA_PLANE"
+DATA_PLANE_DIR_ENV = "DATA_PLANE_DIR"
+DATA_PLANE_WAIT_ENV = "DATA_PLANE_WAIT"
+MANIFEST_FILE = "manifest.json"
+# Versões mantidas na pasta do plano: workers que ainda usam a anterior continuam válidos
+KEEP_VERSIONS = 2
+POLL_INTERVAL = 0.5
+
+
+def data_plane_mode(mode: Optional[str] = None) -> str:
+    """'shared' (anexa ao plano publicado) ou 'local' (cada processo carrega os CSVs)."""
+    mode = (mode or os.getenv(DATA_PLANE_ENV, "local")).strip().lower()
+    if mode not in ("local", "shared"):
+        raise ValueError(f"Plano de dados {mode} não suportado. Use: ['local', 'shared']")
+    return mode
+
+
+def data_plane_root() -> str:
+    """Pasta do plano de dados: DATA_PLANE_DIR, ou /dev/shm (tmpfs) se existir."""
+    root = os.getenv(DATA_PLANE_DIR_ENV)
+    if root:
+        return root
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "avaliacao-ufpr")
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} não é serializável")
+
+
+def _write_frame(path: str, df: pd.DataFrame) -> Dict[str, Any]:
+    """Grava as colunas de df em path/c<j>.npy; retorna a descrição do frame para o manifesto."""
+    os.makedirs(path)
+    columns = []
+    for j, name in enumerate(df.columns):
+        series = df[name]
+        spec = {"name": name, "file": f"c{j}.npy", "categories": None}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.cat.codes.to_numpy()
+            spec["categories"] = series.cat.categories.tolist()
+        elif series.dtype == object:
+            # Categorias ordenadas: ordenar pela coluna equivale a ordenar pelo texto
+            categorical = pd.Categorical(series)
+            values = categorical.codes
+            spec["categories"] = categorical.categories.tolist()
+        else:
+            values = series.to_numpy()
+        np.save(os.path.join(path, spec["file"]), values, allow_pickle=False)
+        columns.append(spec)
+    return {"rows": len(df), "columns": columns}
+
+
+def _read_frame(path: str, spec: Dict[str, Any], decode: bool = False) -> pd.DataFrame:
+    """DataFrame sobre os arquivos de path mapeados em memória (decode=True materializa o texto)."""
+    data = {}
+    for column in spec["columns"]:
+        values = np.load(os.path.join(path, column["file"]), mmap_mode="r", allow_pickle=False)
+        if column["categories"] is not None:
+            values = pd.Categorical.from_codes(values, categories=column["categories"])
+            if decode:
+                values = np.asarray(values, dtype=object)
+        data[column["name"]] = values
+    # copy=False: cada coluna continua apontando para o seu arquivo mapeado
+    return pd.DataFrame(data, columns=[c["name"] for c in spec["columns"]], copy=False)
+
+
+class SharedTables:
+    """Estado publicado de uma versão dos dados, anexado por um worker."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+        frames = manifest["frames"]
+
+        def _frame(frame_id: str, decode: bool = False) -> pd.DataFrame:
+            return _read_frame(os.path.join(path, frame_id), frames[frame_id], decode=decode)
+
+        self.path = path
+        self.version = manifest["version"]
+        self.dataframes = {
+            name: _frame(frame_id, decode=name.startswith("DIM_"))
+            for name, frame_id in manifest["tables"].items()
+        }
+        self.partitions = {
+            table: {tuple(key): slice(start, stop) for key, start, stop in entry["ranges"]}
+            for table, entry in manifest["partitions"].items()
+        }
+        self.partition_columns = {table: entry["columns"] for table, entry in manifest["partitions"].items()}
+        self.rollup_base = {table: _frame(entry["base"]) for table, entry in manifest["rollups"].items()}
+        self.rollups = {
+            table: {level: _frame(frame_id) for level, frame_id in entry["levels"]}
+            for table, entry in manifest["rollups"].items()
+        }
+        self.table_stats = manifest["table_stats"]
+
+
+def publish(analyzer, root: Optional[str] = None, version: Optional[str] = None) -> str:
+    """
+    Publica as tabelas, partições, perfil e agregados de um DataAnalyzer carregado localmente.
+    A versão é gravada em uma pasta temporária e renomeada ao final (workers nunca veem
+    uma versão pela metade); versões além de KEEP_VERSIONS são removidas.
+
+    Returns:
+        Pasta da versão publicada
+    """
+    root = root or data_plane_root()
+    version = version or compute_data_version(analyzer.data_dir)
+    target = os.path.join(root, version)
+    if os.path.exists(os.path.join(target, MANIFEST_FILE)):
+        return target
+
+    os.makedirs(root, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{version}-", dir=root)
+    frames: Dict[str, Dict[str, Any]] = {}
+
+    def _add(df: pd.DataFrame) -> str:
+        frame_id = f"f{len(frames)}"
+        frames[frame_id] = _write_frame(os.path.join(staging, frame_id), df)
+        return frame_id
+
+    try:
+        tables = {name: _add(df) for name, df in analyzer.dataframes.items()}
+        rollups = {}
+        for table in analyzer.dataframes:
+            levels = analyzer._build_rollups(table)
+            if levels is not None:
+                rollups[table] = {
+                    "base": _add(analyzer._rollup_base[table]),
+                    "levels": [[level, _add(df)] for level, df in levels.items()],
+                }
+        manifest = {
+            "version": version,
+            "published_at": time.time(),
+            "frames": frames,
+            "tables": tables,
+            "partitions": {
+                table: {
+                    "columns": analyzer._partition_columns.get(table, []),
+                    "ranges": [[list(key), r.start, r.stop] for key, r in ranges.items()],
+                }
+                for table, ranges in analyzer._partitions.items()
+            },
+            "rollups": rollups,
+            "table_stats": analyzer.table_stats,
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, default=_json_default)
+        os.rename(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _remove_old_versions(root)
+    return target
+
+
+def _remove_old_versions(root: str, keep: int = KEEP_VERSIONS) -> None:
+    """Remove as versões mais antigas; no Linux, workers que ainda as mapeiam não são afetados."""
+    versions = [
+        os.path.join(root, name) for name in os.listdir(root)
+        if not name.startswith(".") and os.path.exists(os.path.join(root, name, MANIFEST_FILE))
+    ]
+    versions.sort(key=lambda path: (os.stat(os.path.join(path, MANIFEST_FILE)).st_mtime_ns, path), reverse=True)
+    for path in versions[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+# Versões já anexadas neste processo: {(raiz, versão): SharedTables}, compartilhadas
+# entre o DataAnalyzer e o dashboard
+_attached: Dict[tuple, SharedTables] = {}
+_attached_lock = threading.Lock()
+
+
+def attach(data_dir: str = "data", root: Optional[str] = None, timeout: Optional[float] = None,
+           version: Optional[str] = None) -> Optional[SharedTables]:
+    """
+    Anexa à versão publicada que corresponde aos arquivos atuais de data_dir.
+    Espera até timeout segundos (DATA_PLANE_WAIT, padrão 60) pelo carregador.
+    Com version informada (ex: get_data_version()), não percorre data_dir; as
+    versões já anexadas ficam em cache e são devolvidas sem novo acesso a disco.
+
+    Returns:
+        SharedTables ou None se a versão não foi publicada a tempo
+    """
+    root = root or data_plane_root()
+    version = version or compute_data_version(data_dir)
+    key = (root, version)
+    if key in _attached:
+        return _attached[key]
+
+    if timeout is None:
+        timeout = float(os.getenv(DATA_PLANE_WAIT_ENV, "60"))
+    path = os.path.join(root, version)
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        if time.monotonic() >= deadline:
+            print(f"Warning: Versão {version} não publicada em {root}; carregando os dados localmente")
+            return None
+        time.sleep(POLL_INTERVAL)
+
+    with _attached_lock:
+        if key not in _attached:
+            _attached[key] = SharedTables(path)
+            while len(_attached) > KEEP_VERSIONS:
+                del _attached[next(iter(_attached))]
+        return _attached[key]
+
+
+def main(data_dir: str = "data") -> None:
+    """Processo carregador: publica a versão corrente e republica quando data/ muda."""
+    from src.services.data_tools import DataAnalyzer
+
+    root = data_plane_root()
+
+    def _publish(path: str) -> str:
+        published = publish(DataAnalyzer(data_dir=path, data_plane="local"), root)
+        print(f"Plano de dados publicado em {published}")
+        return published
+
+    manager = DataVersionManager(
+        data_dir,
+        builders={"plane": _publish},
+        watch_interval=float(os.getenv(WATCH_INTERVAL_ENV, "30")),
+    )
+    manager.current()
+    manager.start_watching()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        manager.stop_watching()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "data")
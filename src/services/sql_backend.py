@@ -0,0 +1,254 @@
+"""
+Backends de execução do DataAnalyzer.
+As métricas do DataAnalyzer são derivadas de contagens de respostas por grupo
+(Concordo, Discordo, Desconheço e total). O backend é quem calcula essas contagens:
+
+- PandasBackend: poda de partições + máscaras por dicionário sobre os DataFrames (padrão)
+- DuckDBBackend: SQL vetorizado e paralelo no DuckDB embutido, sobre cópias colunares
+  das mesmas tabelas (pacote duckdb, dependência do projeto)
+
+O DuckDBBackend também executa consultas SQL somente-leitura (uma única instrução
+SELECT, apenas sobre as tabelas do TABLES_SCHEMA) para a ferramenta SQL do agente.
+
+Escolha com DATA_BACKEND=pandas|duckdb.
+"""
+
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.services.query_expr import build_filter, validate_filter, BoolExpr
+from src.services.table_metadata import TABLES_SCHEMA, VALID_VALUES
+from src.services.tracing import annotate
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+BACKEND_ENV = "DATA_BACKEND"
+DEFAULT_BACKEND = "pandas"
+RESPONSE_COUNTS = ['concordo', 'discordo', 'desconheco', 'total']
+SQL_MAX_ROWS = 100
+# Memória do DuckDB antes de despejar em disco (out-of-core), ex: "2GB"
+DUCKDB_MEMORY_LIMIT_ENV = "DUCKDB_MEMORY_LIMIT"
+
+_SQL_FORBIDDEN = re.compile(
+    r"\b(insert|update|delete|create|drop|alter|attach|detach|copy|export|import|install|load|"
+    r"pragma|set|reset|call|checkpoint|vacuum|truncate)\b",
+    re.IGNORECASE,
+)
+_CTE_NAME = re.compile(r"(?:\bwith\b|,)\s*(?:recursive\s+)?\"?(\w+)\"?\s+as\s*\(", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+
+def response_counts(df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+    """
+    Contagens de Concordo/Discordo/Desconheço e total por combinação de keys, ordenadas
+    pelas chaves, em uma única passada (RESPOSTA como colunas). Sem keys, uma linha.
+    """
+    if keys and df.empty:
+        return pd.DataFrame(columns=keys + RESPONSE_COUNTS).astype({c: int for c in RESPONSE_COUNTS})
+    if keys:
+        pivot = df.groupby(keys + ['RESPOSTA'], dropna=False, observed=True).size().unstack('RESPOSTA', fill_value=0)
+    else:
+        pivot = df['RESPOSTA'].value_counts().to_frame().T
+    
+    # Total antes do reindex: respostas em branco ou fora de VALID_VALUES também entram
+    # no denominador (ex: gap_desconhecimento_% sobre todas as respostas do grupo)
+    total = pivot.sum(axis=1)
+    # RESPOSTA categórica (plano de dados compartilhado): colunas como texto antes do reindex
+    pivot.columns = pivot.columns.astype(object)
+    pivot = pivot.reindex(columns=VALID_VALUES['RESPOSTA'], fill_value=0)
+    counts = pd.DataFrame({
+        'concordo': pivot['Concordo'],
+        'discordo': pivot['Discordo'],
+        'desconheco': pivot['Desconheço'],
+        'total': total
+    })
+    return counts.reset_index() if keys else counts.reset_index(drop=True)
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class PandasBackend:
+    """Contagens com pandas sobre os DataFrames carregados, com poda por partição."""
+
+    name = "pandas"
+    supports_sql = False
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+
+    def response_counts(self, table_name: str, keys: List[str], filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        analyzer = self.analyzer
+        df, rows = analyzer._prune(table_name, filters)
+        annotate(rows_scanned=len(df))
+        if filters:
+            df = df[analyzer._filter_mask(table_name, filters, df=df, rows=rows)]
+        return response_counts(df[keys + ['RESPOSTA']], keys)
+
+
+class DuckDBBackend:
+    """
+    Contagens e SQL ad-hoc no DuckDB embutido.
+
+    As tabelas são copiadas uma vez para tabelas nativas do DuckDB (colunares, com
+    compressão por dicionário); depois disso o acesso a arquivos externos é desligado
+    e a configuração é travada, de modo que o SQL do agente só enxerga essas tabelas.
+    """
+
+    name = "duckdb"
+    supports_sql = True
+
+    def __init__(self, analyzer):
+        if duckdb is None:
+            raise ValueError("Backend duckdb requer o pacote duckdb (uv add duckdb)")
+
+        self.analyzer = analyzer
+        self._lock = threading.Lock()
+        self._con = duckdb.connect(database=":memory:")
+        memory_limit = os.getenv(DUCKDB_MEMORY_LIMIT_ENV)
+        if memory_limit:
+            self._con.execute(f"SET memory_limit = '{memory_limit}'")
+
+        for table_name, df in analyzer.dataframes.items():
+            self._con.register("_df", df)
+            self._con.execute(f"CREATE TABLE {_quote(table_name)} AS SELECT * FROM _df")
+            self._con.unregister("_df")
+
+        self._con.execute("SET enable_external_access = false")
+        self._con.execute("SET lock_configuration = true")
+
+    def _cursor(self):
+        # Cada chamada usa seu próprio cursor: a conexão não é compartilhada entre threads
+        with self._lock:
+            return self._con.cursor()
+
+    def response_counts(self, table_name: str, keys: List[str], filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        where, params = "", []
+        if filters:
+            expr = build_filter(filters)
+            validate_filter(expr, table_name, self.analyzer.dataframes[table_name].columns)
+            where_sql, params = filter_to_sql(expr)
+            where = f" WHERE {where_sql}"
+
+        key_sql = ", ".join(_quote(k) for k in keys)
+        select_keys = f"{key_sql}, " if keys else ""
+        group = f" GROUP BY {key_sql} ORDER BY {key_sql}" if keys else ""
+        sql = (
+            f"SELECT {select_keys}"
+            "CAST(COUNT(*) FILTER (WHERE RESPOSTA = 'Concordo') AS BIGINT) AS concordo, "
+            "CAST(COUNT(*) FILTER (WHERE RESPOSTA = 'Discordo') AS BIGINT) AS discordo, "
+            "CAST(COUNT(*) FILTER (WHERE RESPOSTA = 'Desconheço') AS BIGINT) AS desconheco, "
+            "CAST(COUNT(*) AS BIGINT) AS total "
+            f"FROM {_quote(table_name)}{where}{group}"
+        )
+        annotate(rows_scanned=len(self.analyzer.dataframes[table_name]))
+        return self._cursor().execute(sql, params).df()
+
+    def validate_sql(self, sql: str) -> str:
+        """
+        Confere que a consulta é uma única instrução SELECT (ou WITH ... SELECT) sobre
+        tabelas do TABLES_SCHEMA.
+
+        Returns:
+            A consulta sem o ';' final
+
+        Raises:
+            ValueError: consulta vazia, com mais de uma instrução, que não seja leitura,
+                que acesse arquivos ou que referencie tabelas desconhecidas
+        """
+        sql = sql.strip().rstrip(";").strip()
+        if not sql:
+            raise ValueError("Consulta SQL vazia")
+
+        # Palavras-chave dentro de literais de texto (ex: 'Set de Artes') não contam
+        code = _STRING_LITERAL.sub("''", sql)
+        if ";" in code:
+            raise ValueError("Apenas uma instrução SQL por consulta")
+        if not re.match(r"^\s*(select|with)\b", code, re.IGNORECASE):
+            raise ValueError("Apenas consultas SELECT são permitidas")
+        forbidden = _SQL_FORBIDDEN.search(code)
+        if forbidden:
+            raise ValueError(f"Comando '{forbidden.group(1).upper()}' não permitido: a consulta é somente leitura")
+
+        cursor = self._cursor()
+        try:
+            statements = cursor.extract_statements(sql)
+            if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+                raise ValueError("Apenas consultas SELECT são permitidas")
+            # Funções de arquivo (read_csv, glob, ...) falham aqui com PermissionException
+            referenced = cursor.get_table_names(sql)
+        except duckdb.Error as e:
+            raise ValueError(f"Consulta SQL não permitida: {e}")
+
+        cte_names = {name.upper() for name in _CTE_NAME.findall(code)}
+        allowed = {name.upper() for name in TABLES_SCHEMA if name in self.analyzer.dataframes}
+        unknown = [t for t in referenced if t.upper() not in allowed | cte_names]
+        if unknown:
+            raise ValueError(f"Tabela(s) {sorted(unknown)} não disponíveis. Use: {sorted(allowed)}")
+        return sql
+
+    def run_sql(self, sql: str, limit: int = SQL_MAX_ROWS) -> pd.DataFrame:
+        """Executa uma consulta somente-leitura validada, com no máximo limit linhas."""
+        sql = self.validate_sql(sql)
+        limit = max(1, min(int(limit), SQL_MAX_ROWS))
+        try:
+            return self._cursor().execute(f"SELECT * FROM ({sql}) AS consulta LIMIT {limit}").df()
+        except duckdb.Error as e:
+            raise ValueError(f"Erro na consulta SQL: {e}")
+
+
+def filter_to_sql(expr: Any) -> Tuple[str, List[Any]]:
+    """
+    Traduz a árvore de build_filter/parse_filter para uma cláusula WHERE parametrizada,
+    com a mesma semântica de compile_filter (valores comparados como texto; intervalos
+    com número convertem a coluna para numérico).
+    """
+    if isinstance(expr, BoolExpr):
+        parts = [filter_to_sql(o) for o in expr.operands]
+        params = [p for _, part_params in parts for p in part_params]
+        if expr.op == "not":
+            return f"(NOT {parts[0][0]})", params
+        return "(" + f" {expr.op.upper()} ".join(sql for sql, _ in parts) + ")", params
+
+    column, op, value = _quote(expr.column), expr.op, expr.value
+
+    if op == "prefix":
+        return f"starts_with({column}, ?)", [str(value)]
+
+    if op in ("==", "!=", "in", "not in"):
+        values = [str(v) for v in (value if isinstance(value, list) else [value])]
+        if not values:
+            return ("TRUE" if op in ("!=", "not in") else "FALSE"), []
+        placeholders = ", ".join("?" for _ in values)
+        negate = "NOT " if op in ("!=", "not in") else ""
+        return f"({column} {negate}IN ({placeholders}))", values
+
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # Linhas não numéricas ficam de fora (NULL na comparação), como em compile_filter
+        return f"(TRY_CAST({column} AS DOUBLE) {op} ?)", [value]
+    return f"({column} {op} ?)", [value]
+
+
+def create_backend(name: Optional[str], analyzer):
+    """
+    Backend pelo nome (None = variável DATA_BACKEND, padrão pandas).
+    Se o DuckDB não estiver disponível, usa o backend pandas.
+    """
+    name = (name or os.getenv(BACKEND_ENV) or DEFAULT_BACKEND).lower()
+    if name == "duckdb":
+        try:
+            return DuckDBBackend(analyzer)
+        except Exception as e:
+            print(f"Warning: backend duckdb indisponível ({e}); usando pandas")
+            return PandasBackend(analyzer)
+    if name != "pandas":
+        raise ValueError(f"Backend '{name}' não suportado. Use: pandas, duckdb")
+    return PandasBackend(analyzer)
@@ -2,8 +2,15 @@
 Metadados das tabelas do sistema de avaliação UFPR.
 Este módulo define o schema e relacionamentos entre tabelas para ajudar o LLM
 a entender a estrutura dos dados e fazer queries corretas.
+
+Os row_count_approx são apenas ordens de grandeza; com o perfil calculado na carga
+(DataAnalyzer.table_stats) o texto de schema usa as contagens reais.
 """
 
+from typing import Any, Dict, Optional
+
+from src.services.table_stats import describe_column
+
 TABLES_SCHEMA = {
     "FATO_AVCURSOS": {
         "description": "Respostas da avaliação de cursos (dados factuais de cada resposta)",
@@ -152,12 +159,22 @@ COMMON_METRICS = {
     }
 }
 
-def get_table_info(table_name: str) -> str:
+def _row_count_text(table_name: str, stats: Optional[Dict[str, Any]]) -> str:
+    profile = (stats or {}).get(table_name)
+    if profile:
+        return f"{profile['rows']:,} linhas"
+    return f"~{TABLES_SCHEMA[table_name]['row_count_approx']:,} linhas"
+
+
+def get_table_info(table_name: str, stats: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
     """
     Retorna informações formatadas sobre uma tabela.
     
     Args:
         table_name: Nome da tabela
+        stats: Perfil das tabelas carregadas (DataAnalyzer.table_stats); com ele, o texto
+            traz as linhas reais, a cardinalidade e os valores mais comuns de cada coluna,
+            além das colunas presentes nos dados e ausentes do schema
         
     Returns:
         String formatada com schema da tabela
@@ -169,12 +186,23 @@ def get_table_info(table_name: str) -> str:
     schema = TABLES_SCHEMA[table_name]
     info = f"**{table_name}**\n"
     info += f"Descrição: {schema['description']}\n"
-    info += f"Aproximadamente {schema['row_count_approx']:,} linhas\n\n"
+    profile = (stats or {}).get(table_name)
+    if profile:
+        info += f"{profile['rows']:,} linhas\n\n"
+    else:
+        info += f"Aproximadamente {schema['row_count_approx']:,} linhas\n\n"
     info += "**Colunas:**\n"
     
+    profiled = profile['columns'] if profile else {}
     for col, desc in schema['columns'].items():
+        if col in profiled:
+            desc += f" [{describe_column(profiled[col], profile['rows'])}]"
         info += f"  - {col}: {desc}\n"
     
+    extra = [col for col in profiled if col not in schema['columns']]
+    for col in extra:
+        info += f"  - {col}: (coluna dos dados) [{describe_column(profiled[col], profile['rows'])}]\n"
+    
     if 'relationships' in schema:
         info += "\n**Relacionamentos:**\n"
         for related_table, (fk, pk) in schema['relationships'].items():
@@ -182,19 +210,19 @@ def get_table_info(table_name: str) -> str:
     
     return info
 
-def get_all_tables_summary() -> str:
-    """Retorna resumo de todas as tabelas disponíveis."""
+def get_all_tables_summary(stats: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """Retorna resumo de todas as tabelas disponíveis (linhas reais se stats for informado)."""
     summary = "**Tabelas Disponíveis no Sistema de Avaliação UFPR:**\n\n"
     
     summary += "**Tabelas Fato (Respostas):**\n"
     for table in ["FATO_AVCURSOS", "FATO_AVDISCIPLINAS", "FATO_AVINSTITUCIONAL"]:
         schema = TABLES_SCHEMA[table]
-        summary += f"  - {table}: {schema['description']} (~{schema['row_count_approx']:,} linhas)\n"
+        summary += f"  - {table}: {schema['description']} ({_row_count_text(table, stats)})\n"
     
     summary += "\n**Tabelas Dimensão (Metadados):**\n"
     for table in ["DIM_PERGUNTAS", "DIM_CURSOS", "DIM_DISCIPLINAS", "DIM_UNIDADES", "DIM_TIPO_PERGUNTA_SINAES"]:
         schema = TABLES_SCHEMA[table]
-        summary += f"  - {table}: {schema['description']} (~{schema['row_count_approx']:,} linhas)\n"
+        summary += f"  - {table}: {schema['description']} ({_row_count_text(table, stats)})\n"
     
     summary += "\n**Métricas Comuns:**\n"
     for metric, info in COMMON_METRICS.items():
@@ -0,0 +1,96 @@
+"""
+Perfil das tabelas carregadas: número real de linhas, cardinalidade e valores
+mais frequentes de cada coluna.
+Calculado na carga do DataAnalyzer; alimenta o texto de schema que o agente vê
+(table_metadata) e as estimativas de seletividade do planejador de consultas.
+Tabelas grandes são perfiladas por amostra: frequências são escaladas para o
+total de linhas e a cardinalidade é estimada pelo estimador GEE.
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Acima disso, o perfil é feito sobre uma amostra uniforme de PROFILE_SAMPLE_ROWS linhas
+PROFILE_SAMPLE_ROWS = 200_000
+TOP_VALUES = 20
+
+
+def _estimate_cardinality(counts: pd.Series, sample_rows: int, total_rows: int) -> int:
+    """
+    Estimador GEE (Charikar et al., 2000) de valores distintos a partir da amostra:
+    sqrt(N/n) * (valores vistos uma vez) + (valores vistos mais de uma vez).
+    """
+    singletons = int((counts == 1).sum())
+    repeated = int((counts > 1).sum())
+    estimate = np.sqrt(total_rows / sample_rows) * singletons + repeated
+    return int(min(total_rows, round(estimate)))
+
+
+def profile_table(df: pd.DataFrame, sample_rows: int = PROFILE_SAMPLE_ROWS, seed: int = 0) -> Dict[str, Any]:
+    """
+    Perfil de uma tabela.
+
+    Returns:
+        {'rows': linhas, 'sampled': bool,
+         'columns': {coluna: {'cardinality': int, 'top_values': {valor: linhas estimadas}}}}
+    """
+    total_rows = len(df)
+    sampled = total_rows > sample_rows
+    if sampled:
+        positions = np.sort(np.random.default_rng(seed).choice(total_rows, size=sample_rows, replace=False))
+        sample = df.iloc[positions]
+    else:
+        sample = df
+    scale = total_rows / len(sample) if len(sample) else 0
+
+    columns = {}
+    for col in df.columns:
+        counts = sample[col].value_counts()
+        cardinality = _estimate_cardinality(counts, len(sample), total_rows) if sampled else len(counts)
+        top = counts.head(TOP_VALUES)
+        columns[col] = {
+            'cardinality': max(cardinality, len(counts)),
+            'top_values': {str(v): int(round(c * scale)) for v, c in top.items()},
+        }
+
+    return {'rows': total_rows, 'sampled': sampled, 'columns': columns}
+
+
+def profile_tables(dataframes: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, Any]]:
+    """Perfil de todas as tabelas carregadas."""
+    return {name: profile_table(df) for name, df in dataframes.items()}
+
+
+def estimate_matches(table_stats: Optional[Dict[str, Any]], column: str, values) -> Optional[float]:
+    """
+    Linhas estimadas com column em values: frequência registrada no perfil, ou
+    linhas / cardinalidade para valores fora dos mais frequentes.
+    None se não houver perfil da coluna.
+    """
+    col_stats = (table_stats or {}).get('columns', {}).get(column)
+    if col_stats is None:
+        return None
+
+    top = col_stats['top_values']
+    rows = table_stats['rows']
+    # Valores fora do top: no máximo a menor frequência listada (zero se o top lista todos)
+    listed_min = min(top.values()) if top else rows
+    unlisted = min(listed_min, rows / max(col_stats['cardinality'], 1))
+    if len(top) >= col_stats['cardinality']:
+        unlisted = 0
+    return float(sum(top.get(str(v), unlisted) for v in values))
+
+
+def describe_column(col_stats: Dict[str, Any], total_rows: int, max_values: int = 5) -> str:
+    """
+    Resumo de uma coluna para o texto de schema: cardinalidade e, para colunas que
+    não são identificadores (até 1.000 valores distintos), os valores mais comuns.
+    """
+    text = f"{col_stats['cardinality']:,} valores distintos"
+    top = list(col_stats['top_values'].items())[:max_values]
+    if top and total_rows and col_stats['cardinality'] <= 1000:
+        shown = ", ".join(f"'{v}' ({c / total_rows:.0%})" for v, c in top)
+        text += f"; mais comuns: {shown}"
+    return text
@@ -0,0 +1,314 @@
+"""
+Instrumentação dos turnos do chat.
+Registra spans estruturados para cada turno (iterações ReAct, chamadas de
+ferramentas, embeddings, troca de chave após 429) e exporta o resultado em JSON lines.
+"""
+
+import contextvars
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+TRACE_FILE_ENV = "CHAT_TRACE_FILE"
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+_llama_handler_registered = False
+
+
+class TurnTrace:
+    """
+    Trace de um turno do chat (uma pergunta do usuário).
+    Cada span é um dicionário simples para facilitar a exportação em JSON.
+    """
+
+    def __init__(self, question: str = ""):
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.question = question
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.spans: List[Dict[str, Any]] = []
+        self.status = "ok"
+        self._open_llm_spans: Dict[str, Dict[str, Any]] = {}
+        self._open_embedding_spans: Dict[str, Dict[str, Any]] = {}
+        self._llm_calls = 0
+
+    def _elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self._t0) * 1000, 2)
+
+    def start_span(self, kind: str, name: str, parent: Optional[Dict[str, Any]] = None, **attrs) -> Dict[str, Any]:
+        """
+        Abre um span.
+
+        Args:
+            kind: Categoria do span ('llm', 'tool', 'embedding', 'retry', ...)
+            name: Nome do span (ex: nome da ferramenta)
+            parent: Span pai (opcional)
+            **attrs: Atributos adicionais
+
+        Returns:
+            Dicionário do span (fechar com end_span)
+        """
+        span = {
+            "span_id": uuid.uuid4().hex[:8],
+            "parent_id": parent["span_id"] if parent else None,
+            "kind": kind,
+            "name": name,
+            "start_ms": self._elapsed_ms(),
+            "duration_ms": None,
+            "attrs": dict(attrs),
+        }
+        self.spans.append(span)
+        return span
+
+    def end_span(self, span: Dict[str, Any], **attrs) -> None:
+        """Fecha um span e registra sua duração."""
+        span["duration_ms"] = round(self._elapsed_ms() - span["start_ms"], 2)
+        span["attrs"].update(attrs)
+
+    def finish(self, status: str = "ok") -> None:
+        """Finaliza o turno."""
+        self.status = status
+        self.duration_ms = self._elapsed_ms()
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Resume o turno por categoria de span.
+
+        Returns:
+            Dicionário com duração total, contagem/tempo por categoria e tokens
+        """
+        by_kind: Dict[str, Dict[str, Any]] = {}
+        for span in self.spans:
+            entry = by_kind.setdefault(span["kind"], {"count": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + (span["duration_ms"] or 0.0), 2)
+
+        llm_spans = [s for s in self.spans if s["kind"] == "llm"]
+        tool_spans = [s for s in self.spans if s["kind"] == "tool"]
+
+        return {
+            "trace_id": self.trace_id,
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+            "react_iterations": len(llm_spans),
+            "prompt_tokens": sum(s["attrs"].get("prompt_tokens") or 0 for s in llm_spans),
+            "completion_tokens": sum(s["attrs"].get("completion_tokens") or 0 for s in llm_spans),
+            "cached_tokens": sum(s["attrs"].get("cached_tokens") or 0 for s in llm_spans),
+            "rows_scanned": sum(s["attrs"].get("rows_scanned") or 0 for s in tool_spans),
+            "cache_hits": sum(s["attrs"].get("cache_hits") or 0 for s in self.spans),
+            "by_kind": by_kind,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "question": self.question,
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+            "summary": self.summary(),
+            "spans": self.spans,
+        }
+
+
+def current_trace() -> Optional[TurnTrace]:
+    """Retorna o trace do turno em andamento (ou None)."""
+    return _current_trace.get()
+
+
+def start_turn(question: str = "") -> TurnTrace:
+    """Inicia um novo trace e o torna o trace corrente."""
+    _register_llama_handler()
+    trace = TurnTrace(question)
+    _current_trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+
+def finish_turn(trace: TurnTrace, status: str = "ok") -> TurnTrace:
+    """
+    Finaliza o trace e exporta para JSON lines se CHAT_TRACE_FILE estiver definido.
+    """
+    trace.finish(status)
+    path = os.getenv(TRACE_FILE_ENV)
+    if path:
+        export_jsonl(trace, path)
+    if _current_trace.get() is trace:
+        _current_trace.set(None)
+        _current_span.set(None)
+    return trace
+
+
+def export_jsonl(trace: TurnTrace, path: str) -> None:
+    """Acrescenta o trace como uma linha JSON no arquivo indicado."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(trace.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs):
+    """
+    Context manager que registra um span no trace corrente.
+    Sem trace ativo, não faz nada (retorna None).
+
+    Example:
+        >>> with span("tool", "calculate_satisfaction_tool", arguments={}):
+        ...     ...
+    """
+    trace = current_trace()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    current = trace.start_span(kind, name, parent=parent, **attrs)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current["attrs"]["error"] = str(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.end_span(current)
+
+
+def record_event(kind: str, name: str, **attrs) -> None:
+    """Registra um evento pontual (span de duração zero) no trace corrente."""
+    trace = current_trace()
+    if trace is None:
+        return
+    event = trace.start_span(kind, name, parent=_current_span.get(), **attrs)
+    trace.end_span(event)
+
+
+def annotate(**counters) -> None:
+    """
+    Soma contadores ao span aberto mais interno (ex: rows_scanned, cache_hits).
+    Chamado pelo DataAnalyzer; sem trace ativo não faz nada.
+    """
+    current = _current_span.get()
+    if current is None:
+        return
+    for key, value in counters.items():
+        current["attrs"][key] = current["attrs"].get(key, 0) + value
+
+
+def traced_tool(fn: Callable) -> Callable:
+    """
+    Decorador para ferramentas do agente: registra nome, argumentos,
+    duração e tamanho da saída. Preserva assinatura e docstring para o FunctionTool.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        arguments = {k: v for k, v in kwargs.items()}
+        if args:
+            arguments["_args"] = list(args)
+        with span("tool", fn.__name__, arguments=arguments) as current:
+            result = fn(*args, **kwargs)
+            if current is not None:
+                current["attrs"]["output_chars"] = len(str(result))
+            return result
+
+    return wrapper
+
+
+def _message_chars(messages) -> int:
+    total = 0
+    for message in messages or []:
+        total += len(str(getattr(message, "content", "") or ""))
+    return total
+
+
+def _usage_from_response(response) -> Dict[str, Optional[int]]:
+    """Extrai contagem de tokens do payload bruto do Gemini, quando disponível."""
+    raw = getattr(response, "raw", None) or {}
+    if not isinstance(raw, dict):
+        raw = getattr(raw, "__dict__", {}) or {}
+    usage = raw.get("usage_metadata") or {}
+    if not isinstance(usage, dict):
+        usage = getattr(usage, "__dict__", {}) or {}
+    return {
+        "prompt_tokens": usage.get("prompt_token_count"),
+        "completion_tokens": usage.get("candidates_token_count"),
+        "cached_tokens": usage.get("cached_content_token_count"),
+    }
+
+
+def _register_llama_handler() -> None:
+    """Registra (uma única vez) o handler de eventos do LlamaIndex."""
+    global _llama_handler_registered
+    if _llama_handler_registered:
+        return
+    try:
+        from llama_index.core.instrumentation import get_dispatcher
+        get_dispatcher().add_event_handler(_build_llama_handler())
+        _llama_handler_registered = True
+    except ImportError:
+        pass
+
+
+def _build_llama_handler():
+    from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+    from llama_index.core.instrumentation.events.llm import (
+        LLMChatStartEvent, LLMChatEndEvent,
+        LLMCompletionStartEvent, LLMCompletionEndEvent,
+    )
+    from llama_index.core.instrumentation.events.embedding import EmbeddingStartEvent, EmbeddingEndEvent
+
+    class LLMTraceHandler(BaseEventHandler):
+        """Converte eventos de LLM/embedding do LlamaIndex em spans do trace corrente."""
+
+        @classmethod
+        def class_name(cls) -> str:
+            return "LLMTraceHandler"
+
+        def handle(self, event, **kwargs) -> Any:
+            trace = current_trace()
+            if trace is None:
+                return
+            key = str(event.span_id)
+
+            if isinstance(event, (LLMChatStartEvent, LLMCompletionStartEvent)):
+                if trace._open_llm_spans:
+                    # chamada aninhada (ex: chat -> complete) da mesma iteração
+                    return
+                trace._llm_calls += 1
+                prompt_chars = (
+                    _message_chars(event.messages)
+                    if isinstance(event, LLMChatStartEvent) else len(event.prompt or "")
+                )
+                trace._open_llm_spans[key] = trace.start_span(
+                    "llm", f"react_iteration_{trace._llm_calls}",
+                    parent=_current_span.get(),
+                    iteration=trace._llm_calls,
+                    prompt_chars=prompt_chars,
+                )
+            elif isinstance(event, (LLMChatEndEvent, LLMCompletionEndEvent)):
+                current = trace._open_llm_spans.pop(key, None)
+                if current is None:
+                    return
+                response = event.response
+                text = str(getattr(getattr(response, "message", None), "content", None) or getattr(response, "text", "") or "")
+                usage = _usage_from_response(response) if response is not None else {}
+                trace.end_span(current, completion_chars=len(text), **usage)
+            elif isinstance(event, EmbeddingStartEvent):
+                trace._open_embedding_spans[key] = trace.start_span(
+                    "embedding", "embed", parent=_current_span.get()
+                )
+            elif isinstance(event, EmbeddingEndEvent):
+                current = trace._open_embedding_spans.pop(key, None)
+                if current is not None:
+                    trace.end_span(current, chunks=len(event.chunks or []))
+
+    return LLMTraceHandler()
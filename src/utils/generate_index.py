@@ -1,7 +1,8 @@
 import os
 import shutil
 import time
-import pandas as pd
+from src.services.csv_loader import load_csv
+from src.services.question_index import load_question_index
 from dotenv import load_dotenv
 from llama_index.core import Document, VectorStoreIndex, Settings, StorageContext
 from llama_index.llms.google_genai import GoogleGenAI
@@ -53,15 +54,7 @@ def generate_index_terminal():
         print(f"   Processing {file} ({i+1}/{len(files)})...")
         try:
             if file.endswith('.csv'):
-                try:
-                    df = pd.read_csv(file_path, sep=None, engine='python', dtype=str)
-                except:
-                    df = pd.read_csv(file_path, sep=';', dtype=str)
-            
-                df.columns = df.columns.str.replace('\ufeff', '').str.strip()
-                
-                df = df.fillna("")
-                df = df.astype(str)
+                df = load_csv(file_path)
 
                 text = df.to_csv(index=False)
                 file_docs = [Document(text=text, metadata={"filename": file})]
@@ -91,6 +84,11 @@ def generate_index_terminal():
     print("Persisting index to storage...")
     index.storage_context.persist(persist_dir=STORAGE_DIR)
     
+    questions_path = os.path.join(DATA_DIR, "DIM_PERGUNTAS.csv")
+    if os.path.exists(questions_path):
+        print("Building question search index...")
+        load_question_index(load_csv(questions_path), STORAGE_DIR)
+    
     print("Index generation complete! Storage saved to ./storage")
 
 if __name__ == "__main__":
@@ -1,5 +1,9 @@
 import os
 import base64
+import random
+import threading
+import time
+from contextlib import contextmanager
 
 def get_decrypted_key(env_var_name="APP_SECRET_TOKEN", fallback_env_var_name="GOOGLE_API_KEY"):
     """
@@ -18,3 +22,249 @@ def get_decrypted_key(env_var_name="APP_SECRET_TOKEN", fallback_env_var_name="GO
         return decoded_bytes.decode('utf-8')
     except Exception:
         return token
+
+
+def load_api_keys(max_keys=20):
+    """
+    Collects every configured API key, in order:
+    APP_SECRET_TOKEN / GOOGLE_API_KEY, then APP_SECRET_TOKEN_2 / GOOGLE_API_KEY_2, ...
+    Duplicates are dropped.
+    """
+    keys = []
+    for i in range(1, max_keys + 1):
+        suffix = "" if i == 1 else f"_{i}"
+        key = get_decrypted_key(f"APP_SECRET_TOKEN{suffix}", f"GOOGLE_API_KEY{suffix}")
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def is_rate_limit_error(exc):
+    """True when the exception looks like an HTTP 429 / quota error."""
+    for attr in ("code", "status_code", "status"):
+        if getattr(exc, attr, None) == 429:
+            return True
+    message = str(exc)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message or "rate limit" in message.lower()
+
+
+def mask_key(key):
+    """Short, non-secret identifier for logs and traces."""
+    return f"...{key[-4:]}" if key and len(key) > 4 else "..."
+
+
+class KeyPool:
+    """
+    Pool of API keys shared by the LLM and embedding clients.
+
+    - Selection: 'round_robin' or 'least_loaded' (fewest in-flight requests)
+    - Per-key token bucket (requests_per_minute, burst)
+    - Exponential backoff with jitter for a key after a 429
+    """
+
+    def __init__(self, keys, strategy="round_robin", requests_per_minute=60, burst=None,
+                 base_backoff=1.0, max_backoff=60.0, max_attempts=None):
+        if not keys:
+            raise ValueError("KeyPool requires at least one API key")
+        if strategy not in ("round_robin", "least_loaded"):
+            raise ValueError("strategy must be 'round_robin' or 'least_loaded'")
+
+        self.keys = list(keys)
+        self.strategy = strategy
+        self.rate_per_second = requests_per_minute / 60.0
+        self.capacity = float(burst if burst is not None else max(1, requests_per_minute // 6))
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts if max_attempts is not None else 2 * len(self.keys) + 1
+
+        self._lock = threading.Lock()
+        self._next = 0
+        now = time.monotonic()
+        self._state = {
+            key: {
+                "tokens": self.capacity,
+                "updated": now,
+                "in_flight": 0,
+                "cooldown_until": 0.0,
+                "failures": 0,
+                "requests": 0,
+                "rate_limited": 0,
+            }
+            for key in self.keys
+        }
+
+    def _refill(self, state, now):
+        elapsed = now - state["updated"]
+        state["tokens"] = min(self.capacity, state["tokens"] + elapsed * self.rate_per_second)
+        state["updated"] = now
+
+    def _try_acquire(self):
+        """
+        Tries to take a token from some key.
+        Returns (key, 0) on success or (None, seconds_to_wait).
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = []
+            wait = float("inf")
+            for offset in range(len(self.keys)):
+                idx = (self._next + offset) % len(self.keys)
+                key = self.keys[idx]
+                state = self._state[key]
+                self._refill(state, now)
+                if state["cooldown_until"] > now:
+                    wait = min(wait, state["cooldown_until"] - now)
+                    continue
+                if state["tokens"] < 1:
+                    wait = min(wait, (1 - state["tokens"]) / self.rate_per_second)
+                    continue
+                candidates.append((idx, key))
+
+            if not candidates:
+                return None, wait
+
+            if self.strategy == "least_loaded":
+                idx, key = min(candidates, key=lambda c: (self._state[c[1]]["in_flight"], -self._state[c[1]]["tokens"]))
+            else:
+                idx, key = candidates[0]
+
+            state = self._state[key]
+            state["tokens"] -= 1
+            state["in_flight"] += 1
+            state["requests"] += 1
+            self._next = (idx + 1) % len(self.keys)
+            return key, 0.0
+
+    def acquire(self, timeout=None):
+        """Blocks until a key is available (or timeout, raising TimeoutError)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            key, wait = self._try_acquire()
+            if key is not None:
+                return key
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError("No API key available within timeout")
+            time.sleep(min(wait, 1.0))
+
+    async def aacquire(self, timeout=None):
+        """Async version of acquire (does not block the event loop)."""
+        import asyncio
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            key, wait = self._try_acquire()
+            if key is not None:
+                return key
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError("No API key available within timeout")
+            await asyncio.sleep(min(wait, 1.0))
+
+    def release(self, key, rate_limited=False):
+        """Returns a key to the pool, applying backoff if the call hit a 429."""
+        with self._lock:
+            state = self._state[key]
+            state["in_flight"] = max(0, state["in_flight"] - 1)
+            if rate_limited:
+                state["failures"] += 1
+                state["rate_limited"] += 1
+                backoff = min(self.max_backoff, self.base_backoff * (2 ** (state["failures"] - 1)))
+                backoff *= 1 + random.random() * 0.25
+                state["cooldown_until"] = time.monotonic() + backoff
+            else:
+                state["failures"] = 0
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Context manager: acquire + release (marking 429s)."""
+        key = self.acquire(timeout=timeout)
+        rate_limited = False
+        try:
+            yield key
+        except Exception as e:
+            rate_limited = is_rate_limit_error(e)
+            raise
+        finally:
+            self.release(key, rate_limited=rate_limited)
+
+    def call(self, fn, on_retry=None):
+        """
+        Runs fn(key), retrying with another key on 429.
+
+        Args:
+            fn: Function receiving the API key
+            on_retry: Optional callback(key, attempt, exc) called before each retry
+        """
+        last_error = None
+        for attempt in range(1, self.max_attempts + 1):
+            key = self.acquire()
+            try:
+                result = fn(key)
+            except Exception as e:
+                limited = is_rate_limit_error(e)
+                self.release(key, rate_limited=limited)
+                if not limited:
+                    raise
+                last_error = e
+                if on_retry:
+                    on_retry(key, attempt, e)
+                continue
+            self.release(key)
+            return result
+        raise last_error
+
+    async def acall(self, fn, on_retry=None):
+        """Async version of call; fn(key) must return an awaitable."""
+        last_error = None
+        for attempt in range(1, self.max_attempts + 1):
+            key = await self.aacquire()
+            try:
+                result = await fn(key)
+            except Exception as e:
+                limited = is_rate_limit_error(e)
+                self.release(key, rate_limited=limited)
+                if not limited:
+                    raise
+                last_error = e
+                if on_retry:
+                    on_retry(key, attempt, e)
+                continue
+            self.release(key)
+            return result
+        raise last_error
+
+    def stats(self):
+        """Per-key counters (keys masked)."""
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {
+                    "key": mask_key(key),
+                    "requests": state["requests"],
+                    "rate_limited": state["rate_limited"],
+                    "in_flight": state["in_flight"],
+                    "cooling_down": state["cooldown_until"] > now,
+                }
+                for key, state in self._state.items()
+            ]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_key_pool():
+    """
+    Process-wide KeyPool built from the environment (None if no key is configured).
+    KEY_POOL_STRATEGY and KEY_POOL_RPM tune selection and per-key rate.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            keys = load_api_keys()
+            if not keys:
+                return None
+            _pool = KeyPool(
+                keys,
+                strategy=os.getenv("KEY_POOL_STRATEGY", "round_robin"),
+                requests_per_minute=int(os.getenv("KEY_POOL_RPM", "60")),
+            )
+        return _pool
@@ -24,5 +24,19 @@ def test_auto_join():
         print("FAILURE: CURSO not found!")
         print("Columns found:", result.columns.tolist())
 
+def test_auto_join_matches_merge():
+    """O lookup pré-calculado deve produzir o mesmo resultado do merge com a dimensão."""
+    analyzer = DataAnalyzer(data_dir="data")
+    ranked = analyzer.count_responses("FATO_AVCURSOS", group_by="COD_CURSO")[["COD_CURSO", "contagem"]]
+    
+    result = analyzer._auto_join_dimensions(ranked, "FATO_AVCURSOS")
+    
+    dim = analyzer.dataframes["DIM_CURSOS"][["COD_CURSO", "CURSO"]].drop_duplicates(subset="COD_CURSO")
+    expected = pd.merge(ranked, dim, on="COD_CURSO", how="left")
+    
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+    assert ("DIM_CURSOS", "CURSO") in analyzer._dim_lookups
+
 if __name__ == "__main__":
     test_auto_join()
+    test_auto_join_matches_merge()
@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from src.services.csv_loader import detect_dialect, load_csv
+
+
+@pytest.mark.parametrize("sep, encoding, has_bom", [
+    (";", "utf-8-sig", True),
+    (",", "utf-8", False),
+    ("\t", "latin-1", False),
+])
+def test_detects_dialect_and_reads_text_columns(tmp_path, sep, encoding, has_bom):
+    path = tmp_path / "tabela.csv"
+    expected = pd.DataFrame({
+        'COD_CURSO': ['001', '002', '003'],
+        'SETOR_CURSO': ['SETOR DE CIÊNCIAS DA SAÚDE', '', 'SETOR PALOTINA'],
+        'RESPOSTA': ['Concordo', 'Desconheço', 'Discordo'],
+    })
+    expected.to_csv(path, sep=sep, index=False, encoding=encoding)
+    
+    dialect = detect_dialect(str(path))
+    assert dialect.delimiter == sep
+    assert dialect.has_bom == has_bom
+    
+    df = load_csv(str(path))
+    assert list(df.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+
+def test_matches_previous_reader_on_data_files():
+    for name in ["DIM_CURSOS.csv", "DIM_UNIDADES.csv", "FATO_AVINSTITUCIONAL.csv"]:
+        path = f"data/{name}"
+        previous = pd.read_csv(path, sep=None, engine='python', dtype=str)
+        previous.columns = previous.columns.str.replace('\ufeff', '').str.strip()
+        
+        pd.testing.assert_frame_equal(load_csv(path), previous.fillna(""), check_dtype=False)
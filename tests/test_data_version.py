@@ -0,0 +1,83 @@
+
+from src.services.data_version import DataVersionManager, compute_data_version
+
+
+def _write(path, content):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def test_version_changes_with_files(tmp_path):
+    assert compute_data_version(str(tmp_path)) == "empty"
+    
+    _write(tmp_path / "FATO_AVCURSOS.csv", "a;b\n1;2\n")
+    v1 = compute_data_version(str(tmp_path))
+    assert v1 == compute_data_version(str(tmp_path))
+    
+    _write(tmp_path / "FATO_AVCURSOS.csv", "a;b\n1;2\n3;4\n")
+    assert compute_data_version(str(tmp_path)) != v1
+    
+    # Arquivos que não são de dados não mudam a versão
+    v2 = compute_data_version(str(tmp_path))
+    _write(tmp_path / "notas.log", "x")
+    assert compute_data_version(str(tmp_path)) == v2
+
+
+def test_reload_swaps_snapshot_and_keeps_old_one(tmp_path):
+    _write(tmp_path / "DIM_CURSOS.csv", "1")
+    builds = []
+    
+    def build(path):
+        builds.append(path)
+        return len(builds)
+    
+    manager = DataVersionManager(str(tmp_path), {"n": build}, watch_interval=0)
+    old = manager.current()
+    assert old["n"] == 1
+    assert manager.reload_if_changed() is False
+    
+    _write(tmp_path / "DIM_CURSOS.csv", "12")
+    assert manager.reload_if_changed() is True
+    
+    new = manager.current()
+    assert new["n"] == 2 and new.version != old.version
+    # Quem já tinha o snapshot antigo continua com ele
+    assert old["n"] == 1
+
+
+def test_failed_build_keeps_current_version(tmp_path):
+    _write(tmp_path / "DIM_CURSOS.csv", "1")
+    state = {"fail": False}
+    
+    def build(path):
+        if state["fail"]:
+            raise RuntimeError("CSV inválido")
+        return "ok"
+    
+    manager = DataVersionManager(str(tmp_path), {"analyzer": build}, watch_interval=0)
+    version = manager.version
+    
+    state["fail"] = True
+    _write(tmp_path / "DIM_CURSOS.csv", "123")
+    assert manager.reload_if_changed() is False
+    assert manager.version == version
+    assert "CSV inválido" in manager.last_error
+
+
+def test_reload_prewarms_new_version_before_swap(tmp_path):
+    _write(tmp_path / "DIM_CURSOS.csv", "1")
+    warmed = []
+    
+    manager = DataVersionManager(str(tmp_path), {"n": lambda path: "ok"}, watch_interval=0, warmers={
+        "dashboard": lambda version: warmed.append((version, manager.version)),
+        "vector_index": lambda version: 1 / 0,
+    })
+    old = manager.version
+    assert warmed == []
+    
+    _write(tmp_path / "DIM_CURSOS.csv", "12")
+    assert manager.reload_if_changed() is True
+    # O cache da nova versão é aquecido enquanto a anterior ainda está em uso;
+    # a falha de um aquecedor não impede a troca
+    assert warmed == [(manager.version, old)]
+    assert manager.version != old
@@ -0,0 +1,59 @@
+from src.services.data_tools import DataAnalyzer
+import pandas as pd
+
+
+def test_drill_down_matches_single_group_methods():
+    analyzer = DataAnalyzer(data_dir="data")
+    
+    result = analyzer.drill_down(
+        "FATO_AVCURSOS", ["COD_CURSO"],
+        metrics=['satisfacao', 'contagem', 'gap_desconhecimento']
+    ).set_index("COD_CURSO")
+    
+    sat = analyzer.calculate_satisfaction("FATO_AVCURSOS", group_by="COD_CURSO").set_index("COD_CURSO")
+    count = analyzer.count_responses("FATO_AVCURSOS", group_by="COD_CURSO").set_index("COD_CURSO")
+    
+    assert (result.loc[sat.index, 'satisfacao_%'] == sat['satisfacao_%']).all()
+    assert (result.loc[sat.index, 'total_respostas_validas'] == sat['total_respostas_validas']).all()
+    assert (result.loc[count.index, 'contagem'] == count['contagem']).all()
+
+
+def test_drill_down_by_dimension_attributes():
+    analyzer = DataAnalyzer(data_dir="data")
+    
+    result = analyzer.drill_down(
+        "FATO_AVCURSOS", ["SETOR_CURSO", "EIXO_SINAES"],
+        metrics=['satisfacao', 'gap_desconhecimento', 'net_score']
+    )
+    
+    # SETOR_CURSO existe na própria fato (drill_down não passa por DIM_CURSOS); EIXO_SINAES vem de DIM_PERGUNTAS
+    joined = analyzer.join_with_dimension("FATO_AVCURSOS", "DIM_PERGUNTAS", ["EIXO_SINAES"])
+    expected = joined.groupby(["SETOR_CURSO", "EIXO_SINAES"]).size()
+    
+    counts = result.assign(
+        contagem=analyzer.drill_down("FATO_AVCURSOS", ["SETOR_CURSO", "EIXO_SINAES"], metrics=['contagem'])['contagem']
+    ).set_index(["SETOR_CURSO", "EIXO_SINAES"])['contagem']
+    
+    assert (counts.loc[expected.index] == expected).all()
+    assert {'satisfacao_%', 'gap_desconhecimento_%', 'net_score', 'total_respostas_validas'} <= set(result.columns)
+
+
+def test_drill_down_filters():
+    analyzer = DataAnalyzer(data_dir="data")
+    df = analyzer.dataframes["FATO_AVINSTITUCIONAL"]
+    perguntas = sorted(df["ID_PERGUNTA"].unique())[:3]
+    
+    result = analyzer.drill_down(
+        "FATO_AVINSTITUCIONAL", "ID_PERGUNTA",
+        metrics=['contagem'],
+        filters={'ID_PERGUNTA': perguntas, 'RESPOSTA': {'!=': 'Desconheço'}}
+    )
+    
+    expected = df[df["ID_PERGUNTA"].isin(perguntas) & (df["RESPOSTA"] != 'Desconheço')].groupby("ID_PERGUNTA").size()
+    assert result.set_index("ID_PERGUNTA")['contagem'].equals(expected.rename('contagem'))
+
+
+if __name__ == "__main__":
+    test_drill_down_matches_single_group_methods()
+    test_drill_down_by_dimension_attributes()
+    test_drill_down_filters()
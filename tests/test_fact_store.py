@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+
+from src.services.data_tools import DataAnalyzer
+from src.services.fact_store import FactStore, PARTITIONS_DIR
+
+
+def _cycle(concordo, discordo, desconheco):
+    respostas = ['Concordo'] * concordo + ['Discordo'] * discordo + ['Desconheço'] * desconheco
+    return pd.DataFrame({
+        'ID_QUESTIONARIO': '604',
+        'ID_PERGUNTA': '1942',
+        'COD_CURSO': ['C1', 'C2'] * (len(respostas) // 2) + ['C1'] * (len(respostas) % 2),
+        'RESPOSTA': respostas,
+    })
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    store = FactStore(str(tmp_path / PARTITIONS_DIR))
+    store.append('FATO_AVCURSOS', _cycle(6, 4, 0), 2023, 2)
+    store.append('FATO_AVCURSOS', _cycle(8, 2, 2), 2024, 1)
+    store.append('FATO_AVCURSOS', _cycle(9, 1, 0), 2023, 1)
+    return tmp_path
+
+
+def test_append_is_ordered_and_does_not_overwrite(data_dir):
+    store = FactStore(str(data_dir / PARTITIONS_DIR))
+    assert store.list_partitions('FATO_AVCURSOS') == [('2023', '1'), ('2023', '2'), ('2024', '1')]
+    
+    with pytest.raises(ValueError):
+        store.append('FATO_AVCURSOS', _cycle(1, 1, 1), 2024, 1)
+    
+    df, ranges = store.load('FATO_AVCURSOS')
+    assert len(df) == 10 + 10 + 12
+    assert ranges[('2024', '1')] == slice(20, 32)
+    assert set(df['ANO']) == {'2023', '2024'}
+
+
+def test_partition_pruning_matches_full_scan(data_dir):
+    analyzer = DataAnalyzer(data_dir=str(data_dir))
+    
+    pruned, rows = analyzer._prune('FATO_AVCURSOS', {'ANO': '2023', 'SEMESTRE': '2'})
+    assert len(pruned) == 10 and rows.tolist() == list(range(10, 20))
+    
+    result = analyzer.calculate_satisfaction('FATO_AVCURSOS', filters={'ANO': '2024'})
+    assert result['satisfacao_%'].iloc[0] == 80.0
+    
+    counts = analyzer.drill_down('FATO_AVCURSOS', 'COD_CURSO', metrics=['contagem'],
+                                 filters={'ANO': {'>=': 2024}, 'RESPOSTA': ['Concordo']})
+    assert counts['contagem'].sum() == 8
+
+
+def test_trend_deltas(data_dir):
+    analyzer = DataAnalyzer(data_dir=str(data_dir))
+    
+    trend = analyzer.trend('FATO_AVCURSOS', metrics=['satisfacao'])
+    
+    assert list(zip(trend['ANO'], trend['SEMESTRE'])) == [('2023', '1'), ('2023', '2'), ('2024', '1')]
+    assert trend['satisfacao_%'].tolist() == [90.0, 60.0, 80.0]
+    assert pd.isna(trend['delta_satisfacao_%'].iloc[0])
+    assert trend['delta_satisfacao_%'].tolist()[1:] == [-30.0, 20.0]
+
+
+def test_trend_with_sector_partitions(tmp_path):
+    store = FactStore(str(tmp_path / PARTITIONS_DIR))
+    for cycle, ano, semestre in [(_cycle(6, 4, 0), 2023, 2), (_cycle(8, 2, 2), 2024, 1), (_cycle(9, 1, 0), 2023, 1)]:
+        cycle['SETOR_CURSO'] = cycle['COD_CURSO'].map({'C1': 'S1', 'C2': 'S2'})
+        store.append('FATO_AVCURSOS', cycle, ano, semestre)
+    analyzer = DataAnalyzer(data_dir=str(tmp_path))
+    
+    # O diretório tem chaves (ANO, SEMESTRE, setor); a ordem dos ciclos usa só o prefixo
+    assert next(iter(analyzer._partitions['FATO_AVCURSOS'])) == ('2023', '1', 'S1')
+    assert analyzer._cycle_order('FATO_AVCURSOS') == {('2023', '1'): 0, ('2023', '2'): 1, ('2024', '1'): 2}
+    
+    trend = analyzer.trend('FATO_AVCURSOS', metrics=['satisfacao'], group_by='SETOR_CURSO')
+    s1 = trend[trend['SETOR_CURSO'] == 'S1']
+    assert list(zip(s1['ANO'], s1['SEMESTRE'])) == [('2023', '1'), ('2023', '2'), ('2024', '1')]
+    assert s1['satisfacao_%'].tolist() == [100.0, 60.0, 80.0]
+    assert s1['delta_satisfacao_%'].tolist()[1:] == [-40.0, 20.0]
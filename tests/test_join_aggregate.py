@@ -0,0 +1,54 @@
+from src.services.data_tools import DataAnalyzer
+from src.services.table_metadata import TABLES_SCHEMA
+import pandas as pd
+
+
+def naive_join_aggregate(analyzer, fact_table, dim_table, group_by):
+    """
+    Referência: join completo seguido de groupby (comportamento anterior da ferramenta).
+    Coluna de agrupamento presente na fato e na dimensão (ex: SETOR_CURSO) vem da dimensão.
+    """
+    fk, pk = TABLES_SCHEMA[fact_table]['relationships'][dim_table]
+    fact = analyzer.dataframes[fact_table]
+    dim = analyzer.dataframes[dim_table]
+    if group_by in dim.columns and group_by != pk:
+        fact = fact.drop(columns=[group_by], errors='ignore')
+    df = pd.merge(fact, dim, left_on=fk, right_on=pk, how='inner')
+    df['is_concordo'] = (df['RESPOSTA'] == 'Concordo').astype(int)
+    df['is_discordo'] = (df['RESPOSTA'] == 'Discordo').astype(int)
+    result = df.groupby(group_by).agg({'is_concordo': 'sum', 'is_discordo': 'sum'}).reset_index()
+    result['contagem'] = df.groupby(group_by).size().values
+    return result
+
+
+def test_join_aggregate_matches_full_join():
+    analyzer = DataAnalyzer(data_dir="data")
+    
+    for fact_table, dim_table, group_by in [
+        ("FATO_AVCURSOS", "DIM_PERGUNTAS", "EIXO_SINAES"),
+        ("FATO_AVCURSOS", "DIM_CURSOS", "SETOR_CURSO"),
+        ("FATO_AVINSTITUCIONAL", "DIM_PERGUNTAS", "SIGLA_LOTACAO"),
+    ]:
+        expected = naive_join_aggregate(analyzer, fact_table, dim_table, group_by).set_index(group_by)
+        
+        sat = analyzer.join_aggregate(fact_table, dim_table, 'satisfacao', group_by=group_by).set_index(group_by)
+        count = analyzer.join_aggregate(fact_table, dim_table, 'contagem', group_by=group_by).set_index(group_by)
+        
+        assert (sat.loc[expected.index, 'is_concordo'] == expected['is_concordo']).all()
+        assert (sat.loc[expected.index, 'is_discordo'] == expected['is_discordo']).all()
+        assert (count.loc[expected.index, 'contagem'] == expected['contagem']).all()
+        print(f"OK: {fact_table} x {dim_table} por {group_by}")
+
+
+def test_join_aggregate_without_group_by():
+    analyzer = DataAnalyzer(data_dir="data")
+    
+    joined = analyzer.join_with_dimension("FATO_AVCURSOS", "DIM_CURSOS")
+    result = analyzer.join_aggregate("FATO_AVCURSOS", "DIM_CURSOS", 'contagem')
+    
+    assert result['contagem_total'].iloc[0] == len(joined)
+
+
+if __name__ == "__main__":
+    test_join_aggregate_matches_full_join()
+    test_join_aggregate_without_group_by()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Testa o KeyPool contra um endpoint HTTP local que simula a API do Gemini.
+Uma das chaves sempre recebe 429; o pool deve colocá-la em backoff e
+continuar atendendo com as outras.
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llama_index.core.base.llms.types import ChatMessage, ChatResponse
+
+from src.services import tracing
+from src.services.llm_pool import PooledGoogleGenAI, PooledGoogleGenAIEmbedding
+from src.utils.key_manager import KeyPool
+
+EXHAUSTED_KEY = "key-exhausted"
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    hits = {}
+    hits_lock = threading.Lock()
+
+    def do_POST(self):
+        key = self.headers.get("x-goog-api-key", "")
+        with FakeGeminiHandler.hits_lock:
+            FakeGeminiHandler.hits[key] = FakeGeminiHandler.hits.get(key, 0) + 1
+        if key == EXHAUSTED_KEY:
+            self.send_response(429)
+            self.end_headers()
+            self.wfile.write(b'{"error": {"status": "RESOURCE_EXHAUSTED"}}')
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps({"text": f"ok from {key}"}).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    # Fila de conexões maior que o padrão (5): os testes concorrentes abrem dezenas de uma vez
+    request_queue_size = 128
+
+
+def start_fake_endpoint():
+    server = FakeGeminiServer(("127.0.0.1", 0), FakeGeminiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/generate"
+
+
+def call_endpoint(url, key):
+    request = urllib.request.Request(url, data=b"{}", headers={"x-goog-api-key": key}, method="POST")
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())["text"]
+
+
+def test_round_robin_with_429():
+    print("Testing round-robin with one exhausted key...")
+    server, url = start_fake_endpoint()
+    FakeGeminiHandler.hits = {}
+    try:
+        pool = KeyPool([EXHAUSTED_KEY, "key-a", "key-b"], requests_per_minute=6000, base_backoff=5.0)
+        results = [pool.call(lambda key: call_endpoint(url, key)) for _ in range(10)]
+
+        print("Hits per key:", FakeGeminiHandler.hits)
+        print("Pool stats:", pool.stats())
+        assert all(r.startswith("ok from key-") for r in results)
+        assert FakeGeminiHandler.hits.get(EXHAUSTED_KEY) == 1, "exhausted key should be in backoff after the first 429"
+        assert abs(FakeGeminiHandler.hits["key-a"] - FakeGeminiHandler.hits["key-b"]) <= 1
+        print("SUCCESS: requests balanced across healthy keys")
+    finally:
+        server.shutdown()
+
+
+def test_least_loaded_concurrency():
+    print("Testing least-loaded selection under concurrency...")
+    server, url = start_fake_endpoint()
+    FakeGeminiHandler.hits = {}
+    try:
+        pool = KeyPool(["key-a", "key-b", "key-c"], strategy="least_loaded", requests_per_minute=6000)
+        errors = []
+
+        def worker():
+            try:
+                pool.call(lambda key: call_endpoint(url, key))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(30)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+
+        print("Hits per key:", FakeGeminiHandler.hits)
+        assert sum(FakeGeminiHandler.hits.values()) == 30
+        assert all(v >= 5 for v in FakeGeminiHandler.hits.values())
+        print("SUCCESS: load spread over all keys")
+    finally:
+        server.shutdown()
+
+
+def test_token_bucket():
+    print("Testing per-key token bucket...")
+    pool = KeyPool(["key-a"], requests_per_minute=600, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        with pool.lease():
+            pass
+    elapsed = time.monotonic() - start
+    print(f"4 requests with burst=2 at 10 req/s took {elapsed:.2f}s")
+    assert elapsed >= 0.15, "requests beyond the burst should wait for refill"
+    print("SUCCESS: rate limit respected")
+
+
+def test_all_keys_exhausted():
+    print("Testing that the 429 surfaces once every attempt fails...")
+    server, url = start_fake_endpoint()
+    try:
+        pool = KeyPool([EXHAUSTED_KEY], requests_per_minute=6000, base_backoff=0.01, max_backoff=0.05, max_attempts=3)
+        try:
+            pool.call(lambda key: call_endpoint(url, key))
+            raise AssertionError("expected HTTPError 429")
+        except urllib.error.HTTPError as e:
+            assert e.code == 429
+        assert FakeGeminiHandler.hits[EXHAUSTED_KEY] >= 3
+        print("SUCCESS: error raised after max_attempts")
+    finally:
+        server.shutdown()
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+class FakeClient:
+    """Cliente Gemini falso: a chave esgotada sempre recebe 429."""
+
+    def __init__(self, key):
+        self.key = key
+        self.calls = 0
+
+    def _answer(self):
+        self.calls += 1
+        if self.key == EXHAUSTED_KEY:
+            raise RateLimited("429 RESOURCE_EXHAUSTED")
+        return f"ok from {self.key}"
+
+    def chat(self, messages, **kwargs):
+        return ChatResponse(message=ChatMessage(role="assistant", content=self._answer()))
+
+    def _get_text_embedding(self, text):
+        self._answer()
+        return [float(len(text))]
+
+
+def test_pooled_wrappers_retry_on_429():
+    print("Testing pooled LLM/embedding wrappers with one exhausted key...")
+    pool = KeyPool([EXHAUSTED_KEY, "key-a"], requests_per_minute=6000, base_backoff=5.0)
+    llm = PooledGoogleGenAI(pool)
+    embed = PooledGoogleGenAIEmbedding(pool)
+    for wrapper in (llm, embed):
+        wrapper._clients.update({key: FakeClient(key) for key in pool.keys})
+
+    trace = tracing.start_turn("oi")
+    response = llm.chat([ChatMessage(role="user", content="oi")])
+    tracing.finish_turn(trace)
+    assert response.message.content == "ok from key-a"
+    assert llm._clients[EXHAUSTED_KEY].calls == 1 and llm._clients["key-a"].calls == 1
+    retries = [s for s in trace.spans if s["kind"] == "retry"]
+    assert len(retries) == 1 and retries[0]["attrs"]["attempt"] == 1
+
+    # A chave esgotada está em backoff: o embedding vai direto para a outra
+    assert embed.get_text_embedding("abc") == [3.0]
+    assert embed._clients[EXHAUSTED_KEY].calls == 0 and embed._clients["key-a"].calls == 1
+
+    stats = {s["key"]: s for s in pool.stats()}
+    assert stats["...sted"]["rate_limited"] == 1 and stats["...sted"]["cooling_down"]
+    assert stats["...ey-a"]["requests"] == 2
+    assert all(s["in_flight"] == 0 for s in stats.values())
+    print("SUCCESS: wrapper calls leased through the pool and retried on 429")
+
+
+if __name__ == "__main__":
+    test_round_robin_with_429()
+    test_least_loaded_concurrency()
+    test_token_bucket()
+    test_all_keys_exhausted()
+    test_pooled_wrappers_retry_on_429()
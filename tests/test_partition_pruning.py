@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+from src.services.data_tools import DataAnalyzer
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    inst = pd.DataFrame({
+        'ID_QUESTIONARIO': '644',
+        'ID_PERGUNTA': ['2005', '2013'] * 6,
+        'SIGLA_LOTACAO': ['AC/DX', 'BL/UAA', 'AC/DY', 'SA/DAGA', 'GAB', 'BL/UAA'] * 2,
+        'RESPOSTA': ['Concordo', 'Discordo', 'Concordo', 'Desconheço', 'Concordo', 'Concordo'] * 2,
+    })
+    cursos = pd.DataFrame({
+        'ID_QUESTIONARIO': '604',
+        'ID_PERGUNTA': '1942',
+        'COD_CURSO': ['C1', 'C2', 'C3', 'C4'],
+        'SETOR_CURSO': ['SETOR LITORAL', 'SETOR PALOTINA', 'SETOR LITORAL', 'SETOR DE TECNOLOGIA'],
+        'RESPOSTA': ['Concordo', 'Discordo', 'Discordo', 'Concordo'],
+    })
+    inst.to_csv(tmp_path / 'FATO_AVINSTITUCIONAL.csv', sep=';', index=False)
+    cursos.to_csv(tmp_path / 'FATO_AVCURSOS.csv', sep=';', index=False)
+    return DataAnalyzer(data_dir=str(tmp_path))
+
+
+def test_tables_are_sorted_into_contiguous_partitions(analyzer):
+    ranges = analyzer._partitions['FATO_AVINSTITUCIONAL']
+    df = analyzer.dataframes['FATO_AVINSTITUCIONAL']
+    
+    assert list(ranges) == [('AC',), ('BL',), ('GAB',), ('SA',)]
+    assert df.iloc[ranges[('AC',)]]['SIGLA_LOTACAO'].tolist() == ['AC/DX', 'AC/DY', 'AC/DX', 'AC/DY']
+    assert analyzer._partition_columns['FATO_AVCURSOS'] == ['SETOR_CURSO']
+
+
+@pytest.mark.parametrize("filters, expected_rows", [
+    ({'SIGLA_LOTACAO': 'AC/*'}, 4),
+    # A poda é por fatia de prefixo: AC/DX lê a fatia AC inteira (AC/DX e AC/DY)
+    ({'SIGLA_LOTACAO': 'AC/DX'}, 4),
+    ({'SIGLA_LOTACAO': ['GAB', 'SA/DAGA']}, 4),
+    ({'SIGLA_LOTACAO': {'prefix': 'B'}}, 4),
+])
+def test_prefix_pruning_scans_only_matching_slices(analyzer, filters, expected_rows):
+    pruned, rows = analyzer._prune('FATO_AVINSTITUCIONAL', filters)
+    assert len(pruned) == expected_rows
+    
+    df = analyzer.dataframes['FATO_AVINSTITUCIONAL']
+    full_mask = analyzer._filter_mask('FATO_AVINSTITUCIONAL', filters)
+    pruned_mask = analyzer._filter_mask('FATO_AVINSTITUCIONAL', filters, df=pruned, rows=rows)
+    assert pruned[pruned_mask].equals(df[full_mask])
+
+
+def test_filtered_methods_use_pruned_slices(analyzer):
+    result = analyzer.calculate_satisfaction('FATO_AVINSTITUCIONAL', filters={'SIGLA_LOTACAO': 'AC/*'})
+    assert result['total_respostas_validas'].iloc[0] == 4
+    
+    result = analyzer.count_responses('FATO_AVCURSOS', filters={'SETOR_CURSO': 'SETOR LITORAL'})
+    assert result['contagem_total'].iloc[0] == 2
@@ -0,0 +1,48 @@
+from src.services.data_tools import DataAnalyzer
+from src.services.query_expr import parse_filter, validate_filter
+import pandas as pd
+import pytest
+
+
+def test_parse_filter_accepts_whitelisted_expressions():
+    expr = parse_filter("RESPOSTA == 'Concordo' and (ID_PERGUNTA in ['1942', '1943'] or not SEMESTRE == '2')")
+    assert repr(expr) == "((RESPOSTA == 'Concordo') and ((ID_PERGUNTA in ['1942', '1943']) or (not (SEMESTRE == '2'))))"
+    
+    expr = parse_filter("2020 <= ANO < 2023 and `UNIDADE GESTORA` != ''")
+    assert repr(expr) == "(((ANO >= 2020) and (ANO < 2023)) and (UNIDADE GESTORA != ''))"
+
+
+@pytest.mark.parametrize("query", [
+    "__import__('os').system('ls')",
+    "RESPOSTA.str.len() > 3",
+    "RESPOSTA == COD_CURSO",
+    "ANO + 1 == 2024",
+    "@x == 1",
+])
+def test_parse_filter_rejects_other_constructs(query):
+    with pytest.raises(ValueError):
+        parse_filter(query)
+
+
+def test_validate_filter_checks_columns_and_values():
+    columns = ["ID_PERGUNTA", "RESPOSTA", "COD_CURSO"]
+    validate_filter(parse_filter("RESPOSTA == 'Concordo'"), "FATO_AVCURSOS", columns)
+    
+    with pytest.raises(ValueError):
+        validate_filter(parse_filter("NAO_EXISTE == '1'"), "FATO_AVCURSOS", columns)
+    with pytest.raises(ValueError):
+        validate_filter(parse_filter("RESPOSTA == 'Talvez'"), "FATO_AVCURSOS", columns)
+
+
+def test_custom_query_matches_pandas_query():
+    analyzer = DataAnalyzer(data_dir="data")
+    df = analyzer.dataframes["FATO_AVCURSOS"]
+    
+    query = "RESPOSTA != 'Concordo' and ID_PERGUNTA in ['1942', '1943']"
+    expected = df.query(query)
+    result = analyzer.custom_query("FATO_AVCURSOS", query)
+    pd.testing.assert_frame_equal(result, expected)
+    
+    limited = analyzer.custom_query("FATO_AVCURSOS", query, columns=["COD_CURSO", "RESPOSTA"], limit=3)
+    assert list(limited.columns) == ["COD_CURSO", "RESPOSTA"]
+    assert len(limited) == min(3, len(expected))
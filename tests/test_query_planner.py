@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from src.services.data_tools import DataAnalyzer
+from src.services.table_metadata import get_table_info, get_all_tables_summary
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    rows = 2000
+    pd.DataFrame({
+        'ID_QUESTIONARIO': [f'Q{i % 50}' for i in range(rows)],
+        'ID_PERGUNTA': [f'P{i % 100}' for i in range(rows)],
+        'COD_CURSO': [f'C{i % 10}' for i in range(rows)],
+        'SETOR_CURSO': [f'S{i % 10 // 5}' for i in range(rows)],
+        'RESPOSTA': [['Concordo', 'Discordo', 'Desconheço'][i % 7 % 3] for i in range(rows)],
+    }).to_csv(tmp_path / 'FATO_AVCURSOS.csv', sep=';', index=False)
+    return DataAnalyzer(data_dir=str(tmp_path))
+
+
+def test_profile_has_real_row_counts_and_cardinalities(analyzer):
+    profile = analyzer.table_stats['FATO_AVCURSOS']
+    assert profile['rows'] == len(analyzer.dataframes['FATO_AVCURSOS'])
+    assert profile['columns']['ID_PERGUNTA']['cardinality'] == 100
+    assert profile['columns']['SETOR_CURSO']['top_values'] == {'S0': 1000, 'S1': 1000}
+
+    info = get_table_info('FATO_AVCURSOS', stats=analyzer.table_stats)
+    assert '2,000 linhas' in info
+    assert 'SETOR_CURSO: (coluna dos dados)' in info
+    assert 'FATO_AVCURSOS' in get_all_tables_summary(stats=analyzer.table_stats)
+
+
+@pytest.mark.parametrize("keys, filters, strategy", [
+    (['ID_QUESTIONARIO'], {'ID_PERGUNTA': 'P7'}, 'index'),
+    (['SETOR_CURSO'], None, 'rollup'),
+    (['COD_CURSO'], {'ID_PERGUNTA': ['P1', 'P2']}, 'rollup'),
+    (['ID_QUESTIONARIO'], {'RESPOSTA': 'Concordo'}, 'scan'),
+])
+def test_planner_picks_cheapest_strategy(analyzer, keys, filters, strategy):
+    assert analyzer.planner.plan('FATO_AVCURSOS', keys, filters).strategy == strategy
+
+
+def test_strategies_return_the_same_counts(analyzer):
+    table = 'FATO_AVCURSOS'
+
+    filters = {'ID_PERGUNTA': ['P1', 'P2', 'P50'], 'RESPOSTA': {'!=': 'Desconheço'}}
+    scanned = analyzer.backend.response_counts(table, ['SETOR_CURSO'], filters)
+    indexed = analyzer._index_counts(table, ['SETOR_CURSO'], filters, 'ID_PERGUNTA', filters['ID_PERGUNTA'])
+    pd.testing.assert_frame_equal(indexed, scanned, check_dtype=False)
+
+    filters = {'ID_PERGUNTA': ['P1', 'P2', 'P50']}
+    for keys in (['SETOR_CURSO'], []):
+        scanned = analyzer.backend.response_counts(table, keys, filters)
+        rolled = analyzer._rollup_counts(table, keys, filters)
+        pd.testing.assert_frame_equal(rolled, scanned, check_dtype=False)
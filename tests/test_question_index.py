@@ -0,0 +1,82 @@
+import os
+
+import pandas as pd
+import pytest
+
+import src.services.question_index as question_index
+from src.services.data_tools import DataAnalyzer
+from src.services.question_index import QUESTION_INDEX_FILE, QuestionIndex, load_question_index, tokenize
+
+QUESTIONS = pd.DataFrame({
+    'ID_PERGUNTA': ['1732', '1733', '2013', '2029', '2033', '2005'],
+    'PERGUNTA': [
+        'O plano de ensino da disciplina foi disponibilizado no início da oferta.',
+        'O plano da disciplina foi cumprido e adaptado ao perfil da turma.',
+        'As ações de prevenção e promoção da segurança no trabalho são adequadas.',
+        'Há transparência na gestão e no planejamento da força de trabalho terceirizada.',
+        'As políticas de captação e alocação de recursos são transparentes.',
+        'A comunicação entre as unidades é eficiente.',
+    ],
+    'CL_PERGUNTA': ['Disciplina', 'Disciplina', 'Institucional', 'Institucional', 'Institucional', 'Institucional'],
+    'EIXO_SINAES': ['Eixo 3: Políticas Acadêmicas'] * 2 + ['Eixo 4: Políticas de Gestão'] * 4,
+    'DIM_SINAES': ['Dim 2: Ensino'] * 2 + ['Dim 5: Gestão de Pessoas', 'Dim 6: Organização e Gestão',
+                                          'Dim 10: Sustentabilidade Financeira', 'Dim 4: Comunicação'],
+})
+
+
+def test_tokenize_folds_accents_and_stems():
+    assert tokenize('Transparência') == tokenize('transparentes') == ['transpar']
+    assert tokenize('segurança') == tokenize('seguro')
+    assert tokenize('plano de ensino') == ['plan', 'ensin']
+
+
+def test_search_by_topic():
+    index = QuestionIndex.build(QUESTIONS)
+    assert {i for i, _ in index.search('transparência')} == {'2029', '2033'}
+    assert index.search('segurança')[0][0] == '2013'
+    assert index.search('plano de ensino')[0][0] == '1732'
+    # Trecho de palavra casa por prefixo
+    assert {i for i, _ in index.search('transpar')} == {'2029', '2033'}
+    assert [i for i, _ in index.search('transparência', allowed={'2033'})] == ['2033']
+    assert index.search('biblioteca') == []
+
+
+def test_index_is_cached_on_disk(tmp_path, monkeypatch):
+    first = load_question_index(QUESTIONS, str(tmp_path))
+    assert os.path.exists(tmp_path / QUESTION_INDEX_FILE)
+
+    def _fail(cls, df):
+        raise AssertionError("índice refeito sem mudança nas perguntas")
+
+    monkeypatch.setattr(question_index.QuestionIndex, 'build', classmethod(_fail))
+    cached = load_question_index(QUESTIONS, str(tmp_path))
+    assert cached.signature == first.signature
+    assert cached.search('transparência') == first.search('transparência')
+    monkeypatch.undo()
+
+    changed = QUESTIONS.assign(PERGUNTA=QUESTIONS['PERGUNTA'].str.replace('segurança', 'saúde'))
+    rebuilt = load_question_index(changed, str(tmp_path))
+    assert rebuilt.signature != first.signature
+    assert rebuilt.search('segurança') == []
+
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+    monkeypatch.setenv('QUESTION_INDEX_DIR', str(tmp_path / 'storage'))
+    QUESTIONS.to_csv(tmp_path / 'DIM_PERGUNTAS.csv', sep=';', index=False)
+    pd.DataFrame({
+        'ID_QUESTIONARIO': '644',
+        'ID_PERGUNTA': ['2013', '2029', '2005'],
+        'SIGLA_LOTACAO': 'AC/DX',
+        'RESPOSTA': 'Concordo',
+    }).to_csv(tmp_path / 'FATO_AVINSTITUCIONAL.csv', sep=';', index=False)
+    return DataAnalyzer(data_dir=str(tmp_path))
+
+
+def test_find_questions_restricted_to_fact_table(analyzer):
+    result = analyzer.find_questions('transparência')
+    assert list(result.columns) == ['ID_PERGUNTA', 'PERGUNTA', 'CL_PERGUNTA', 'EIXO_SINAES', 'DIM_SINAES', 'score']
+    assert set(result['ID_PERGUNTA']) == {'2029', '2033'}
+
+    result = analyzer.find_questions('transparência', table_name='FATO_AVINSTITUCIONAL')
+    assert result['ID_PERGUNTA'].tolist() == ['2029']
@@ -0,0 +1,83 @@
+from src.services.data_tools import DataAnalyzer, _wilson_interval, _shrunk_rate
+import pandas as pd
+
+
+def test_wilson_interval_and_shrinkage():
+    low, high = _wilson_interval(pd.Series([3, 2700, 0]), pd.Series([3, 3000, 0]))
+    
+    assert low.tolist()[0] == 43.85 and high.tolist()[0] == 100.0
+    assert 88.8 < low.iloc[1] < 90 < high.iloc[1] < 91.1
+    assert low.iloc[2] == 0 and high.iloc[2] == 0
+    
+    # 3/3 com média global de 80% fica abaixo de 2700/3000
+    shrunk = _shrunk_rate(pd.Series([3, 2700]), pd.Series([3, 3000]), prior=0.8)
+    assert shrunk.iloc[0] < shrunk.iloc[1]
+
+
+def test_top_n_min_valid_and_ranking():
+    analyzer = DataAnalyzer(data_dir="data")
+    
+    result = analyzer.get_top_n("FATO_AVCURSOS", metric="satisfacao", n=10, group_by="COD_CURSO", min_valid=50)
+    assert (result['total_respostas_validas'] >= 50).all()
+    assert result['satisfacao_ajustada_%'].is_monotonic_decreasing
+    
+    bottom = analyzer.get_top_n("FATO_AVCURSOS", metric="satisfacao", n=10, group_by="COD_CURSO",
+                                ascending=True, ranking="conservadora")
+    assert bottom['ic95_sup_%'].is_monotonic_increasing
+    assert (bottom['ic95_inf_%'] <= bottom['satisfacao_%']).all()
+    assert (bottom['satisfacao_%'] <= bottom['ic95_sup_%']).all()
+
+
+def test_top_n_selects_before_join():
+    analyzer = DataAnalyzer(data_dir="data")
+    
+    full = analyzer.count_responses("FATO_AVINSTITUCIONAL", group_by="SIGLA_LOTACAO")
+    top = analyzer.get_top_n("FATO_AVINSTITUCIONAL", metric="contagem", n=7, group_by="SIGLA_LOTACAO")
+    
+    assert len(top) == 7
+    assert top['contagem'].tolist() == full['contagem'].head(7).tolist()
+    
+    bottom = analyzer.get_top_n("FATO_AVCURSOS", metric="satisfacao", n=5, group_by="COD_CURSO",
+                                ascending=True, ranking="bruta")
+    assert 'CURSO' in bottom.columns
+    assert bottom['satisfacao_%'].tolist() == sorted(
+        analyzer.calculate_satisfaction("FATO_AVCURSOS", group_by="COD_CURSO")['satisfacao_%'])[:5]
+
+
+def test_gap_desconhecimento_single_pass():
+    analyzer = DataAnalyzer(data_dir="data")
+    df = analyzer.dataframes["FATO_AVCURSOS"]
+    
+    result = analyzer.get_top_n("FATO_AVCURSOS", metric="gap_desconhecimento", n=1000, group_by="COD_CURSO")
+    
+    assert not result['gap_desconhecimento_%'].isna().any()
+    assert 'CURSO' in result.columns and 'CURSO_total' not in result.columns
+    
+    expected = (df['RESPOSTA'] == 'Desconheço').groupby(df['COD_CURSO']).mean().mul(100).round(2)
+    got = result.set_index('COD_CURSO')['gap_desconhecimento_%']
+    assert (got.loc[expected.index] == expected).all()
+
+
+def test_gap_desconhecimento_counts_blank_answers(tmp_path):
+    pd.DataFrame({
+        'ID_QUESTIONARIO': '1',
+        'ID_PERGUNTA': '1942',
+        'COD_CURSO': ['C1'] * 4 + ['C2'] * 2,
+        'RESPOSTA': ['Concordo', 'Desconheço', '', '', 'Discordo', 'Desconheço'],
+    }).to_csv(tmp_path / 'FATO_AVCURSOS.csv', sep=';', index=False)
+    analyzer = DataAnalyzer(data_dir=str(tmp_path))
+    
+    result = analyzer.get_top_n("FATO_AVCURSOS", metric="gap_desconhecimento", n=10, group_by="COD_CURSO")
+    result = result.set_index('COD_CURSO')
+    
+    # Respostas em branco entram no denominador, não só Concordo/Discordo/Desconheço
+    assert result.loc['C1', 'contagem_total'] == 4 and result.loc['C1', 'gap_desconhecimento_%'] == 25.0
+    assert result.loc['C2', 'gap_desconhecimento_%'] == 50.0
+
+
+if __name__ == "__main__":
+    test_wilson_interval_and_shrinkage()
+    test_top_n_min_valid_and_ranking()
+    test_top_n_selects_before_join()
+    test_gap_desconhecimento_single_pass()
+    test_gap_desconhecimento_counts_blank_answers()
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.services.respondents as respondents
+from src.services.data_tools import DataAnalyzer
+from src.services.respondents import RespondentSet
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    pd.DataFrame({
+        'SIGLA_LOTACAO': ['AC/DX', 'AC/DY', 'BL/UAA'],
+        'UNIDADE GESTORA': ['Setor de Artes', 'Setor de Artes', 'Setor de Biológicas'],
+    }).to_csv(tmp_path / 'DIM_UNIDADES.csv', sep=';', index=False)
+    pd.DataFrame({
+        'ID_PESQUISA': ['1', '1', '2', '2', '3', '3', '4', '4'],
+        'ID_QUESTIONARIO': '644',
+        'ID_PERGUNTA': ['2005', '2013'] * 4,
+        'SIGLA_LOTACAO': ['AC/DX', 'AC/DX', 'AC/DY', 'AC/DY', 'BL/UAA', 'BL/UAA', 'AC/DX', 'AC/DX'],
+        'RESPOSTA': ['Concordo', 'Discordo', 'Concordo', 'Concordo', 'Desconheço', 'Concordo', 'Discordo', 'Concordo'],
+    }).to_csv(tmp_path / 'FATO_AVINSTITUCIONAL.csv', sep=';', index=False)
+    return DataAnalyzer(data_dir=str(tmp_path))
+
+
+def test_respondents_by_hierarchy_level(analyzer):
+    result = analyzer.count_respondents('FATO_AVINSTITUCIONAL', group_by='UNIDADE GESTORA', join_dimensions=False)
+    assert dict(zip(result['UNIDADE GESTORA'], result['respondentes'])) == {
+        'Setor de Artes': 3, 'Setor de Biológicas': 1
+    }
+
+    total = analyzer.count_respondents('FATO_AVINSTITUCIONAL', filters={'SIGLA_LOTACAO': 'AC/*'})
+    assert total['respondentes'].iloc[0] == 3
+
+
+def test_scan_path_matches_nunique(analyzer):
+    # Filtro por RESPOSTA não está nos conjuntos pré-calculados: varre as linhas
+    filters = {'RESPOSTA': 'Concordo'}
+    result = analyzer.count_respondents('FATO_AVINSTITUCIONAL', group_by='SIGLA_LOTACAO', filters=filters,
+                                        join_dimensions=False)
+    df = analyzer.dataframes['FATO_AVINSTITUCIONAL']
+    expected = df[df['RESPOSTA'] == 'Concordo'].groupby('SIGLA_LOTACAO')['ID_PESQUISA'].nunique()
+    assert dict(zip(result['SIGLA_LOTACAO'], result['respondentes'])) == expected.to_dict()
+
+
+def test_set_representations_and_unions():
+    universe = 10_000
+    sparse = RespondentSet.from_codes(np.array([5, 1, 5, 9]), universe)
+    dense = RespondentSet.from_codes(np.arange(0, universe, 2), universe)
+    assert (sparse.kind, len(sparse)) == ('array', 3)
+    assert (dense.kind, len(dense)) == ('bitmap', universe // 2)
+
+    union = RespondentSet.union([sparse, dense], universe)
+    assert union.exact and len(union) == universe // 2 + 3
+
+
+def test_large_sets_use_hyperloglog(monkeypatch):
+    monkeypatch.setattr(respondents, 'HLL_MIN_DISTINCT', 1000)
+    universe = 200_000
+    a = RespondentSet.from_codes(np.arange(0, 120_000), universe)
+    b = RespondentSet.from_codes(np.arange(100_000, 150_000), universe)
+    assert a.kind == 'hll' and not a.exact
+
+    union = RespondentSet.union([a, b], universe)
+    assert abs(len(union) - 150_000) < 150_000 * 5 * respondents.HLL_STD_ERROR
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.services.data_tools import DataAnalyzer
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    rng = np.random.default_rng(3)
+    respondents = 300
+    base = rng.random(respondents) < 0.6
+    answers = {
+        '2005': base,
+        '2013': np.where(rng.random(respondents) < 0.9, base, ~base),
+        '1984': rng.random(respondents) < 0.5,
+    }
+    rows = []
+    for question, agree in answers.items():
+        for r, value in enumerate(agree):
+            # Alguns Desconheço, que ficam fora da matriz
+            resposta = 'Desconheço' if (r + int(question)) % 11 == 0 else ('Concordo' if value else 'Discordo')
+            rows.append({'ID_PESQUISA': str(40000 + r), 'ID_QUESTIONARIO': '644', 'ID_PERGUNTA': question,
+                         'SIGLA_LOTACAO': 'AC/DX' if r % 2 else 'BL/UAA', 'RESPOSTA': resposta})
+    pd.DataFrame(rows).to_csv(tmp_path / 'FATO_AVINSTITUCIONAL.csv', sep=';', index=False)
+    return DataAnalyzer(data_dir=str(tmp_path))
+
+
+def _coded(analyzer, filters=None):
+    df = analyzer.dataframes['FATO_AVINSTITUCIONAL']
+    if filters:
+        df = df[df['SIGLA_LOTACAO'] == filters['SIGLA_LOTACAO']]
+    df = df.assign(x=df['RESPOSTA'].map({'Concordo': 1.0, 'Discordo': -1.0}))
+    return df.pivot(index='ID_PESQUISA', columns='ID_PERGUNTA', values='x')
+
+
+def test_correlations_match_pairwise_pandas(analyzer):
+    coded = _coded(analyzer)
+    expected = coded.corr()
+
+    pairs = analyzer.question_correlations('FATO_AVINSTITUCIONAL', top=10)
+    assert len(pairs) == 3
+    for _, row in pairs.iterrows():
+        assert row['correlacao'] == pytest.approx(expected.loc[row['ID_PERGUNTA_A'], row['ID_PERGUNTA_B']], abs=1e-3)
+    assert {pairs.iloc[0]['ID_PERGUNTA_A'], pairs.iloc[0]['ID_PERGUNTA_B']} == {'2005', '2013'}
+
+    related = analyzer.question_correlations('FATO_AVINSTITUCIONAL', id_pergunta='2005')
+    assert related['ID_PERGUNTA'].iloc[0] == '2013'
+
+
+def test_key_drivers_use_item_rest_correlation(analyzer):
+    filters = {'SIGLA_LOTACAO': 'AC/DX'}
+    coded = _coded(analyzer, filters)
+    drivers = analyzer.key_drivers('FATO_AVINSTITUCIONAL', filters=filters).set_index('ID_PERGUNTA')
+
+    for question in coded.columns:
+        others = coded.drop(columns=question)
+        rest = others.mean(axis=1)
+        valid = coded[question].notna() & rest.notna()
+        expected = np.corrcoef(coded.loc[valid, question], rest[valid])[0, 1]
+        assert drivers.loc[question, 'correlacao'] == pytest.approx(expected, abs=1e-3)
+        assert drivers.loc[question, 'respondentes'] == valid.sum()
+
+    assert drivers['correlacao'].idxmin() == '1984'
+    assert set(drivers['quadrante']) <= {'Prioridade', 'Manter', 'Monitorar', 'Secundário'}
+
+
+def test_dense_fallback_is_bounded(analyzer, monkeypatch):
+    import src.services.response_matrix as response_matrix
+    df = analyzer.dataframes['FATO_AVINSTITUCIONAL']
+    columns = (df['ID_PESQUISA'].to_numpy(), df['ID_PERGUNTA'].to_numpy(), df['RESPOSTA'].to_numpy())
+    expected, _ = response_matrix.ResponseMatrix(*columns).correlations()
+
+    monkeypatch.setattr(response_matrix, 'sparse', None)
+    dense, _ = response_matrix.ResponseMatrix(*columns).correlations()
+    pd.testing.assert_frame_equal(dense, expected)
+
+    monkeypatch.setattr(response_matrix, 'DENSE_MAX_CELLS', 100)
+    with pytest.raises(ValueError, match="sem scipy"):
+        response_matrix.ResponseMatrix(*columns)
@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from src.services.result_format import CHARS_PER_TOKEN, ResultCache, estimate_tokens, format_result
+
+
+@pytest.fixture
+def result():
+    return pd.DataFrame({
+        'ID_PERGUNTA': [str(2000 + i) for i in range(50)],
+        'PERGUNTA': [f'Pergunta {i}: o(a) professor(a) apresentou o plano de ensino no início do semestre?' for i in range(50)],
+        'satisfacao_%': [100 / 3 + i for i in range(50)],
+        'total': [10] * 50,
+    })
+
+
+def test_compact_rows_and_header(result):
+    text = format_result(result.head(3), title="Resultados")
+    lines = text.splitlines()
+    assert lines[0] == "Resultados: 3 linhas; totais: total=30"
+    assert lines[1] == "ID_PERGUNTA\tPERGUNTA\tsatisfacao_%\ttotal"
+    cells = lines[2].split("\t")
+    assert cells[2] == "33.33" and cells[3] == "10"
+    assert len(cells[1]) == 40 and cells[1].endswith("…")
+    assert estimate_tokens(text) < estimate_tokens(result.head(3).to_string(index=False))
+
+
+def test_budget_and_fetch_more(result, monkeypatch):
+    monkeypatch.setenv("TOOL_TOKEN_BUDGET", "200")
+    cache = ResultCache()
+    text = format_result(result, tool_name="calculate_satisfaction_tool", max_rows=50, cache=cache)
+    assert len(text) <= 200 * CHARS_PER_TOKEN + 100
+    assert text.startswith("Resultados: 50 linhas; totais: total=500")
+
+    shown = len(text.splitlines()) - 3
+    assert text.splitlines()[-1] == f'[+{50 - shown} linhas: fetch_more_tool(handle="r1", offset={shown})]'
+
+    page = format_result(cache.get("r1"), max_rows=50, offset=shown, cache=cache, handle="r1")
+    assert page.splitlines()[2].startswith(f"{2000 + shown}\t")
+    assert f"(linhas {shown + 1}-" in page.splitlines()[0]
+
+
+def test_legacy_format(result, monkeypatch):
+    monkeypatch.setenv("TOOL_RESULT_FORMAT", "table")
+    text = format_result(result, title="Resultados")
+    assert text.startswith("Resultados (20 de 50):\n")
+    assert result.head(20).to_string(index=False) in text
@@ -0,0 +1,68 @@
+from src.services.data_tools import DataAnalyzer
+import pandas as pd
+
+
+def test_rollup_by_unidade_gestora_matches_full_scan():
+    analyzer = DataAnalyzer(data_dir="data")
+    
+    result = analyzer.rollup("FATO_AVINSTITUCIONAL", "UNIDADE GESTORA").set_index("UNIDADE GESTORA")
+    
+    fact = analyzer.dataframes["FATO_AVINSTITUCIONAL"]
+    units = analyzer.dataframes["DIM_UNIDADES"][["SIGLA_LOTACAO", "UNIDADE GESTORA"]]
+    joined = pd.merge(fact, units, on="SIGLA_LOTACAO")
+    expected = joined.groupby("UNIDADE GESTORA").size()
+    
+    assert (result.loc[expected.index, 'contagem'] == expected).all()
+    assert result['contagem'].sum() == len(fact)
+
+
+def test_rollup_drill_down_from_parent():
+    analyzer = DataAnalyzer(data_dir="data")
+    
+    gestoras = analyzer.rollup("FATO_AVINSTITUCIONAL", "UNIDADE GESTORA")
+    gestora = gestoras.sort_values("contagem").iloc[-1]
+    
+    children = analyzer.rollup(
+        "FATO_AVINSTITUCIONAL", "SIGLA_LOTACAO",
+        parent={"UNIDADE GESTORA": gestora["UNIDADE GESTORA"]}
+    )
+    
+    assert (children["UNIDADE GESTORA"] == gestora["UNIDADE GESTORA"]).all()
+    assert children["contagem"].sum() == gestora["contagem"]
+
+
+def test_drill_down_on_hierarchy_levels_uses_rollup(tmp_path):
+    pd.DataFrame({
+        'COD_CURSO': ['C1', 'C2'], 'CURSO': ['Curso 1', 'Curso 2'], 'SETOR_CURSO': ['S1', 'S2'],
+    }).to_csv(tmp_path / 'DIM_CURSOS.csv', sep=';', index=False)
+    pd.DataFrame({
+        'COD_DISCIPLINA': ['D1', 'D2', 'D3'], 'NOME_DISCIPLINA': ['A', 'B', 'C'], 'COD_CURSO': ['C1', 'C1', 'C2'],
+    }).to_csv(tmp_path / 'DIM_DISCIPLINAS.csv', sep=';', index=False)
+    pd.DataFrame({
+        'ID_QUESTIONARIO': '1',
+        'ID_PERGUNTA': ['1733', '1734'] * 4,
+        'COD_DISCIPLINA': ['D1', 'D1', 'D2', 'D3', 'D3', 'D2', 'D1', 'D3'],
+        'COD_CURSO': ['C1', 'C1', 'C1', 'C2', 'C2', 'C1', 'C1', 'C2'],
+        'RESPOSTA': ['Concordo', 'Discordo', 'Concordo', 'Desconheço', 'Concordo', 'Concordo', 'Discordo', 'Discordo'],
+    }).to_csv(tmp_path / 'FATO_AVDISCIPLINAS.csv', sep=';', index=False)
+    analyzer = DataAnalyzer(data_dir=str(tmp_path))
+    
+    metrics = ['satisfacao', 'gap_desconhecimento', 'contagem']
+    for group_by in (["SETOR_CURSO"], ["COD_CURSO"], ["SETOR_CURSO", "ID_PERGUNTA"]):
+        from_rollup = analyzer.drill_down("FATO_AVDISCIPLINAS", group_by, metrics=metrics)
+        # Filtro que mantém todas as linhas, fora das colunas do agregado, força a varredura da fato
+        scanned = analyzer.drill_down(
+            "FATO_AVDISCIPLINAS", group_by, metrics=metrics,
+            filters={'RESPOSTA': ['Concordo', 'Discordo', 'Desconheço']}
+        )
+        pd.testing.assert_frame_equal(from_rollup, scanned, check_dtype=False)
+    
+    by_question = analyzer.rollup("FATO_AVDISCIPLINAS", "SETOR_CURSO", id_pergunta="1733").set_index("SETOR_CURSO")
+    assert by_question.loc["S1", "satisfacao_%"] == 66.67
+    assert by_question.loc["S2", "contagem"] == 1
+
+
+if __name__ == "__main__":
+    test_rollup_by_unidade_gestora_matches_full_scan()
+    test_rollup_drill_down_from_parent()
+    print("Rollup tests passed")
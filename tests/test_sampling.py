@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.services.data_tools as data_tools
+import src.services.sampling as sampling
+from src.services.data_tools import DataAnalyzer
+from src.services.sampling import StratifiedSample
+
+
+def _fact(rows=20000, seed=1):
+    rng = np.random.default_rng(seed)
+    curso = rng.integers(0, 10, rows)
+    # Satisfação diferente por curso, para os estratos importarem
+    draw = rng.random(rows)
+    resposta = np.where(draw < 0.4 + curso * 0.04, 'Concordo', np.where(draw < 0.9, 'Discordo', 'Desconheço'))
+    return pd.DataFrame({
+        'ID_QUESTIONARIO': '604',
+        'ID_PERGUNTA': [f'P{i}' for i in rng.integers(0, 20, rows)],
+        'COD_CURSO': [f'C{c}' for c in curso],
+        'RESPOSTA': resposta,
+    })
+
+
+def test_full_sample_estimates_are_exact():
+    df = _fact(rows=2000)
+    sample = StratifiedSample(df, ['COD_CURSO', 'ID_PERGUNTA'], fraction=1.0)
+    estimate = sample.estimate(['COD_CURSO'])
+
+    exact = df.groupby(['COD_CURSO', 'RESPOSTA']).size().unstack(fill_value=0)
+    assert estimate['concordo'].tolist() == exact['Concordo'].tolist()
+    assert estimate['total'].tolist() == exact.sum(axis=1).tolist()
+    assert (estimate[['var_total', 'var_concordo', 'var_satisfacao']] == 0).all().all()
+
+
+def test_sample_keeps_every_stratum():
+    df = _fact()
+    sample = StratifiedSample(df, ['COD_CURSO', 'ID_PERGUNTA'], fraction=0.05, min_per_stratum=5)
+    assert (sample.sampled >= np.minimum(sample.population, 5)).all()
+    assert len(sample.rows) == sample.sampled.sum()
+    assert sample.rows.groupby(['COD_CURSO', 'ID_PERGUNTA']).ngroups == df.groupby(['COD_CURSO', 'ID_PERGUNTA']).ngroups
+
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+    monkeypatch.setattr(sampling, 'APPROX_MIN_ROWS', 0)
+    monkeypatch.setattr(sampling, 'APPROX_SAMPLE_FRACTION', 0.1)
+    monkeypatch.setattr(data_tools, 'APPROX_MIN_GROUP_SAMPLE', 100)
+    _fact().to_csv(tmp_path / 'FATO_AVDISCIPLINAS.csv', sep=';', index=False)
+    return DataAnalyzer(data_dir=str(tmp_path))
+
+
+def test_approximate_satisfaction_has_error_bounds(analyzer):
+    exact = analyzer.calculate_satisfaction('FATO_AVDISCIPLINAS', group_by='COD_CURSO', join_dimensions=False)
+    approx = analyzer.calculate_satisfaction(
+        'FATO_AVDISCIPLINAS', group_by='COD_CURSO', join_dimensions=False, approximate=True
+    )
+    assert 'margem_erro_%' in approx.columns and 'margem_erro_%' not in exact.columns
+
+    merged = exact.merge(approx, on='COD_CURSO', suffixes=('', '_aprox'))
+    assert len(merged) == 10
+    assert ((merged['satisfacao_%'] - merged['satisfacao_%_aprox']).abs() <= 2 * merged['margem_erro_%']).all()
+
+    total = analyzer.count_responses('FATO_AVDISCIPLINAS', approximate=True)
+    assert abs(total['contagem_total'].iloc[0] - 20000) <= total['margem_erro'].iloc[0]
+
+
+def test_small_groups_fall_back_to_exact(analyzer):
+    # Um curso por pergunta: ~10 linhas amostradas por grupo
+    filters = {'COD_CURSO': 'C1'}
+    result = analyzer.calculate_satisfaction('FATO_AVDISCIPLINAS', group_by='ID_PERGUNTA', filters=filters, approximate=True)
+    exact = analyzer.calculate_satisfaction('FATO_AVDISCIPLINAS', group_by='ID_PERGUNTA', filters=filters)
+    assert 'margem_erro_%' not in result.columns
+    pd.testing.assert_frame_equal(result, exact)
@@ -0,0 +1,70 @@
+import json
+
+from src.services.session_memory import KEEP_RECENT_MESSAGES, SUMMARY_HEADER, SessionRegistry, estimate_size
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _chat(record, turns):
+    for i in range(turns):
+        record.messages.append({"role": "user", "content": f"Pergunta {i} " * 20})
+        record.messages.append({"role": "assistant", "content": f"Resposta {i} " * 200})
+
+
+def test_idle_sessions_are_compacted(tmp_path):
+    clock = FakeClock()
+    stats_file = tmp_path / "sessions.jsonl"
+    registry = SessionRegistry(idle_ttl=60, evict_ttl=0, stats_file=str(stats_file), clock=clock)
+    record = registry.get("a")
+    _chat(record, 10)
+    record.context = "x" * 50_000
+    record.last_trace = {"spans": [{"name": "tool"}] * 10}
+    before = registry.stats()["total_bytes"]
+    assert before >= estimate_size(record.context)
+
+    clock.now = 30
+    assert registry.sweep()["compacted"] == []
+
+    clock.now = 120
+    stats = registry.sweep()
+    assert stats["compacted"] == ["a"]
+    assert stats["total_bytes"] < before and stats["freed_bytes"] > 0
+    assert record.context == "" and record.last_trace is None
+    assert len(record.messages) == KEEP_RECENT_MESSAGES + 1
+    assert record.messages[0]["content"].startswith(SUMMARY_HEADER)
+    assert "Pergunta 0" in record.messages[0]["content"]
+    assert record.messages[-1]["content"].startswith("Resposta 9")
+
+    # Nada novo para compactar; o resumo é reaproveitado na próxima compactação
+    clock.now = 300
+    assert registry.sweep()["compacted"] == []
+    _chat(record, 5)
+    clock.now = 400
+    assert registry.sweep()["compacted"] == ["a"]
+    assert "Pergunta 0" in record.messages[0]["content"]
+    assert "Pergunta 9" in record.messages[0]["content"]
+
+    lines = [json.loads(line) for line in stats_file.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 4 and lines[1]["compacted"] == ["a"]
+
+
+def test_sessions_are_evicted_after_ttl():
+    clock = FakeClock()
+    registry = SessionRegistry(idle_ttl=60, evict_ttl=600, clock=clock)
+    _chat(registry.get("old"), 3)
+
+    clock.now = 500
+    registry.get("new")
+    clock.now = 700
+    stats = registry.sweep()
+    assert stats["evicted"] == ["old"]
+    assert [s["session_id"] for s in stats["per_session"]] == ["new"]
+
+    # Voltar depois da remoção começa uma sessão vazia
+    assert registry.get("old").messages == []
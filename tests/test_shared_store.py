@@ -0,0 +1,88 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.services.data_tools import DataAnalyzer
+from src.services.shared_store import MANIFEST_FILE, attach, publish
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data = tmp_path / 'data'
+    data.mkdir()
+    pd.DataFrame({
+        'SIGLA_LOTACAO': ['AC/DX', 'AC/DY', 'BL/UAA'],
+        'UNIDADE GESTORA': ['Setor de Artes', 'Setor de Artes', 'Setor de Biológicas'],
+    }).to_csv(data / 'DIM_UNIDADES.csv', sep=';', index=False)
+    pd.DataFrame({
+        'ID_PESQUISA': [str(i // 2) for i in range(12)],
+        'ID_QUESTIONARIO': '644',
+        'ID_PERGUNTA': ['2005', '2013'] * 6,
+        'SIGLA_LOTACAO': ['BL/UAA', 'AC/DX', 'AC/DY', 'AC/DX'] * 3,
+        'RESPOSTA': ['Concordo', 'Discordo', 'Desconheço', 'Concordo', 'Concordo', 'Discordo'] * 2,
+    }).to_csv(data / 'FATO_AVINSTITUCIONAL.csv', sep=';', index=False)
+    return str(data)
+
+
+@pytest.fixture
+def plane(tmp_path, monkeypatch):
+    root = tmp_path / 'plane'
+    monkeypatch.setenv('DATA_PLANE_DIR', str(root))
+    monkeypatch.setenv('DATA_PLANE_WAIT', '0')
+    return str(root)
+
+
+def test_shared_analyzer_matches_local(data_dir, plane):
+    local = DataAnalyzer(data_dir=data_dir, data_plane='local')
+    publish(local, plane)
+    shared = DataAnalyzer(data_dir=data_dir, data_plane='shared')
+
+    fact = shared.dataframes['FATO_AVINSTITUCIONAL']
+    assert isinstance(fact['RESPOSTA'].dtype, pd.CategoricalDtype)
+    assert shared.dataframes['DIM_UNIDADES']['SIGLA_LOTACAO'].dtype == object
+    assert shared._partitions == local._partitions
+    assert shared.table_stats == local.table_stats
+
+    for group_by in [None, 'SIGLA_LOTACAO']:
+        expected = local.calculate_satisfaction('FATO_AVINSTITUCIONAL', group_by=group_by)
+        result = shared.calculate_satisfaction('FATO_AVINSTITUCIONAL', group_by=group_by)
+        assert result.astype(object).to_dict('records') == expected.astype(object).to_dict('records')
+
+    # Atributo da dimensão (UNIDADE GESTORA): drill_down e rollup, com os agregados publicados
+    metrics = ['satisfacao', 'gap_desconhecimento', 'contagem']
+    expected = local.drill_down('FATO_AVINSTITUCIONAL', ['UNIDADE GESTORA'], metrics=metrics)
+    result = shared.drill_down('FATO_AVINSTITUCIONAL', ['UNIDADE GESTORA'], metrics=metrics)
+    assert len(result) == 2
+    assert result.astype(object).to_dict('records') == expected.astype(object).to_dict('records')
+    expected = local.rollup('FATO_AVINSTITUCIONAL', 'UNIDADE GESTORA')
+    result = shared.rollup('FATO_AVINSTITUCIONAL', 'UNIDADE GESTORA')
+    assert result.astype(object).to_dict('records') == expected.astype(object).to_dict('records')
+
+    filters = {'SIGLA_LOTACAO': 'AC/*', 'RESPOSTA': ['Concordo', 'Discordo']}
+    expected = local.count_respondents('FATO_AVINSTITUCIONAL', group_by='SIGLA_LOTACAO', filters=filters)
+    result = shared.count_respondents('FATO_AVINSTITUCIONAL', group_by='SIGLA_LOTACAO', filters=filters)
+    assert result.astype(object).to_dict('records') == expected.astype(object).to_dict('records')
+
+
+def test_missing_version_falls_back_to_local(data_dir, plane):
+    assert attach(data_dir, plane, timeout=0) is None
+    analyzer = DataAnalyzer(data_dir=data_dir, data_plane='shared')
+    assert analyzer.dataframes['FATO_AVINSTITUCIONAL']['RESPOSTA'].dtype == object
+
+
+def test_attach_by_version_skips_data_dir(data_dir, plane):
+    publish(DataAnalyzer(data_dir=data_dir, data_plane='local'), plane, version='v1')
+    # Com a versão informada, o attach não consulta data_dir
+    shared = attach(os.path.join(data_dir, 'inexistente'), plane, timeout=0, version='v1')
+    assert shared is not None and shared.version == 'v1'
+    assert attach(data_dir, plane, timeout=0, version='v1') is shared
+    assert attach(data_dir, plane, timeout=0, version='v2') is None
+
+
+def test_publish_keeps_recent_versions(data_dir, plane):
+    analyzer = DataAnalyzer(data_dir=data_dir, data_plane='local')
+    paths = [publish(analyzer, plane, version=f'v{i}') for i in range(3)]
+    assert not os.path.exists(paths[0])
+    assert all(os.path.exists(os.path.join(path, MANIFEST_FILE)) for path in paths[1:])
+    assert sorted(os.listdir(plane)) == ['v1', 'v2']
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from src.services.data_tools import DataAnalyzer
+from src.services.query_expr import build_filter
+from src.services.sql_backend import filter_to_sql
+
+duckdb = pytest.importorskip("duckdb")
+
+
+@pytest.fixture(scope="module")
+def analyzers():
+    return DataAnalyzer(data_dir="data", backend="pandas"), DataAnalyzer(data_dir="data", backend="duckdb")
+
+
+def test_filter_to_sql_is_parameterized():
+    sql, params = filter_to_sql(build_filter({
+        'SIGLA_LOTACAO': 'AC/*',
+        'ID_PERGUNTA': ['2005', '2013'],
+        'RESPOSTA': {'!=': 'Desconheço'},
+    }))
+    assert sql == '(starts_with("SIGLA_LOTACAO", ?) AND ("ID_PERGUNTA" IN (?, ?)) AND ("RESPOSTA" NOT IN (?)))'
+    assert params == ['AC/', '2005', '2013', 'Desconheço']
+
+
+@pytest.mark.parametrize("method, kwargs", [
+    ("calculate_satisfaction", dict(table_name="FATO_AVCURSOS")),
+    ("calculate_satisfaction", dict(table_name="FATO_AVCURSOS", group_by="COD_CURSO")),
+    ("calculate_satisfaction", dict(table_name="FATO_AVINSTITUCIONAL", group_by="SIGLA_LOTACAO",
+                                    filters={"SIGLA_LOTACAO": "AC/*", "ID_PERGUNTA": ["2005", "2013"]})),
+    ("count_responses", dict(table_name="FATO_AVINSTITUCIONAL", group_by="SIGLA_LOTACAO", response_type="Desconheço")),
+    ("count_responses", dict(table_name="FATO_AVCURSOS", filters={"RESPOSTA": {"not in": ["Desconheço"]}})),
+    ("drill_down", dict(table_name="FATO_AVCURSOS", group_by=["SETOR_CURSO", "EIXO_SINAES"],
+                        metrics=["satisfacao", "gap_desconhecimento", "net_score"])),
+    ("get_top_n", dict(table_name="FATO_AVCURSOS", metric="gap_desconhecimento", n=5, group_by="COD_CURSO")),
+])
+def test_duckdb_backend_matches_pandas(analyzers, method, kwargs):
+    pandas_analyzer, duckdb_analyzer = analyzers
+    expected = getattr(pandas_analyzer, method)(**kwargs).reset_index(drop=True)
+    result = getattr(duckdb_analyzer, method)(**kwargs).reset_index(drop=True)
+    
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_sql_query_matches_pandas(analyzers):
+    pandas_analyzer, duckdb_analyzer = analyzers
+    
+    result = duckdb_analyzer.sql_query(
+        "SELECT SETOR_CURSO, COUNT(*) AS contagem FROM FATO_AVCURSOS GROUP BY SETOR_CURSO ORDER BY SETOR_CURSO"
+    )
+    expected = pandas_analyzer.drill_down("FATO_AVCURSOS", "SETOR_CURSO", metrics=["contagem"])
+    
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("sql", [
+    "DROP TABLE FATO_AVCURSOS",
+    "SELECT 1; DELETE FROM FATO_AVCURSOS",
+    "SELECT * FROM read_csv('/etc/passwd')",
+    "SELECT * FROM tabela_inexistente",
+    "COPY FATO_AVCURSOS TO '/tmp/x.csv'",
+])
+def test_sql_query_rejects_non_read_only_or_unknown_tables(analyzers, sql):
+    _, duckdb_analyzer = analyzers
+    with pytest.raises(ValueError):
+        duckdb_analyzer.sql_query(sql)
+
+
+def test_sql_query_requires_duckdb_backend(analyzers):
+    pandas_analyzer, _ = analyzers
+    with pytest.raises(ValueError):
+        pandas_analyzer.sql_query("SELECT COUNT(*) FROM FATO_AVCURSOS")
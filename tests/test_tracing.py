@@ -0,0 +1,79 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src.services import tracing
+from src.services.data_tools import DataAnalyzer
+
+
+def test_spans_nest_and_summarize(tmp_path, monkeypatch):
+    trace_file = tmp_path / 'traces.jsonl'
+    monkeypatch.setenv('CHAT_TRACE_FILE', str(trace_file))
+    trace = tracing.start_turn("Qual a satisfação?")
+
+    @tracing.traced_tool
+    def count_tool(table_name: str) -> str:
+        tracing.annotate(rows_scanned=10, cache_hits=1)
+        tracing.annotate(rows_scanned=5)
+        return "12345"
+
+    with tracing.span("llm", "react_iteration_1", prompt_tokens=100, completion_tokens=20):
+        count_tool(table_name="FATO_AVCURSOS")
+        tracing.record_event("retry", "key_rotation", status=429)
+
+    with pytest.raises(ValueError):
+        with tracing.span("tool", "broken_tool"):
+            raise ValueError("falhou")
+
+    tracing.finish_turn(trace)
+    assert tracing.current_trace() is None
+
+    llm, tool, retry, broken = trace.spans
+    assert llm["parent_id"] is None
+    assert tool["parent_id"] == llm["span_id"] and retry["parent_id"] == llm["span_id"]
+    assert broken["parent_id"] is None and broken["attrs"]["error"] == "falhou"
+    assert tool["attrs"]["arguments"] == {"table_name": "FATO_AVCURSOS"}
+    assert tool["attrs"]["output_chars"] == 5
+    assert all(s["duration_ms"] is not None for s in trace.spans)
+
+    summary = trace.summary()
+    assert summary["react_iterations"] == 1
+    assert summary["prompt_tokens"] == 100 and summary["completion_tokens"] == 20
+    assert summary["rows_scanned"] == 15
+    assert summary["cache_hits"] == 1
+    assert summary["by_kind"]["tool"]["count"] == 2
+
+    exported = json.loads(trace_file.read_text(encoding="utf-8"))
+    assert exported["trace_id"] == trace.trace_id and len(exported["spans"]) == 4
+
+
+def test_without_trace_nothing_is_recorded():
+    with tracing.span("tool", "calculate_satisfaction_tool") as current:
+        tracing.annotate(rows_scanned=10)
+        tracing.record_event("retry", "key_rotation")
+    assert current is None
+
+
+def test_cached_lookups_count_as_cache_hits(tmp_path):
+    pd.DataFrame({
+        'COD_CURSO': ['C1', 'C2'], 'CURSO': ['Curso 1', 'Curso 2'], 'SETOR_CURSO': ['S1', 'S2'],
+    }).to_csv(tmp_path / 'DIM_CURSOS.csv', sep=';', index=False)
+    pd.DataFrame({
+        'ID_QUESTIONARIO': '1',
+        'ID_PERGUNTA': ['1733', '1734'] * 2,
+        'COD_CURSO': ['C1', 'C1', 'C2', 'C2'],
+        'RESPOSTA': ['Concordo', 'Discordo', 'Concordo', 'Desconheço'],
+    }).to_csv(tmp_path / 'FATO_AVCURSOS.csv', sep=';', index=False)
+    analyzer = DataAnalyzer(data_dir=str(tmp_path))
+    counts = analyzer.count_responses("FATO_AVCURSOS", group_by="COD_CURSO")
+
+    analyzer._dim_lookups.clear()
+    trace = tracing.start_turn()
+    with tracing.span("tool", "auto_join"):
+        analyzer._auto_join_dimensions(counts, "FATO_AVCURSOS")
+        analyzer._auto_join_dimensions(counts, "FATO_AVCURSOS")
+    tracing.finish_turn(trace)
+
+    # O primeiro join calcula o lookup; o segundo o reaproveita
+    assert trace.summary()["cache_hits"] == 1